@@ -0,0 +1,88 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+# Archivos de arreglos crudos usados por las grabaciones (.rec, ver Recording_IO)
+# y el modelo exportado (ver Model_Artifact):
+#   magic de 4 bytes + longitud del encabezado (uint32 LE) + encabezado JSON, y
+#   después cada arreglo alineado a 64 bytes para poder mapearlo en memoria.
+# Solo depende de NumPy, para que cargar un modelo no arrastre pandas ni sklearn.
+ALIGN = 64
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def encode_array_file(magic, header, arrays):
+    """
+    Contenido de un archivo con 'magic' + encabezado JSON + arreglos crudos
+    alineados a 64 bytes, como bytes. 'arrays' es una lista de (nombre,
+    arreglo); su nombre, dtype, forma y offset se agregan al encabezado en
+    'columns'. Los offsets son relativos al inicio, así que el bloque se puede
+    guardar dentro de otro archivo en una posición múltiplo de 64 (ver Recording_Store).
+    """
+    arrays = [(name, np.ascontiguousarray(values)) for name, values in arrays]
+
+    # El encabezado se calcula dos veces porque los offsets dependen de su longitud
+    header = dict(header, columns=[])
+    for _ in range(2):
+        offset = _aligned(8 + len(json.dumps(header).encode()))
+        header["columns"] = []
+        for name, values in arrays:
+            header["columns"].append({"name": name, "dtype": values.dtype.str,
+                                      "shape": list(values.shape), "offset": offset})
+            offset = _aligned(offset + values.nbytes)
+    header_bytes = json.dumps(header).encode()
+
+    parts = [magic, struct.pack("<I", len(header_bytes)), header_bytes]
+    size = 8 + len(header_bytes)
+    for (name, values), column in zip(arrays, header["columns"]):
+        parts.append(b"\0" * (column["offset"] - size))
+        parts.append(values.tobytes())
+        size = column["offset"] + values.nbytes
+    return b"".join(parts)
+
+
+def write_array_file(path, magic, header, arrays):
+    """Escribe encode_array_file(magic, header, arrays) en 'path' de forma atómica."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_array_file(magic, header, arrays))
+    os.replace(tmp_path, path)  # Escritura atómica
+    return path
+
+
+def read_array_header(path, magic, base=0):
+    """
+    Lee el encabezado JSON de un archivo escrito con write_array_file, o de un
+    bloque de encode_array_file guardado en la posición 'base' de otro archivo.
+    """
+    with open(path, "rb") as f:
+        f.seek(base)
+        file_magic, length = f.read(4), f.read(4)
+        if file_magic != magic or len(length) != 4:
+            raise ValueError(f"{path} no tiene el formato esperado ({magic.decode()}).")
+        return json.loads(f.read(struct.unpack("<I", length)[0]))
+
+
+def read_arrays(path, header, mmap=True, base=0):
+    """
+    Devuelve {nombre: arreglo} según el encabezado (los offsets se cuentan desde
+    'base'). Con mmap=True los arreglos se mapean en memoria en lugar de leerse completos.
+    """
+    arrays = {}
+    for column in header["columns"]:
+        dtype = np.dtype(column["dtype"])
+        shape = tuple(column.get("shape", [header.get("rows", 0)]))
+        count = int(np.prod(shape))
+        offset = base + column["offset"]
+        if count == 0:
+            arrays[column["name"]] = np.empty(shape, dtype=dtype)
+        elif mmap:
+            arrays[column["name"]] = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+        else:
+            arrays[column["name"]] = np.fromfile(path, dtype=dtype, count=count, offset=offset).reshape(shape)
+    return arrays
@@ -0,0 +1,50 @@
+import os
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QMovie, QPixmap
+
+
+class AssetCache:
+    """
+    Imágenes y GIFs de la carpeta Assets decodificados una sola vez: cada PNG
+    se guarda ya escalado y cada GIF como un QMovie compartido (con sus cuadros
+    en caché), en lugar de leerlos del disco en cada intento.
+    """
+
+    def __init__(self, folder="Assets"):
+        self.folder = folder
+        self._pixmaps = {}  # (archivo, ancho, alto) -> QPixmap escalado (None si no existe)
+        self._movies = {}  # archivo -> QMovie (None si no existe)
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def pixmap(self, name, width, height):
+        """QPixmap escalado (manteniendo la proporción), o None si el archivo no existe."""
+        key = (name, width, height)
+        if key not in self._pixmaps:
+            pixmap = QPixmap(self.path(name)) if os.path.exists(self.path(name)) else QPixmap()
+            self._pixmaps[key] = None if pixmap.isNull() else pixmap.scaled(width, height, Qt.KeepAspectRatio)
+        return self._pixmaps[key]
+
+    def movie(self, name):
+        """QMovie compartido del GIF, o None si el archivo no existe."""
+        if name not in self._movies:
+            movie = None
+            if os.path.exists(self.path(name)):
+                movie = QMovie(self.path(name))
+                # Los cuadros se decodifican la primera vez que se reproducen y después se reutilizan
+                movie.setCacheMode(QMovie.CacheAll)
+                if not movie.isValid():
+                    movie = None
+            self._movies[name] = movie
+        return self._movies[name]
+
+    def preload(self, pixmaps=(), movies=()):
+        """Carga por adelantado (pixmaps: [(archivo, ancho, alto)], movies: [archivo])."""
+        for name, width, height in pixmaps:
+            self.pixmap(name, width, height)
+        for name in movies:
+            movie = self.movie(name)
+            if movie is not None:
+                movie.jumpToFrame(0)  # Decodifica el primer cuadro
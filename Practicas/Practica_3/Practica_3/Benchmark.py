@@ -0,0 +1,227 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import Synthetic_Data
+from Device_Collector import DeviceCollector
+from Feature_Extraction import extract_features, extract_features_batch
+from Frequency_Features import FEATURE_SETS
+from Model_Artifact import MovementModel
+from Recording_IO import load_recording, write_recording
+from Sensor_Client import SensorClient
+from Training_Model import MovementEvaluationSystem
+
+
+def measure(function, repeat=5, number=1):
+    """
+    Ejecuta function() 'number' veces por ronda durante 'repeat' rondas y
+    devuelve estadísticas del tiempo por llamada en milisegundos.
+    """
+    function()  # Calentamiento (importaciones perezosas, cachés)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number * 1000)
+    times.sort()
+    return {"min_ms": times[0], "median_ms": statistics.median(times), "mean_ms": statistics.fmean(times),
+            "p95_ms": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+            "repeat": repeat, "number": number}
+
+
+class BenchmarkSuite:
+    """
+    Benchmarks del pipeline completo sobre datos sintéticos (Synthetic_Data),
+    reproducibles entre ejecuciones: ingesta de sensors.json, E/S de grabaciones,
+    extracción de características, entrenamiento, similitud y calificación del juego.
+    """
+
+    def __init__(self, workdir, recordings=20, duration=6.0, seed=0, repeat=5):
+        self.workdir = workdir
+        self.recordings = recordings
+        self.duration = duration
+        self.seed = seed
+        self.repeat = repeat
+        self.results = {}
+        self._system = None
+
+    @property
+    def data_folder(self):
+        return os.path.join(self.workdir, "datos")
+
+    def setup(self):
+        """Genera el conjunto sintético una sola vez para todos los benchmarks."""
+        self.paths = Synthetic_Data.generate_dataset(self.data_folder, recordings=self.recordings,
+                                                     duration=self.duration, seed=self.seed)
+        self.recording = Synthetic_Data.generate_recording("Curl", self.duration, seed=self.seed)
+
+    def record(self, name, stats, items=None, unit=None):
+        """Guarda el resultado; con 'items' agrega el rendimiento (items por segundo)."""
+        if items is not None:
+            stats["throughput"] = items / (stats["median_ms"] / 1000)
+            stats["unit"] = unit
+        self.results[name] = stats
+        rate = f"  ({stats['throughput']:.0f} {unit}/s)" if items is not None else ""
+        print(f"{name:<30} mediana {stats['median_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms{rate}")
+
+    def system(self):
+        """Sistema entrenado con los datos sintéticos (se entrena la primera vez que se pide)."""
+        if self._system is None:
+            self._system = MovementEvaluationSystem(data_folder=self.data_folder, cache_path=None)
+            with contextlib.redirect_stdout(io.StringIO()):
+                self._system.train()
+        return self._system
+
+    def bench_ingest(self):
+        """process_data: decodificar, deduplicar y agregar un payload de sensors.json."""
+        payload = Synthetic_Data.generate_payload("Curl", duration=1.0, seed=self.seed, start=1.7e9)
+        samples = sum(len(details["data"]) for details in payload.values())
+        device = DeviceCollector("http://127.0.0.1:0/sensors.json", client=SensorClient("http://127.0.0.1:0"))
+
+        def ingest():
+            device.start(os.path.join(self.workdir, "ingesta"))
+            device.process(payload)
+
+        self.record("ingest.process_data", measure(ingest, self.repeat, 20), samples, "muestras")
+
+    def bench_io(self):
+        rows = len(self.recording)
+        for fmt in ("csv", "rec"):
+            base = os.path.join(self.workdir, "io_bench")
+            path = write_recording(self.recording, base, fmt)
+            self.record(f"io.write_{fmt}", measure(lambda: write_recording(self.recording, base, fmt),
+                                                    self.repeat, 5), rows, "filas")
+            self.record(f"io.read_{fmt}", measure(lambda: load_recording(path), self.repeat, 5), rows, "filas")
+            os.remove(path)
+
+    def bench_features(self):
+        sensors = ["accel", "gyro"]
+        self.record("features.extract_features", measure(lambda: extract_features(self.recording, sensors),
+                                                          self.repeat, 20), len(self.recording), "filas")
+        frames = [load_recording(path) for path in self.paths]
+        total = sum(len(df) for df in frames)
+        self.record("features.extract_batch", measure(lambda: extract_features_batch(frames, sensors),
+                                                       self.repeat, 1), total, "filas")
+        # Lectura + características de todo el conjunto con cada conjunto de características
+        for feature_set in FEATURE_SETS:
+            system = MovementEvaluationSystem(data_folder=self.data_folder, cache_path=None, feature_set=feature_set)
+            self.record(f"features.file_features_{feature_set}",
+                        measure(lambda: system.file_features(self.paths, workers=1), self.repeat, 1),
+                        len(self.paths), "grabaciones")
+
+    def bench_train(self):
+        def train():
+            system = MovementEvaluationSystem(data_folder=self.data_folder, cache_path=None)
+            with contextlib.redirect_stdout(io.StringIO()):
+                system.train()
+            self._system = system
+
+        self.record("train.full", measure(train, max(1, self.repeat // 2), 1), len(self.paths), "grabaciones")
+
+    def bench_similarity(self):
+        system = self.system()
+        features = system.clean_data(np.array(system.extract_features(self.recording)))
+        centroid = system.centroids["Curl"]
+        self.record("similarity.compute_similarity",
+                    measure(lambda: system.compute_similarity(features, centroid), self.repeat, 200))
+        X, _ = system.file_features(self.paths)
+        X = system.clean_data(X)
+        scorer = system.scorer()
+        self.record("similarity.scorer_batch", measure(lambda: scorer.score(X), self.repeat, 50),
+                    len(X), "grabaciones")
+
+    def bench_grading(self):
+        """Lo mismo que MovimientoJuego.calificar_movimiento, sin la interfaz."""
+        system = self.system()
+        path = os.path.join(self.workdir, "movement_model.mmod")
+        with contextlib.redirect_stdout(io.StringIO()):
+            system.export_model(path)
+        self.record("game.load_model", measure(lambda: MovementModel.load(path), self.repeat, 20))
+        model = MovementModel.load(path)
+        scorer = model.scorer(method="inverse_distance")
+
+        def grade():
+            features = model.clean_data(np.array(model.extract_features(self.recording)))
+            return model.rating(scorer.score_movement(features, "Curl")[0])
+
+        self.record("game.grade_attempt", measure(grade, self.repeat, 20))
+
+    BENCHMARKS = ["ingest", "io", "features", "train", "similarity", "grading"]
+
+    def run(self, only=None):
+        self.setup()
+        for name in only or self.BENCHMARKS:
+            getattr(self, f"bench_{name}")()
+        return self.results
+
+
+def environment():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "numpy": np.__version__, "pandas": pd.__version__}
+
+
+def compare(results, baseline, tolerance=0.10):
+    """
+    Compara las medianas con las de una ejecución anterior. Devuelve una lista
+    de (benchmark, mediana anterior, mediana actual, cociente, estado) donde el
+    estado es "más lento"/"más rápido" si cambió más que 'tolerance'.
+    """
+    rows = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["median_ms"], stats["median_ms"]
+        ratio = after / before if before else float("inf")
+        status = "más lento" if ratio > 1 + tolerance else "más rápido" if ratio < 1 - tolerance else "igual"
+        rows.append((name, before, after, ratio, status))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline con datos sintéticos.")
+    parser.add_argument("--only", nargs="+", choices=BenchmarkSuite.BENCHMARKS, help="Correr solo estos benchmarks")
+    parser.add_argument("--recordings", type=int, default=20, help="Grabaciones sintéticas por movimiento")
+    parser.add_argument("--duration", type=float, default=6.0, help="Segundos por grabación")
+    parser.add_argument("--repeat", type=int, default=5, help="Rondas por benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="Archivo JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior para comparar")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="benchmark_")
+    try:
+        suite = BenchmarkSuite(workdir, args.recordings, args.duration, args.seed, args.repeat)
+        results = suite.run(args.only)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"date": datetime.now().isoformat(timespec="seconds"), "environment": environment(),
+              "config": {"recordings": args.recordings, "duration": args.duration, "repeat": args.repeat,
+                         "seed": args.seed},
+              "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {args.output}.")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        print(f"\nComparación con {args.compare}:")
+        for name, before, after, ratio, status in compare(results, baseline):
+            print(f"{name:<30} {before:9.3f} ms -> {after:9.3f} ms  x{ratio:.2f}  {status}")
+
+
+if __name__ == "__main__":
+    main()
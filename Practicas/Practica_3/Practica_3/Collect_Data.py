@@ -1,181 +1,193 @@
-import requests
-import pandas as pd
 import time
-from datetime import datetime
 import threading
-import os
-from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout, QWidget, QMessageBox, QLineEdit
-)
-from PyQt5.QtCore import Qt
+
+# PyQt5 se importa solo al mostrar mensajes en una ventana o al abrir la interfaz
+# (Collect_Data_App): sin ventana, las funciones de grabación no cargan Qt
+from Device_Collector import DeviceCollector
+from Metrics import metrics
+from Recording_IO import RecordingWriter
 
 # URL del servidor de sensores
 URL = "http://158.97.67.15:8080/sensors.json"
 
-# DataFrame global para almacenar los datos
-df = pd.DataFrame(columns=["timestamp", "sensor", "x", "y", "z", "w", "accuracy"])
+# Formato de los archivos de salida: "csv" o "rec" (binario columnar, ver Recording_IO)
+FILE_FORMAT = "csv"
+
+# Dispositivo por defecto (cliente HTTP, sondeo adaptativo, buffer y deduplicación
+# propios) y escritor en segundo plano: se crean con el primer uso (ver get_device
+# y get_writer), no al importar el módulo
+_device = None
+_writer = None
+_lock = threading.Lock()
 
 # Variables de control
 is_recording = False  # Indica si se está grabando
 start_time = None  # Marca el inicio de la grabación
 
-# Lock para sincronizar el acceso al DataFrame
-df_lock = threading.Lock()
+# Evento que despierta al hilo de recolección al iniciar una grabación
+recording_event = threading.Event()
 
 # Variable para almacenar el nombre de la carpeta
 output_folder = ""
 
-# Set para almacenar los timestamps ya procesados
-processed_timestamps = set()
 
+def get_device():
+    """
+    Dispositivo por defecto, creado con URL y FILE_FORMAT la primera vez (ver
+    Device_Collector.MultiDeviceCollector para grabar varios teléfonos a la vez).
+    """
+    global _device
+    with _lock:
+        if _device is None:
+            _device = DeviceCollector(URL, file_format=FILE_FORMAT)
+        return _device
+
+
+def get_writer():
+    """Hilo que guarda en disco las grabaciones entregadas en memoria (finish_recording); se crea la primera vez."""
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = RecordingWriter()
+        return _writer
+
+
+def flush():
+    """Espera a que se guarden las grabaciones pendientes (nada si aún no se creó el escritor)."""
+    if _writer is not None:
+        _writer.flush()
 
-def fetch_sensor_data():
-    """Obtiene los datos de sensores desde la URL."""
-    try:
-        response = requests.get(URL, timeout=5)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error al obtener datos: {e}")
-        return None
+
+def fetch_sensor_data(since=None):
+    """
+    Obtiene los datos de sensores desde la URL. Si se indica 'since' (segundos),
+    solo se piden las muestras posteriores a esa marca de agua.
+    """
+    return get_device().fetch(since)
 
 
 def process_data(data):
-    """Parsea los datos del JSON y los almacena en el DataFrame global."""
-    global df, processed_timestamps
-    if data is None:
+    """
+    Parsea los datos del JSON y los agrega al buffer de la grabación.
+    Devuelve la cantidad de muestras nuevas.
+    """
+    return get_device().process(data)
+
+
+def get_dataframe():
+    """Devuelve una copia de la grabación en curso como DataFrame."""
+    return get_device().to_dataframe()
+
+
+def subscribe(callback):
+    """Recibe (sensor, timestamps, values) por cada bloque nuevo de la grabación en curso."""
+    get_device().subscribe(callback)
+
+
+def unsubscribe(callback):
+    get_device().unsubscribe(callback)
+
+
+def notify(window, kind, title, text):
+    """
+    Muestra un mensaje: con 'window', un QMessageBox ('information' o
+    'warning'); sin ventana (modo sin interfaz), por consola.
+    """
+    if window is None:
+        print(text)
         return
+    from PyQt5.QtWidgets import QMessageBox
 
-    new_entries = []
-    timestamp_now = datetime.now().timestamp()
-
-    for sensor, details in data.items():
-        if "data" in details:
-            for entry in details["data"]:
-                timestamp = entry[0] / 1000  # Convertir milisegundos a segundos
-                if timestamp in processed_timestamps:
-                    continue  # Skip already processed data
-                processed_timestamps.add(timestamp)  # Mark this timestamp as processed
-
-                values = entry[1]
-                if sensor == "rot_vector":
-                    # El vector de rotación tiene 5 valores: x, y, z, w, accuracy
-                    new_entries.append({
-                        "timestamp": timestamp,
-                        "sensor": sensor,
-                        "x": values[0],
-                        "y": values[1],
-                        "z": values[2],
-                        "w": values[3],
-                        "accuracy": values[4]
-                    })
-                else:
-                    # Otros sensores tienen 3 valores: x, y, z
-                    new_entries.append({
-                        "timestamp": timestamp,
-                        "sensor": sensor,
-                        "x": values[0],
-                        "y": values[1],
-                        "z": values[2],
-                        "w": None,
-                        "accuracy": None
-                    })
-
-    new_df = pd.DataFrame(new_entries)
-    with df_lock:  # Bloquear el acceso al DataFrame mientras se actualiza
-        df = pd.concat([df, new_df], ignore_index=True)
+    getattr(QMessageBox, kind)(window, title, text)
 
 
 def data_collection_thread():
     """Función para recolectar datos en un hilo separado."""
-    global is_recording, start_time
+    device = get_device()
     while True:
-        if is_recording:
-            sensor_data = fetch_sensor_data()
-            process_data(sensor_data)
-        time.sleep(1)  # Esperar 1 segundo antes de la próxima consulta
-
-
-def start_recording(window, entry=""):
-    """Inicia la recolección de datos."""
-    global is_recording, start_time, df, processed_timestamps, output_folder
+        # Sin grabación en curso el hilo queda bloqueado en vez de despertar cada segundo
+        recording_event.wait()
+        delay = device.poll_once()
+        time.sleep(delay)  # Intervalo adaptativo antes de la próxima consulta
+
+
+def start_recording(window=None, entry=""):
+    """
+    Inicia la recolección de datos en la carpeta 'entry'. 'window' es la
+    ventana de los mensajes (None: sin interfaz). Devuelve True si empezó.
+    """
+    global is_recording, start_time, output_folder
     if not is_recording:
-        if entry != "":
-            output_folder = entry
-        else:
-            output_folder = folder_entry.text()  # Obtener el nombre de la carpeta desde la interfaz
+        output_folder = entry
         if not output_folder:
-            QMessageBox.warning(window, "Advertencia", "Por favor, ingrese un nombre para la carpeta.")
-            return
+            notify(window, "warning", "Advertencia", "Por favor, ingrese un nombre para la carpeta.")
+            return False
 
-        QMessageBox.information(window, "Inicio", "La recolección de datos empezará al presionar el botón.")
+        if window is not None:
+            notify(window, "information", "Inicio", "La recolección de datos empezará al presionar el botón.")
 
+        device = get_device()
+        device.start(output_folder)  # Reiniciar el buffer y las marcas de agua de cada sensor
+        start_time = device.start_time
         is_recording = True
-        start_time = datetime.now()
-        df = pd.DataFrame(columns=["timestamp", "sensor", "x", "y", "z", "w", "accuracy"])  # Reiniciar el DataFrame
-        processed_timestamps = set()  # Reiniciar el conjunto de timestamps procesados
+        recording_event.set()
+        return True
 
     else:
-        QMessageBox.warning(window, "Advertencia", "La recolección de datos ya está en curso.")
+        notify(window, "warning", "Advertencia", "La recolección de datos ya está en curso.")
+        return False
 
 
-def stop_recording(window):
-    """Detiene la recolección de datos y guarda los datos en un archivo."""
-    global is_recording, start_time, df, output_folder
+def stop_recording(window=None):
+    """
+    Detiene la recolección de datos y guarda los datos en un archivo.
+    Devuelve la ruta del archivo (None si no había una grabación en curso).
+    """
+    global is_recording, start_time, output_folder
     if is_recording:
         is_recording = False
-        end_time = datetime.now()
-
-        # Crear la carpeta si no existe
-        if not os.path.exists(output_folder):
-            os.makedirs(output_folder)
-
-        # Guardar los datos en un archivo CSV dentro de la carpeta
-        filename = f"{output_folder}/sensor_data_{start_time.strftime('%Y%m%d_%H%M%S')}_to_{end_time.strftime('%Y%m%d_%H%M%S')}.csv"
-        df.to_csv(filename, index=False)
-        QMessageBox.information(window, "Fin", f"La recolección de datos ha finalizado. Los datos se han guardado en {filename}.")
+        recording_event.clear()
+
+        # Guardar los datos en un archivo (CSV o .rec) dentro de la carpeta (se crea si no existe)
+        device = get_device()
+        device.output_folder = output_folder
+        filename = device.stop()
+        notify(window, "information", "Fin",
+               f"La recolección de datos ha finalizado. Los datos se han guardado en {filename}.")
+        return filename
     else:
-        QMessageBox.warning(window, "Advertencia", "La recolección de datos no está en curso.")
-
-
-class DataCollectionApp(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Recolección de Datos de Sensores")
-        self.setGeometry(100, 100, 400, 200)
-
-        # Layout principal
-        self.central_widget = QWidget()
-        self.setCentralWidget(self.central_widget)
-        self.layout = QVBoxLayout(self.central_widget)
-
-        # Campo de entrada para el nombre de la carpeta
-        self.folder_label = QLabel("Nombre de la carpeta:", self)
-        self.layout.addWidget(self.folder_label)
+        notify(window, "warning", "Advertencia", "La recolección de datos no está en curso.")
+        return None
 
-        global folder_entry
-        folder_entry = QLineEdit(self)
-        self.layout.addWidget(folder_entry)
 
-        # Botón para iniciar la recolección
-        self.start_button = QPushButton("Iniciar Recolección", self)
-        self.start_button.clicked.connect(lambda: start_recording(self))
-        self.layout.addWidget(self.start_button)
+def finish_recording(save=True, store=None, movement=None):
+    """
+    Detiene la recolección y devuelve la grabación como DataFrame directamente
+    desde memoria (None si no había una grabación en curso). Si save es True el
+    archivo se guarda en segundo plano, sin bloquear a quien llama; si se indica
+    'store' (un Recording_Store.RecordingStore), se agrega a él como intento de
+    'movement' en lugar de escribir un archivo propio.
+    """
+    global is_recording
+    if not is_recording:
+        return None
+    is_recording = False
+    recording_event.clear()
 
-        # Botón para detener la recolección
-        self.stop_button = QPushButton("Detener Recolección", self)
-        self.stop_button.clicked.connect(lambda: stop_recording(self))
-        self.layout.addWidget(self.stop_button)
+    device = get_device()
+    device.output_folder = output_folder
+    with metrics.timer("collect.finish_recording"):
+        df, filename = device.finish()
+        if save and store is not None:
+            get_writer().submit_to_store(store, df, movement)
+        elif save:
+            get_writer().submit(df, filename, device.file_format)
+    return df
 
 
 if __name__ == "__main__":
-    # Iniciar el hilo de recolección de datos
-    data_thread = threading.Thread(target=data_collection_thread)
-    data_thread.daemon = True  # El hilo se detendrá cuando el programa principal termine
-    data_thread.start()
-
-    # Iniciar la aplicación PyQt5
-    app = QApplication([])
-    window = DataCollectionApp()
-    window.show()
-    app.exec_()
\ No newline at end of file
+    # La interfaz usa el módulo importado (no __main__) para compartir el estado con
+    # el hilo de recolección; para grabar sin interfaz, ver Collector_Daemon
+    from Collect_Data_App import main
+
+    main()
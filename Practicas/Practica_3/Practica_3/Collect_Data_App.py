@@ -0,0 +1,68 @@
+import threading
+
+from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout, QWidget, QLineEdit
+
+import Collect_Data
+
+
+class DataCollectionApp(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Recolección de Datos de Sensores")
+        self.setGeometry(100, 100, 400, 200)
+
+        # Layout principal
+        self.central_widget = QWidget()
+        self.setCentralWidget(self.central_widget)
+        self.layout = QVBoxLayout(self.central_widget)
+
+        # Campo de entrada para el nombre de la carpeta
+        self.folder_label = QLabel("Nombre de la carpeta:", self)
+        self.layout.addWidget(self.folder_label)
+
+        self.folder_entry = QLineEdit(self)
+        self.layout.addWidget(self.folder_entry)
+
+        # Botón para iniciar la recolección
+        self.start_button = QPushButton("Iniciar Recolección", self)
+        self.start_button.clicked.connect(lambda: Collect_Data.start_recording(self, self.folder_entry.text()))
+        self.layout.addWidget(self.start_button)
+
+        # Botón para detener la recolección
+        self.stop_button = QPushButton("Detener Recolección", self)
+        self.stop_button.clicked.connect(lambda: Collect_Data.stop_recording(self))
+        self.layout.addWidget(self.stop_button)
+
+        # Botón para ver las trazas de los sensores mientras se graba
+        self.live_button = QPushButton("Ver Sensores en Vivo", self)
+        self.live_button.clicked.connect(self.show_live_plot)
+        self.layout.addWidget(self.live_button)
+        self.live_plot = None
+
+    def show_live_plot(self):
+        """Abre (o trae al frente) la vista en vivo de la grabación en curso."""
+        import matplotlib.pyplot as plt
+        from Live_Plot import LivePlot  # matplotlib solo se carga si se usa la vista
+
+        if self.live_plot is None or not plt.fignum_exists(self.live_plot.fig.number):
+            if self.live_plot is not None:
+                self.live_plot.stop()
+            self.live_plot = LivePlot().attach(Collect_Data.get_device()).start()
+        self.live_plot.fig.show()
+
+
+def main():
+    # Iniciar el hilo de recolección de datos
+    data_thread = threading.Thread(target=Collect_Data.data_collection_thread)
+    data_thread.daemon = True  # El hilo se detendrá cuando el programa principal termine
+    data_thread.start()
+
+    # Iniciar la aplicación PyQt5
+    app = QApplication([])
+    window = DataCollectionApp()
+    window.show()
+    app.exec_()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import json
+import signal
+import socket
+import socketserver
+import threading
+import time
+
+from Device_Collector import DeviceCollector
+from Metrics import metrics
+from Recording_IO import RecordingWriter
+
+# Socket de control: solo escucha en la máquina local
+CONTROL_HOST = "127.0.0.1"
+CONTROL_PORT = 8766
+
+# Grabaciones en cola para escribir antes de que la recolección espere al disco
+MAX_PENDING = 4
+
+
+class HeadlessCollector:
+    """
+    Recolección sin interfaz (sin Qt): un DeviceCollector, un hilo que lo
+    sondea mientras hay una grabación en curso y un RecordingWriter que
+    guarda en segundo plano. La cola del writer es acotada: si el disco no da
+    abasto, cerrar una grabación espera a que haya lugar (contrapresión). Con
+    'split_seconds' una grabación larga se corta en archivos de esa duración,
+    así la memoria no crece con la sesión.
+    Los comandos (start, stop, status) se pueden llamar desde cualquier hilo.
+    """
+
+    def __init__(self, url, folder="datos/sin_interfaz", file_format="csv", split_seconds=None,
+                 max_pending=MAX_PENDING, device=None):
+        self.device = device or DeviceCollector(url, folder, file_format=file_format)
+        self.device.output_folder = self.device.output_folder or folder
+        self.writer = RecordingWriter(max_pending)
+        self.split_seconds = split_seconds
+        self.lock = threading.Lock()
+        self.recording_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.recordings = 0  # Grabaciones entregadas al writer
+        self._started = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            # Sin grabación en curso el hilo queda bloqueado (se revisa stop_event cada tanto)
+            if not self.recording_event.wait(0.5):
+                continue
+            delay = self.device.poll_once()
+            with self.lock:
+                if (self.split_seconds and self.device.is_recording
+                        and time.monotonic() - self._started >= self.split_seconds):
+                    self._save(*self.device.rotate())
+                    self._started = time.monotonic()
+            self.stop_event.wait(delay)
+
+    def _save(self, df, filename):
+        """Entrega la grabación al writer (se bloquea si la cola está llena)."""
+        with metrics.timer("collect.writer_wait"):
+            self.writer.submit(df, filename, self.device.file_format)
+        self.recordings += 1
+        return filename
+
+    def start(self, folder=None):
+        with self.lock:
+            if self.device.is_recording:
+                return {"ok": False, "error": "La recolección de datos ya está en curso."}
+            self.device.start(folder)
+            self._started = time.monotonic()
+            self.recording_event.set()
+            return {"ok": True, "folder": self.device.output_folder}
+
+    def stop(self):
+        with self.lock:
+            if not self.device.is_recording:
+                return {"ok": False, "error": "La recolección de datos no está en curso."}
+            self.recording_event.clear()
+            df, filename = self.device.finish()
+            self._save(df, filename)
+            return {"ok": True, "file": f"{filename}.{self.device.file_format}", "rows": len(df)}
+
+    def status(self):
+        with self.lock:
+            recording = self.device.is_recording
+            return {"ok": True, "recording": recording, "folder": self.device.output_folder,
+                    "seconds": time.monotonic() - self._started if recording else None,
+                    "samples": len(self.device.recording), "recordings": self.recordings,
+                    "pending_writes": self.writer.pending(), "last_written": self.writer.last_written}
+
+    def handle(self, line):
+        """Ejecuta una línea de comando ("start [carpeta]", "stop", "status") y devuelve la respuesta."""
+        command, _, argument = line.strip().partition(" ")
+        if command == "start":
+            return self.start(argument.strip() or None)
+        if command == "stop":
+            return self.stop()
+        if command == "status":
+            return self.status()
+        return {"ok": False, "error": f"Comando desconocido: {command}"}
+
+    def close(self):
+        """Detiene la grabación en curso (guardándola) y espera a que se escriba todo."""
+        if self.device.is_recording:
+            self.stop()
+        self.stop_event.set()
+        self.recording_event.set()  # Despertar al hilo para que termine
+        self._thread.join()
+        self.writer.flush()
+
+
+class ControlServer(socketserver.ThreadingTCPServer):
+    """
+    Socket de control del recolector: una línea de texto por comando ("start
+    [carpeta]", "stop", "status" o "quit") y una línea JSON por respuesta.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, collector, host=CONTROL_HOST, port=CONTROL_PORT):
+        self.collector = collector
+        super().__init__((host, port), _ControlHandler)
+
+    def request_shutdown(self):
+        # shutdown() espera a serve_forever: se llama desde otro hilo
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            if line == "quit":
+                response = {"ok": True}
+                self.server.request_shutdown()
+            else:
+                response = self.server.collector.handle(line)
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+            if line == "quit":
+                return
+
+
+def send_command(command, host=CONTROL_HOST, port=CONTROL_PORT, timeout=30.0):
+    """Envía un comando al recolector en segundo plano y devuelve su respuesta (dict)."""
+    with socket.create_connection((host, port), timeout=timeout) as connection:
+        connection.sendall((command + "\n").encode("utf-8"))
+        with connection.makefile("r", encoding="utf-8") as f:
+            return json.loads(f.readline())
+
+
+def _print_response(response):
+    if not response.get("ok"):
+        print(response.get("error", "Error"))
+        return
+    for key, value in response.items():
+        if key != "ok":
+            print(f"{key}: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recolección de datos de sensores sin interfaz gráfica.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_device_arguments(subparser):
+        subparser.add_argument("--url", help="URL de sensors.json (por defecto la de Collect_Data)")
+        subparser.add_argument("--fake", action="store_true", help="Usar el servidor de sensores simulado")
+        subparser.add_argument("--folder", default="datos/sin_interfaz", help="Carpeta de salida")
+        subparser.add_argument("--format", choices=["csv", "rec"], default="csv", help="Formato de los archivos")
+        subparser.add_argument("--split", type=float, metavar="SEGUNDOS",
+                               help="Cortar la grabación en archivos de esta duración")
+
+    record = commands.add_parser("record", help="Graba una vez durante --duration segundos")
+    add_device_arguments(record)
+    record.add_argument("--duration", type=float, default=5.0, help="Segundos de grabación")
+    daemon = commands.add_parser("daemon", help="Queda en segundo plano y obedece al socket de control")
+    add_device_arguments(daemon)
+    daemon.add_argument("--port", type=int, default=CONTROL_PORT, help="Puerto local del socket de control")
+    daemon.add_argument("--autostart", action="store_true", help="Empezar a grabar al iniciar")
+    for name, help_text in [("start", "Empieza una grabación"), ("stop", "Termina y guarda la grabación"),
+                            ("status", "Estado del recolector"), ("quit", "Termina el recolector")]:
+        control = commands.add_parser(name, help=help_text)
+        control.add_argument("--port", type=int, default=CONTROL_PORT)
+        if name == "start":
+            control.add_argument("--folder", help="Carpeta de salida (por defecto, la del recolector)")
+    args = parser.parse_args()
+
+    if args.command in ("start", "stop", "status", "quit"):
+        command = f"start {args.folder}" if args.command == "start" and args.folder else args.command
+        try:
+            _print_response(send_command(command, port=args.port))
+        except OSError as e:
+            print(f"No se pudo contactar al recolector en el puerto {args.port}: {e}")
+        return
+
+    fake = None
+    if args.fake:
+        from Fake_Sensor_Server import FakeSensorServer
+        fake = FakeSensorServer().start()
+        url = fake.url
+    elif args.url:
+        url = args.url
+    else:
+        from Collect_Data import URL as url
+
+    collector = HeadlessCollector(url, args.folder, args.format, args.split)
+    try:
+        if args.command == "record":
+            collector.start()
+            time.sleep(args.duration)
+            _print_response(collector.stop())
+            return
+
+        server = ControlServer(collector, port=args.port)
+        signal.signal(signal.SIGTERM, lambda *_: server.request_shutdown())
+        if args.autostart:
+            collector.start()
+        print(f"Recolector escuchando en {CONTROL_HOST}:{args.port}.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    finally:
+        collector.close()  # Guarda la grabación en curso y espera al writer
+        if fake is not None:
+            fake.stop()
+        if collector.writer.last_written:
+            print(f"Último archivo guardado: {collector.writer.last_written}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Feature_Extraction import AXES, FEATURES_PER_SENSOR, features_from_arrays, sensor_codes, sensor_counts, window_assignments
+from Recording_IO import list_recordings, load_recording
+
+# Con pocos archivos el costo de levantar procesos supera al de leerlos en serie
+MIN_PARALLEL_FILES = 64
+
+
+class RecordingArrays:
+    """
+    Columnas de una grabación ya parseada y reducida a lo que usan las
+    características: código de sensor (posición en la lista de sensores),
+    x, y, z y el timestamp (para dividirla en ventanas).
+    """
+
+    def __init__(self, path, codes, x, y, z, timestamps=None):
+        self.path = path
+        self.timestamps = timestamps
+        self.codes = codes
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __len__(self):
+        return len(self.codes)
+
+
+def read_recording_arrays(path, sensors):
+    """Lee una grabación (.rec o CSV) una sola vez y conserva solo los sensores usados."""
+    return recording_arrays(load_recording(path), sensors, path)
+
+
+def recording_arrays(df, sensors, path=None):
+    """RecordingArrays de una grabación ya cargada (DataFrame), con solo los sensores usados."""
+    if df.empty:
+        empty = np.empty(0)
+        return RecordingArrays(path, np.empty(0, dtype=np.int8), empty, empty, empty, empty)
+    codes = sensor_codes(df, sensors)
+    used = codes >= 0
+    columns = [np.asarray(df[axis], dtype=np.float64)[used] for axis in AXES]
+    timestamps = np.asarray(df["timestamp"], dtype=np.float64)[used]
+    return RecordingArrays(path, codes[used].astype(np.int8), *columns, timestamps=timestamps)
+
+
+def _read_chunk(args):
+    paths, sensors = args
+    return [read_recording_arrays(path, sensors) for path in paths]
+
+
+def _chunks(paths, workers, *args):
+    """Trozos de varios archivos por tarea para amortizar la comunicación entre procesos."""
+    chunk = max(1, len(paths) // (workers * 4))
+    return [(paths[i:i + chunk], *args) for i in range(0, len(paths), chunk)]
+
+
+def load_recordings(paths, sensors, workers=None):
+    """
+    Lee y parsea cada grabación exactamente una vez, repartiendo los archivos
+    en un pool de procesos del tamaño de los núcleos disponibles. Devuelve una
+    lista de RecordingArrays en el mismo orden que 'paths'.
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < MIN_PARALLEL_FILES:
+        return _read_chunk((paths, sensors))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [recording for result in executor.map(_read_chunk, _chunks(paths, workers, sensors))
+                for recording in result]
+
+
+def window_features(recording, sensor_count, window_seconds, step_seconds, min_samples=10,
+                    feature_set="basic", sensors=None):
+    """
+    Características de cada ventana de una grabación (ver
+    Feature_Extraction.window_assignments). Se descartan las ventanas con menos
+    de 'min_samples' filas. Devuelve una matriz (ventanas, 7 * sensores); con
+    feature_set="extended" se agregan las de frecuencia de los 'sensors'
+    (nombres) que las tienen (ver Frequency_Features).
+    """
+    if feature_set == "extended":
+        # Importación diferida: Frequency_Features usa Resampling, que importa este módulo
+        import Frequency_Features
+        width = Frequency_Features.feature_width(sensors, feature_set)
+    else:
+        width = sensor_count * FEATURES_PER_SENSOR
+    if not len(recording):
+        return np.zeros((0, width))
+    rows, windows, n_windows = window_assignments(recording.timestamps, window_seconds, step_seconds)
+    codes = recording.codes[rows].astype(np.int64)
+    features = features_from_arrays(windows, codes, recording.x[rows], recording.y[rows], recording.z[rows],
+                                    n_windows, sensor_count, exact=False)
+    counts = sensor_counts(windows, codes, n_windows, sensor_count)
+    if feature_set == "extended":
+        features = np.hstack([features, Frequency_Features.window_frequency_features(
+            recording, sensors, window_seconds, step_seconds, n_windows)])
+    return features[counts.sum(axis=1) >= min_samples]
+
+
+def _window_chunk(args):
+    paths, sensors, window_seconds, step_seconds, min_samples, feature_set = args
+    # Cada proceso lee y reduce sus grabaciones: solo viajan las matrices de ventanas
+    return [window_features(read_recording_arrays(path, sensors), len(sensors),
+                            window_seconds, step_seconds, min_samples, feature_set, sensors) for path in paths]
+
+
+def load_window_features(paths, sensors, window_seconds, step_seconds, min_samples=10, workers=None,
+                         feature_set="basic"):
+    """
+    Matriz de características por ventana de todas las grabaciones, calculada
+    en bloque y en paralelo (pool de procesos, como load_recordings).
+    Devuelve (características (n_ventanas, ancho del conjunto de características),
+    índice en 'paths' de la grabación de cada ventana).
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    args = (sensors, window_seconds, step_seconds, min_samples, feature_set)
+    if workers == 1 or len(paths) < MIN_PARALLEL_FILES:
+        matrices = _window_chunk((paths, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            matrices = [matrix for result in executor.map(_window_chunk, _chunks(paths, workers, *args))
+                        for matrix in result]
+
+    recording = np.repeat(np.arange(len(paths)), [len(matrix) for matrix in matrices])
+    if not matrices:
+        import Frequency_Features
+        return np.zeros((0, Frequency_Features.feature_width(sensors, feature_set))), recording
+    return np.concatenate(matrices), recording
+
+
+def subsample(labels, max_samples, seed=42):
+    """
+    Índices de a lo sumo 'max_samples' elementos, manteniendo la proporción de
+    cada etiqueta (muestreo estratificado sin reemplazo), en orden ascendente.
+    """
+    labels = np.asarray(labels)
+    if max_samples is None or len(labels) <= max_samples:
+        return np.arange(len(labels))
+    rng = np.random.default_rng(seed)
+    keep = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        take = max(1, int(round(len(members) * max_samples / len(labels))))
+        keep.append(rng.choice(members, size=min(take, len(members)), replace=False))
+    return np.sort(np.concatenate(keep))
+
+
+def concatenate(recordings, groups=None):
+    """
+    Concatena las grabaciones en arreglos planos. Devuelve (ids, codes, x, y, z)
+    donde ids es el índice de la grabación o, si se indica 'groups', el grupo
+    (por ejemplo el movimiento) al que pertenece cada grabación.
+    """
+    if groups is None:
+        groups = np.arange(len(recordings))
+    lengths = [len(recording) for recording in recordings]
+    ids = np.repeat(np.asarray(groups, dtype=np.int64), lengths)
+    if not recordings:
+        empty = np.empty(0)
+        return ids, np.empty(0, dtype=np.int64), empty, empty, empty
+    codes = np.concatenate([recording.codes for recording in recordings]).astype(np.int64)
+    x, y, z = (np.concatenate([getattr(recording, axis) for recording in recordings]) for axis in AXES)
+    return ids, codes, x, y, z
+
+
+def list_movement_files(data_folder, movements):
+    """Lista las grabaciones de cada movimiento: ([rutas], [índice de movimiento])."""
+    paths, labels = [], []
+    for index, movement in enumerate(movements):
+        movement_folder = os.path.join(data_folder, movement)
+        if not os.path.isdir(movement_folder):
+            continue
+        files = list_recordings(movement_folder)
+        paths.extend(files)
+        labels.extend([index] * len(files))
+    return paths, labels
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import requests
+
+from Metrics import metrics
+from Recording_IO import write_recording
+from Sensor_Buffer import RecordingBuffer, SampleDeduplicator, decode_block
+from Sensor_Client import PollScheduler, SensorClient
+
+
+# Consultas sin muestras nuevas tras las que un sensor deja de contar para la marca de agua
+IDLE_POLLS = 5
+
+
+def recording_filename(folder, start_time, end_time):
+    """Nombre (sin extensión) de una grabación, con el mismo formato que datos/ y test/."""
+    return f"{folder}/sensor_data_{start_time.strftime('%Y%m%d_%H%M%S')}_to_{end_time.strftime('%Y%m%d_%H%M%S')}"
+
+
+class DeviceCollector:
+    """
+    Estado de recolección de un teléfono: cliente HTTP, sondeo adaptativo,
+    buffer columnar, deduplicación por sensor y carpeta de salida propios.
+    """
+
+    def __init__(self, url, output_folder="", name=None, client=None, scheduler=None, file_format="csv"):
+        self.url = url
+        self.name = name or url
+        self.output_folder = output_folder
+        self.file_format = file_format  # "csv" o "rec" (binario columnar, ver Recording_IO)
+        self.client = client or SensorClient(url)
+        self.scheduler = scheduler or PollScheduler()
+        self.recording = RecordingBuffer()
+        self.deduplicator = SampleDeduplicator()
+        self.lock = threading.Lock()
+        self.is_recording = False
+        self.start_time = None
+        self.subscribers = []  # Funciones (sensor, timestamps, values) llamadas con cada bloque nuevo
+        self.polls = 0
+        self.last_active = {}  # Sensor -> número de consulta en la que trajo muestras nuevas por última vez
+
+    def fetch(self, since=None):
+        """Obtiene el JSON de sensores; devuelve None si la consulta falla."""
+        try:
+            with metrics.timer("collect.poll_rtt"):
+                data = self.client.fetch(since)
+            metrics.count("collect.payload_bytes", self.client.last_payload_bytes)
+            return data
+        except (requests.RequestException, ValueError) as e:
+            metrics.count("collect.poll_errors")
+            print(f"Error al obtener datos de {self.name}: {e}")
+            return None
+
+    def watermark(self):
+        """
+        Marca de agua para la consulta incremental: el timestamp más reciente que
+        ya tienen todos los sensores activos (None si aún no hay muestras). Un
+        sensor que no trae muestras nuevas en IDLE_POLLS consultas deja de
+        contar, para que no obligue a descargar todo el historial en cada
+        consulta; sus muestras nuevas, si vuelve, son posteriores a la marca.
+        """
+        marks = {sensor: self.deduplicator.high_water(sensor) for sensor in self.deduplicator.sensors}
+        marks = {sensor: mark for sensor, mark in marks.items() if np.isfinite(mark)}
+        if not marks:
+            return None
+        active = [mark for sensor, mark in marks.items()
+                  if self.polls - self.last_active.get(sensor, self.polls) <= IDLE_POLLS]
+        return min(active) if active else max(marks.values())
+
+    def process(self, data):
+        """
+        Parsea los datos del JSON y los agrega al buffer de la grabación.
+        Devuelve la cantidad de muestras nuevas.
+        """
+        if data is None:
+            return 0
+
+        with metrics.timer("collect.process"):
+            added = self._process(data)
+        metrics.count("collect.samples_ingested", added)
+        return added
+
+    def _process(self, data):
+        added = 0
+        for sensor, details in data.items():
+            if "data" in details and details["data"]:
+                entries = details["data"]
+                timestamps = np.fromiter((entry[0] for entry in entries), dtype=np.float64, count=len(entries)) / 1000
+                keep = self.deduplicator.filter(sensor, timestamps)  # Descartar (sensor, timestamp) ya procesados
+                metrics.count("collect.samples_duplicate", len(entries) - int(keep.sum()))
+                if not keep.any():
+                    continue
+                new_entries = [entries[i] for i in np.flatnonzero(keep)]
+                self.last_active[sensor] = self.polls
+
+                # rot_vector trae x, y, z, w, accuracy; los demás sensores solo x, y, z
+                block_timestamps, values = decode_block(new_entries)
+                with self.lock:  # Bloquear el acceso al buffer mientras se actualiza
+                    self.recording.append(sensor, block_timestamps, values)
+                for callback in list(self.subscribers):
+                    callback(sensor, block_timestamps, values)
+                added += len(new_entries)
+        return added
+
+    def subscribe(self, callback):
+        """
+        Registra una función que recibe (sensor, timestamps, values) por cada bloque
+        de muestras nuevas. Se llama desde el hilo de recolección.
+        """
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def poll_once(self):
+        """Hace una consulta y devuelve cuántos segundos esperar hasta la siguiente."""
+        metrics.count("collect.polls")
+        self.polls += 1
+        data = self.fetch(self.watermark())
+        if data is None:
+            return self.scheduler.record_failure()  # Retroceso exponencial tras un error
+        added = self.process(data)
+        return self.scheduler.record_poll(added, self.client.last_payload_bytes)
+
+    def to_dataframe(self):
+        """Devuelve una copia de la grabación en curso como DataFrame."""
+        with self.lock:
+            return self.recording.to_dataframe()
+
+    def start(self, output_folder=None):
+        """Reinicia el estado y marca el inicio de una grabación."""
+        if output_folder:
+            self.output_folder = output_folder
+        self.start_time = datetime.now()
+        with self.lock:
+            self.recording.clear()
+        self.deduplicator.reset()
+        self.last_active = {}
+        self.scheduler.reset()
+        self.is_recording = True
+
+    def finish(self):
+        """
+        Termina la grabación sin guardarla. Devuelve (DataFrame, ruta sin extensión
+        donde corresponde guardarla).
+        """
+        self.is_recording = False
+        end_time = datetime.now()
+        with metrics.timer("collect.finish"):
+            return self.to_dataframe(), recording_filename(self.output_folder, self.start_time, end_time)
+
+    def rotate(self):
+        """
+        Cierra la grabación en curso y empieza otra a continuación, sin reiniciar
+        la deduplicación ni las marcas de agua (no se repiten ni se pierden
+        muestras entre ambas). Devuelve lo mismo que finish().
+        """
+        df, filename = self.finish()
+        self.start_time = datetime.now()
+        with self.lock:
+            self.recording.clear()
+        self.is_recording = True
+        return df, filename
+
+    def stop(self):
+        """Termina la grabación y la guarda en 'file_format'; devuelve la ruta del archivo."""
+        with metrics.timer("collect.stop_recording"):
+            df, filename = self.finish()
+            os.makedirs(self.output_folder, exist_ok=True)
+            return write_recording(df, filename, self.file_format)
+
+
+class MultiDeviceCollector:
+    """
+    Recolecta de N teléfonos a la vez con un solo bucle asyncio. Cada
+    dispositivo tiene su propia corrutina de sondeo; las consultas HTTP
+    (bloqueantes) se ejecutan en un ThreadPoolExecutor acotado, así que un
+    dispositivo lento no retrasa a los demás.
+    """
+
+    def __init__(self, devices, max_workers=None):
+        self.devices = list(devices)
+        self.max_workers = max_workers or min(32, max(len(self.devices), 1))
+        self._loop = None
+        self._stop_event = None
+
+    async def _poll_device(self, device, executor):
+        loop = asyncio.get_running_loop()
+        while not self._stop_event.is_set():
+            delay = await loop.run_in_executor(executor, device.poll_once)
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, duration=None):
+        """
+        Graba de todos los dispositivos hasta que pase 'duration' segundos o se
+        llame a stop(). Devuelve {nombre del dispositivo: ruta del archivo}.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        for device in self.devices:
+            device.start()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            tasks = [asyncio.create_task(self._poll_device(device, executor)) for device in self.devices]
+            if duration is not None:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=duration)
+                except asyncio.TimeoutError:
+                    self._stop_event.set()
+            await asyncio.gather(*tasks)
+            files = await asyncio.gather(*[self._loop.run_in_executor(executor, device.stop)
+                                           for device in self.devices])
+        return {device.name: filename for device, filename in zip(self.devices, files)}
+
+    def stop(self):
+        """Detiene la grabación; se puede llamar desde cualquier hilo."""
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def record(self, duration):
+        """Versión síncrona de run()."""
+        return asyncio.run(self.run(duration))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recolección simultánea de varios teléfonos.")
+    parser.add_argument("urls", nargs="+", help="URLs de sensors.json de cada dispositivo")
+    parser.add_argument("--output", default="datos/grupo", help="Carpeta base de salida")
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos de grabación")
+    parser.add_argument("--format", choices=["csv", "rec"], default="csv", help="Formato de los archivos")
+    args = parser.parse_args()
+
+    devices = [DeviceCollector(url, os.path.join(args.output, f"dispositivo_{i + 1}"), name=url,
+                               file_format=args.format)
+               for i, url in enumerate(args.urls)]
+    files = MultiDeviceCollector(devices).record(args.duration)
+    for name, filename in files.items():
+        print(f"{name}: datos guardados en {filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,252 @@
+import argparse
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import os
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+
+from Recording_IO import list_recordings, load_recording
+from Sensor_Buffer import drop_duplicate_samples
+
+# Umbral para dividir los datos en segmentos continuos (segundos)
+GAP_SECONDS = 1.0
+
+# Puntos por eje a partir de los cuales se reduce la serie antes de graficar
+MAX_POINTS = 2000
 
 def remove_duplicates_and_overlaps(df):
     """
     Elimina datos duplicados y solapamientos en el tiempo.
     """
-    # Eliminar filas duplicadas (mismo timestamp y mismos valores)
-    df = df.drop_duplicates()
-
-    # Eliminar solapamientos en el tiempo (mantener la primera medición por timestamp)
-    df = df.drop_duplicates(subset=['timestamp', 'sensor'], keep='first')
-
-    return df
-
-def plot_sensor_data(file_path):
-    """Grafica los datos de todos los sensores en una sola pantalla."""
-    # Leer el archivo CSV
-    df = pd.read_csv(file_path)
+    # Una sola pasada vectorizada: conservar la primera medición por (sensor, timestamp),
+    # lo que también elimina las filas duplicadas completas
+    return drop_duplicate_samples(df)
 
-    # Convertir el timestamp a un formato legible
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+def downsample_minmax(t, y, max_points):
+    """
+    Reduce la serie a ~max_points puntos conservando el mínimo y el máximo de
+    cada bloque (en su orden temporal), para no perder los picos.
+    """
+    n = len(t)
+    if n <= max_points or max_points < 4:
+        return t, y
+    starts = np.linspace(0, n, max_points // 2 + 1).astype(np.int64)[:-1]
+    block = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    # NaN como ±inf para que no ganen el mínimo ni el máximo
+    low = np.minimum.reduceat(np.where(np.isnan(y), np.inf, y), starts)
+    high = np.maximum.reduceat(np.where(np.isnan(y), -np.inf, y), starts)
+    # Primera posición de cada bloque que alcanza su mínimo o su máximo
+    keep = []
+    for extreme in (low, high):
+        hits = np.flatnonzero(y == extreme[block])
+        _, first = np.unique(block[hits], return_index=True)
+        keep.append(hits[first])
+    keep = np.unique(np.concatenate(keep))
+    return t[keep], y[keep]
+
+def downsample_lttb(t, y, max_points):
+    """
+    Reduce la serie a max_points puntos con Largest-Triangle-Three-Buckets:
+    en cada bloque conserva el punto que forma el triángulo más grande con el
+    elegido anterior y el promedio del bloque siguiente (mantiene la forma).
+    """
+    n = len(t)
+    if n <= max_points or max_points < 3:
+        return t, y
+    x = t.astype(np.float64)
+    values = np.nan_to_num(y.astype(np.float64))
+    bounds = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    bounds = np.r_[bounds, n]
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    selected = 0
+    for b in range(max_points - 2):
+        start, end, next_end = bounds[b], bounds[b + 1], bounds[b + 2]
+        next_x, next_y = x[end:next_end].mean(), values[end:next_end].mean()
+        area = np.abs((x[selected] - next_x) * (values[start:end] - values[selected])
+                      - (x[selected] - x[start:end]) * (next_y - values[selected]))
+        selected = start + int(np.argmax(area))
+        keep[b + 1] = selected
+    return t[keep], y[keep]
+
+def gap_positions(t, gap_seconds=GAP_SECONDS):
+    """Posiciones donde empieza un segmento continuo nuevo (hueco mayor que 'gap_seconds')."""
+    return np.flatnonzero(np.diff(t) > np.timedelta64(int(gap_seconds * 1e9), "ns")) + 1
+
+def nan_breaks(t, y, gap_seconds=GAP_SECONDS):
+    """
+    Inserta un NaN (y NaT en el tiempo) en cada hueco mayor que 'gap_seconds',
+    para dibujar todos los segmentos continuos con una sola llamada a plot.
+    """
+    gaps = gap_positions(t, gap_seconds)
+    if len(gaps) == 0:
+        return t, y
+    return np.insert(t, gaps, np.datetime64("NaT")), np.insert(y.astype(np.float64), gaps, np.nan)
 
-    # Eliminar datos duplicados y solapamientos
+def downsample_segments(t, y, max_points, downsample, gap_seconds=GAP_SECONDS):
+    """
+    Reduce cada segmento continuo por separado (repartiendo max_points según
+    su largo) y los une con NaN en los huecos. Los huecos se buscan en los
+    tiempos originales: tras reducir, los puntos quedan más separados que
+    'gap_seconds' y parecerían huecos.
+    """
+    n = len(t)
+    bounds = np.r_[0, gap_positions(t, gap_seconds), n]
+    times, values = [], []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        budget = max(int(round(max_points * (end - start) / n)), 4)
+        segment_t, segment_y = downsample(t[start:end], y[start:end], budget)
+        if times:
+            times.append(np.array(["NaT"], dtype=t.dtype))
+            values.append(np.array([np.nan]))
+        times.append(segment_t)
+        values.append(segment_y.astype(np.float64))
+    if not times:
+        return t, y
+    return np.concatenate(times), np.concatenate(values)
+
+def sensor_traces(df, max_points=MAX_POINTS, method="minmax"):
+    """
+    Prepara las series a graficar: {sensor: {eje: (tiempos, valores)}} sin
+    duplicados, ordenadas, con NaN en los huecos y reducidas a ~max_points por
+    eje ('minmax', 'lttb' o None; cada segmento continuo por separado). Los
+    sensores quedan en orden de aparición.
+    """
+    # Eliminar datos duplicados y solapamientos y ordenar los datos por tiempo
     df = remove_duplicates_and_overlaps(df)
-
-    # Ordenar los datos por tiempo
-    df = df.sort_values(by='timestamp')
-
-    # Obtener la lista de sensores únicos
-    sensors = df['sensor'].unique()
-
-    # Crear una figura con subgráficos para cada sensor
-    fig, axes = plt.subplots(len(sensors), 1, figsize=(10, 6 * len(sensors)))
-    fig.suptitle(f"Datos de Sensores - Archivo: {os.path.basename(file_path)}", fontsize=16)
-
-    # Si solo hay un sensor, axes no es una lista, así que lo convertimos en una lista
-    if len(sensors) == 1:
-        axes = [axes]
+    df = df.sort_values(by='timestamp', kind='stable')
+    downsample = {"minmax": downsample_minmax, "lttb": downsample_lttb}.get(method)
+
+    traces = {}
+    for sensor, sensor_data in df.groupby('sensor', sort=False, observed=True):
+        t = pd.to_datetime(sensor_data['timestamp'], unit='s').to_numpy()
+        traces[sensor] = {}
+        for axis in ['x', 'y', 'z']:
+            values = sensor_data[axis].to_numpy(dtype=np.float64)
+            if downsample is not None and max_points:
+                traces[sensor][axis] = downsample_segments(t, values, max_points, downsample)
+            else:
+                traces[sensor][axis] = nan_breaks(t, values)
+    return traces
+
+def draw_sensor_data(fig, df, title, max_points=MAX_POINTS, method="minmax"):
+    """Dibuja un subgráfico por sensor en 'fig', con una llamada a plot por eje."""
+    traces = sensor_traces(df, max_points, method)
+    fig.set_size_inches(10, 6 * max(len(traces), 1))
+    fig.suptitle(title, fontsize=16)
+    axes = fig.subplots(len(traces), 1, squeeze=False)[:, 0] if traces else []
 
     # Graficar los datos de cada sensor
-    for i, sensor in enumerate(sensors):
-        sensor_data = df[df['sensor'] == sensor]
-
-        # Dividir los datos en segmentos continuos
-        time_diff = sensor_data['timestamp'].diff() > pd.Timedelta(seconds=1)  # Umbral de 1 segundo
-        segments = sensor_data.groupby(time_diff.cumsum())
-
-        # Graficar cada segmento
-        for _, segment in segments:
-            axes[i].plot(segment['timestamp'], segment['x'], label='X')
-            axes[i].plot(segment['timestamp'], segment['y'], label='Y')
-            axes[i].plot(segment['timestamp'], segment['z'], label='Z')
+    for ax, (sensor, axis_traces) in zip(axes, traces.items()):
+        for axis, (t, values) in axis_traces.items():
+            ax.plot(t, values, label=axis.upper())
 
         # Configurar el subgráfico
-        axes[i].set_title(f"Sensor: {sensor}")
-        axes[i].set_xlabel("Tiempo")
-        axes[i].set_ylabel("Valor")
-        axes[i].legend()
-        axes[i].grid()
+        ax.set_title(f"Sensor: {sensor}")
+        ax.set_xlabel("Tiempo")
+        ax.set_ylabel("Valor")
+        ax.legend()
+        ax.grid()
 
     # Ajustar el espacio entre subgráficos
-    plt.tight_layout()
+    fig.tight_layout()
+    return fig
+
+def load_for_plot(file_path, resample_rate=None):
+    """
+    Lee la grabación (.rec o CSV); con 'resample_rate' (Hz) la alinea antes en
+    una grilla uniforme común a todos los sensores (ver Resampling).
+    """
+    df = load_recording(file_path)
+    if resample_rate:
+        from Resampling import resample_recording
+
+        df = resample_recording(df, list(pd.unique(df["sensor"])), rate=resample_rate).to_dataframe()
+    return df
+
+def plot_sensor_data(file_path, max_points=MAX_POINTS, method="minmax", resample_rate=None):
+    """Grafica los datos de todos los sensores en una sola pantalla."""
+    df = load_for_plot(file_path, resample_rate)
+    fig = plt.figure()
+    draw_sensor_data(fig, df, f"Datos de Sensores - Archivo: {os.path.basename(file_path)}", max_points, method)
     plt.show()
 
+def render_recording(file_path, output_path, max_points=MAX_POINTS, method="minmax", resample_rate=None):
+    """
+    Guarda la gráfica de una grabación en un archivo (PNG, SVG, ... según la
+    extensión) sin abrir ventanas: usa una Figure propia, no pyplot.
+    """
+    df = load_for_plot(file_path, resample_rate)
+    fig = Figure()
+    draw_sensor_data(fig, df, f"Datos de Sensores - Archivo: {os.path.basename(file_path)}", max_points, method)
+    folder = os.path.dirname(output_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    fig.savefig(output_path)
+    return output_path
+
+def _render_task(args):
+    return render_recording(*args)
+
+def render_folder(input_folder, output_folder, fmt="png", workers=None, max_points=MAX_POINTS, method="minmax",
+                  resample_rate=None):
+    """
+    Renderiza todas las grabaciones bajo 'input_folder' (con subcarpetas) a
+    'output_folder', conservando la estructura de carpetas, en un pool de
+    procesos. Devuelve la lista de archivos generados.
+    """
+    tasks = []
+    for folder, _, _ in os.walk(input_folder):
+        for file_path in list_recordings(folder):
+            relative = os.path.relpath(os.path.splitext(file_path)[0], input_folder)
+            tasks.append((file_path, os.path.join(output_folder, f"{relative}.{fmt}"), max_points, method,
+                          resample_rate))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) < 2:
+        return [_render_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_render_task, tasks))
+
 def main():
+    parser = argparse.ArgumentParser(description="Grafica las grabaciones de una carpeta.")
     # Carpeta donde se encuentran los archivos CSV
-    input_folder = "datos/Pendulum"  # Cambia esto al nombre de tu carpeta
+    parser.add_argument("input_folder", nargs="?", default="datos/Pendulum")
+    parser.add_argument("--output", help="Guardar las gráficas en esta carpeta (sin ventanas, en paralelo) "
+                                         "en lugar de mostrarlas una por una")
+    parser.add_argument("--format", choices=["png", "svg", "pdf"], default="png")
+    parser.add_argument("--workers", type=int, help="Procesos para renderizar (por defecto, uno por núcleo)")
+    parser.add_argument("--max-points", type=int, default=MAX_POINTS, help="Puntos por eje antes de reducir")
+    parser.add_argument("--method", choices=["minmax", "lttb", "none"], default="minmax",
+                        help="Reducción de puntos para grabaciones largas")
+    parser.add_argument("--resample", type=float, metavar="HZ",
+                        help="Alinear los sensores en una grilla común de HZ muestras por segundo")
+    args = parser.parse_args()
+    method = None if args.method == "none" else args.method
+    input_folder = args.input_folder
 
     # Verificar si la carpeta existe
     if not os.path.exists(input_folder):
         print(f"La carpeta '{input_folder}' no existe.")
         return
 
-    # Obtener la lista de archivos CSV en la carpeta
-    csv_files = [f for f in os.listdir(input_folder) if f.endswith('.csv')]
+    if args.output:
+        files = render_folder(input_folder, args.output, args.format, args.workers, args.max_points, method,
+                              args.resample)
+        print(f"{len(files)} gráfica(s) guardada(s) en {args.output}.")
+        return
+
+    # Obtener la lista de grabaciones (.rec o CSV) en la carpeta
+    recordings = list_recordings(input_folder)
 
-    if not csv_files:
-        print(f"No se encontraron archivos CSV en la carpeta '{input_folder}'.")
+    if not recordings:
+        print(f"No se encontraron grabaciones en la carpeta '{input_folder}'.")
         return
 
-    # Graficar los datos de cada archivo CSV
-    for csv_file in csv_files:
-        file_path = os.path.join(input_folder, csv_file)
-        print(f"Graficando datos del archivo: {csv_file}")
-        plot_sensor_data(file_path)
+    # Graficar los datos de cada grabación
+    for file_path in recordings:
+        print(f"Graficando datos del archivo: {os.path.basename(file_path)}")
+        plot_sensor_data(file_path, args.max_points, method, args.resample)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+import numpy as np
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+
+from Model_Artifact import SCORINGS
+from Movement_Scorer import top_k
+from Recording_IO import list_recordings
+from Stage_Report import StageReport
+
+UNKNOWN = "Desconocido"
+
+
+def mixed_label(file_name, movements):
+    """Etiqueta de una grabación mezclada según su nombre (por ejemplo "Curl_01.csv"), o "Desconocido"."""
+    for movement in movements:
+        if movement.lower() in file_name.lower():
+            return movement
+    return UNKNOWN
+
+
+def evaluation_files(test_folder, movements):
+    """
+    Grabaciones de prueba: las de test/<movimiento> (grupo "individual") y las
+    de test/mixed (grupo "mixed", etiquetadas por nombre). Devuelve listas
+    paralelas (rutas, grupos, movimiento esperado).
+    """
+    paths, groups, expected = [], [], []
+    for movement in movements:
+        for path in list_recordings(os.path.join(test_folder, movement)):
+            paths.append(path)
+            groups.append("individual")
+            expected.append(movement)
+    for path in list_recordings(os.path.join(test_folder, "mixed")):
+        paths.append(path)
+        groups.append("mixed")
+        expected.append(mixed_label(os.path.basename(path), movements))
+    return paths, groups, expected
+
+
+def _classification_summary(y_true, y_pred):
+    """Exactitud, matriz de confusión (filas: esperado, columnas: predicho) y reporte por clase."""
+    if len(y_true) == 0:
+        return None
+    labels = sorted(set(y_true) | set(y_pred))
+    return {"files": len(y_true),
+            "accuracy": float(accuracy_score(y_true, y_pred)),
+            "labels": labels,
+            "confusion_matrix": confusion_matrix(y_true, y_pred, labels=labels).tolist(),
+            "per_class": classification_report(y_true, y_pred, labels=labels, output_dict=True, zero_division=0)}
+
+
+class EvaluationRunner:
+    """
+    Evalúa un MovementEvaluationSystem entrenado sobre toda la carpeta de
+    prueba de una vez: lee y extrae las características de todas las
+    grabaciones en un solo lote (en paralelo y con la caché, ver
+    file_features), las califica contra todos los movimientos con una sola
+    operación matricial (centroides o, con scoring="knn", vecinos más
+    cercanos) y las clasifica con una sola llamada al clasificador (sobre
+    las ventanas de cada archivo si se entrenó con ventanas, ver classify_files).
+    El resultado es un reporte (dict serializable a JSON) con la calificación
+    de cada archivo, la matriz de confusión y el tiempo de cada etapa.
+    """
+
+    def __init__(self, system, test_folder=None, workers=None, method="inverse_distance", scoring="centroid", k=5):
+        self.system = system
+        self.test_folder = system.test_folder if test_folder is None else test_folder
+        self.workers = workers
+        self.method = method
+        self.scoring = scoring
+        self.k = k
+
+    def run(self):
+        system = self.system
+        report = StageReport(prefix="evaluate")
+
+        with report.stage("lista de archivos"):
+            paths, groups, expected = evaluation_files(self.test_folder, system.movements)
+        with report.stage("características"):
+            X, counts = system.file_features(paths, self.workers)
+            X = system.clean_data(np.asarray(X))
+
+        scorer = system.grading_scorer(self.scoring, self.method, self.k)
+        with report.stage("calificación"):
+            scores = scorer.score(X)  # (archivos, movimientos calificables)
+            ranking, _ = top_k(scores, scorer.movements, k=len(scorer.movements))
+        with report.stage("clasificación"):
+            if paths and system.classification_model is not None:
+                # Con ventanas, se clasifican las de cada archivo (como en el entrenamiento)
+                predicted = list(system.classify_files(paths, X, self.workers))
+            else:
+                predicted = [None] * len(paths)
+
+        files = []
+        for i, path in enumerate(paths):
+            file_scores = {movement: float(score) for movement, score in zip(scorer.movements, scores[i])}
+            files.append({"path": path, "group": groups[i], "expected": expected[i],
+                          "predicted": None if predicted[i] is None else str(predicted[i]),
+                          "score": file_scores.get(expected[i]),  # Contra el centroide del movimiento esperado
+                          "best_match": ranking[i][0] if file_scores else None,
+                          "ranking": list(ranking[i]),
+                          "scores": file_scores,
+                          "rows": int(counts[i].sum())})
+
+        summary = {}
+        for group in ["individual", "mixed"]:
+            entries = [entry for entry in files if entry["group"] == group and entry["predicted"] is not None]
+            summary[group] = _classification_summary([entry["expected"] for entry in entries],
+                                                     [entry["predicted"] for entry in entries])
+        individual = {}
+        for movement in system.movements:
+            values = [entry["score"] for entry in files
+                      if entry["group"] == "individual" and entry["expected"] == movement and entry["score"] is not None]
+            if values:
+                individual[movement] = {"files": len(values), "mean": float(np.mean(values)),
+                                        "min": float(np.min(values)), "max": float(np.max(values))}
+
+        return {"date": datetime.now().isoformat(timespec="seconds"),
+                "environment": {"python": platform.python_version(), "cpus": os.cpu_count()},
+                "config": {"test_folder": self.test_folder, "movements": list(system.movements),
+                           "sensors": list(system.sensors), "feature_set": system.current_feature_set(),
+                           "method": self.method, "scoring": self.scoring,
+                           "k": self.k if self.scoring == "knn" else None},
+                "files": files,
+                "scores": individual,
+                "classification": summary,
+                "timing": report.stages}
+
+
+def write_report(report, path):
+    """Guarda el reporte como JSON (en un archivo temporal que luego se reemplaza)."""
+    with open(path + ".tmp", "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def print_summary(report):
+    for movement, stats in report["scores"].items():
+        print(f"Calificación media en {movement}: {stats['mean']:.2f} "
+              f"(mín. {stats['min']:.2f}, máx. {stats['max']:.2f}, {stats['files']} archivo(s))")
+    for group, summary in report["classification"].items():
+        if summary is not None:
+            print(f"Precisión de clasificación ({group}): {summary['accuracy']:.3f} en {summary['files']} archivo(s)")
+    print("Etapas de la evaluación:")
+    for entry in report["timing"]:
+        print(f"  {entry['stage']}: {entry['seconds']:.3f} s")
+
+
+def regressions(report, baseline, tolerance=0.0):
+    """
+    Compara las precisiones con las de un reporte anterior. Devuelve una lista
+    de (grupo, precisión anterior, precisión actual) de los grupos que bajaron
+    más que 'tolerance'.
+    """
+    rows = []
+    for group, summary in report["classification"].items():
+        before = (baseline.get("classification") or {}).get(group)
+        if summary is None or before is None:
+            continue
+        if summary["accuracy"] < before["accuracy"] - tolerance:
+            rows.append((group, before["accuracy"], summary["accuracy"]))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evalúa el sistema exportado sobre la carpeta de prueba.")
+    parser.add_argument("--system", default="movement_system.pkl", help="Sistema exportado por Training_Model")
+    parser.add_argument("--test-folder", help="Carpeta de prueba (por defecto, la del sistema)")
+    parser.add_argument("--workers", type=int, help="Procesos para leer las grabaciones (por defecto, uno por núcleo)")
+    parser.add_argument("--scoring", choices=SCORINGS, default="centroid",
+                        help="Calificar contra los centroides o por vecinos más cercanos (k-NN)")
+    parser.add_argument("--k", type=int, default=5, help="Vecinos para --scoring knn")
+    parser.add_argument("--output", default="evaluation_report.json", help="Archivo JSON del reporte")
+    parser.add_argument("--baseline", help="Reporte anterior: sale con código 1 si alguna precisión baja")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Baja de precisión permitida frente a --baseline")
+    args = parser.parse_args()
+
+    from Training_Model import load_system  # Training_Model importa este módulo
+
+    system = load_system(args.system)
+    try:
+        report = EvaluationRunner(system, args.test_folder, args.workers, scoring=args.scoring, k=args.k).run()
+    except ValueError as e:  # Por ejemplo, --scoring knn con un sistema sin ejemplos
+        parser.error(str(e))
+    print_summary(report)
+    print(f"Reporte guardado en {write_report(report, args.output)}.")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = regressions(report, baseline, args.tolerance)
+        for group, before, after in rows:
+            print(f"Precisión ({group}) bajó de {before:.3f} a {after:.3f}.")
+        if rows:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
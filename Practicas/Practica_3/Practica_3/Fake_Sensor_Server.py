@@ -0,0 +1,95 @@
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from Sensor_Buffer import SENSOR_RATES
+
+
+class FakeSensorServer:
+    """
+    Servidor HTTP local que imita sensors.json del teléfono para probar la
+    recolección sin dispositivo. Genera muestras sintéticas a partir del reloj,
+    mantiene un historial de 'backlog' segundos y respeta el parámetro 'from'.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, rates=None, backlog=5.0, delay=0.0):
+        self.rates = dict(SENSOR_RATES if rates is None else rates)
+        self.backlog = backlog
+        self.delay = delay  # Retardo artificial por respuesta (simula un teléfono lento)
+        self.requests = 0
+        self.started = time.time()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/sensors.json"
+
+    def payload(self, since_ms=None, now=None):
+        """Construye el diccionario de sensors.json para el instante 'now'."""
+        now = time.time() if now is None else now
+        oldest = max(self.started, now - self.backlog)
+        data = {}
+        for sensor, rate in self.rates.items():
+            first = math.ceil(oldest * rate)
+            last = math.floor(now * rate)
+            entries = []
+            for i in range(first, last + 1):
+                timestamp_ms = int(i * 1000 / rate)
+                if since_ms is not None and timestamp_ms <= since_ms:
+                    continue
+                phase = 2 * math.pi * 0.5 * i / rate
+                values = [math.sin(phase), math.cos(phase), 9.81 + 0.1 * math.sin(2 * phase)]
+                if sensor == "rot_vector":
+                    values += [math.cos(phase / 2), 0.0]
+                entries.append([timestamp_ms, values])
+            data[sensor] = {"unit": "", "data": entries}
+        return data
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Permite conexiones keep-alive
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/sensors.json":
+                    self.send_error(404)
+                    return
+                server.requests += 1
+                if server.delay:
+                    time.sleep(server.delay)
+                since = parse_qs(url.query).get("from")
+                since_ms = int(since[0]) if since else None
+                body = json.dumps(server.payload(since_ms)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    fake = FakeSensorServer(host="0.0.0.0", port=8080)
+    print(f"Servidor de sensores simulado en {fake.url}")
+    fake._server.serve_forever()
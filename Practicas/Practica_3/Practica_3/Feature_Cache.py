@@ -0,0 +1,96 @@
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+
+from Feature_Extraction import FEATURE_VERSION
+from Frequency_Features import FREQUENCY_VERSION
+
+
+def file_digest(path):
+    """Hash del contenido de un archivo (para no recalcular si solo cambió el mtime)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    Caché en disco (SQLite) de las características por grabación. Cada entrada
+    se identifica por la ruta y se valida con tamaño + mtime (y, si no
+    coinciden, con el hash del contenido) y se guarda por configuración del
+    extractor (versión, lista de sensores, conjunto de características y, si
+    no es "basic", versión de Frequency_Features), así que cambiarla invalida
+    la caché. evict() borra las entradas de archivos eliminados o versiones viejas.
+    """
+
+    def __init__(self, path, sensors, version=FEATURE_VERSION, feature_set="basic"):
+        self.path = path
+        self.sensors = list(sensors)
+        self.version = version
+        self.config = f"{version}:{','.join(self.sensors)}"
+        if feature_set != "basic":  # Las entradas "basic" conservan la clave de siempre
+            self.config += f":{feature_set}:{FREQUENCY_VERSION}"
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS features ("
+            "path TEXT, config TEXT, size INTEGER, mtime_ns INTEGER, digest TEXT, "
+            "features BLOB, counts BLOB, PRIMARY KEY (path, config))")
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, paths):
+        """Devuelve {ruta: (características, filas por sensor)} de las entradas válidas."""
+        found = {}
+        updates = []
+        for path in paths:
+            row = self.connection.execute(
+                "SELECT size, mtime_ns, digest, features, counts FROM features WHERE path = ? AND config = ?",
+                (os.path.abspath(path), self.config)).fetchone()
+            if row is None:
+                continue
+            size, mtime_ns, digest = row[0], row[1], row[2]
+            stat = os.stat(path)
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                if stat.st_size != size or file_digest(path) != digest:
+                    continue
+                # Mismo contenido con otro mtime: se actualiza la entrada
+                updates.append((stat.st_mtime_ns, os.path.abspath(path), self.config))
+            found[path] = (np.frombuffer(row[3], dtype=np.float64), np.frombuffer(row[4], dtype=np.int64))
+        if updates:
+            self.connection.executemany("UPDATE features SET mtime_ns = ? WHERE path = ? AND config = ?", updates)
+            self.connection.commit()
+        self.hits += len(found)
+        self.misses += len(paths) - len(found)
+        return found
+
+    def store(self, paths, features, counts):
+        """Guarda las características (una fila por ruta) y las filas por sensor."""
+        rows = []
+        for path, vector, sensor_counts in zip(paths, features, counts):
+            stat = os.stat(path)
+            rows.append((os.path.abspath(path), self.config, stat.st_size, stat.st_mtime_ns, file_digest(path),
+                         np.asarray(vector, dtype=np.float64).tobytes(),
+                         np.asarray(sensor_counts, dtype=np.int64).tobytes()))
+        self.connection.executemany("INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self.connection.commit()
+
+    def evict(self):
+        """Borra las entradas de archivos que ya no existen o de otra versión del extractor."""
+        def outdated(config):
+            parts = config.split(":")
+            # version:sensores[:conjunto:versión de frecuencia]
+            return parts[0] != str(self.version) or (len(parts) > 2 and parts[3:] != [str(FREQUENCY_VERSION)])
+
+        stale = [(path, config) for path, config in self.connection.execute("SELECT path, config FROM features")
+                 if outdated(config) or not os.path.exists(path)]
+        self.connection.executemany("DELETE FROM features WHERE path = ? AND config = ?", stale)
+        self.connection.commit()
+        return len(stale)
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,329 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+# Por sensor: media x, y, z; desviación estándar x, y, z (ddof=1); media de la magnitud
+FEATURES_PER_SENSOR = 7
+AXES = ["x", "y", "z"]
+
+# Versión del extractor: cambiarla invalida las características guardadas en Feature_Cache
+FEATURE_VERSION = 1
+
+
+def _column(df, column):
+    values = np.asarray(df[column])
+    if values.dtype.kind != "f":
+        values = values.astype(np.float64)
+    return values
+
+
+def _mean(values):
+    """Media ignorando NaN, con la misma aritmética que pandas.Series.mean."""
+    mask = np.isnan(values)
+    if mask.any():
+        count = len(values) - mask.sum()
+        values = np.where(mask, 0, values)
+    else:
+        count = len(values)
+    if count == 0:
+        return np.nan
+    return values.sum(dtype=values.dtype) / values.dtype.type(count)
+
+
+def _std(values):
+    """Desviación estándar (ddof=1) con el algoritmo de dos pasadas de pandas.Series.std."""
+    mask = np.isnan(values)
+    count = len(values) - mask.sum()
+    if count <= 1:
+        return np.nan
+    if mask.any():
+        values = np.where(mask, 0, values)
+    avg = values.sum(dtype=np.float64) / values.dtype.type(count)
+    sqr = (avg - values) ** 2
+    if mask.any():
+        sqr[mask] = 0
+    return np.sqrt(sqr.sum(dtype=np.float64) / values.dtype.type(count - 1))
+
+
+def _features_from_groups(group_keys, n_groups, sensor_count, x, y, z):
+    """
+    Calcula la matriz de características en una sola agrupación: ordena las
+    filas una vez por clave (grabación * sensores + sensor) y reduce cada
+    tramo contiguo. Los grupos sin filas quedan en cero.
+    """
+    features = np.zeros((n_groups // sensor_count, sensor_count * FEATURES_PER_SENSOR))
+    valid = group_keys >= 0
+    if not valid.all():
+        group_keys, x, y, z = group_keys[valid], x[valid], y[valid], z[valid]
+    if len(group_keys) == 0:
+        return features
+
+    # Orden estable: dentro de cada grupo se conserva el orden original de las filas
+    order = np.argsort(group_keys, kind="stable")
+    bounds = np.searchsorted(group_keys[order], np.arange(n_groups + 1))
+    x, y, z = x[order], y[order], z[order]
+    magnitude = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+
+    for group in np.flatnonzero(bounds[1:] > bounds[:-1]):
+        start, end = bounds[group], bounds[group + 1]
+        recording, sensor = divmod(group, sensor_count)
+        xs, ys, zs = x[start:end], y[start:end], z[start:end]
+        column = sensor * FEATURES_PER_SENSOR
+        features[recording, column:column + FEATURES_PER_SENSOR] = [
+            _mean(xs), _mean(ys), _mean(zs),
+            _std(xs), _std(ys), _std(zs),
+            _mean(magnitude[start:end]),
+        ]
+    return features
+
+
+def _features_from_groups_fast(group_keys, n_groups, sensor_count, x, y, z):
+    """
+    Igual que _features_from_groups pero reduciendo todos los grupos a la vez con
+    np.add.reduceat, para muchos grupos pequeños (ventanas). Coincide hasta el
+    redondeo, no bit a bit, con las reducciones de pandas.
+    """
+    features = np.zeros((n_groups // sensor_count, sensor_count, FEATURES_PER_SENSOR))
+    valid = group_keys >= 0
+    if not valid.all():
+        group_keys, x, y, z = group_keys[valid], x[valid], y[valid], z[valid]
+    if len(group_keys) == 0:
+        return features.reshape(len(features), -1)
+
+    order = np.argsort(group_keys, kind="stable")
+    keys = group_keys[order]
+    values = np.stack([x[order], y[order], z[order]], axis=1)
+    values = np.concatenate([values, np.sqrt((values ** 2).sum(axis=1, keepdims=True))], axis=1)
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    groups = keys[starts]
+    finite = ~np.isnan(values)
+    counts = np.add.reduceat(finite, starts, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.add.reduceat(np.where(finite, values, 0), starts, axis=0) / counts
+        row_group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(keys)]))
+        squares = np.add.reduceat(np.where(finite, (values - mean[row_group]) ** 2, 0), starts, axis=0)
+        std = np.where(counts > 1, np.sqrt(squares / (counts - 1)), np.nan)
+
+    recording, sensor = np.divmod(groups, sensor_count)
+    features[recording, sensor] = np.concatenate([mean[:, :3], std[:, :3], mean[:, 3:]], axis=1)
+    return features.reshape(len(features), -1)
+
+
+def sensor_codes(df, sensors):
+    """Código de cada fila según su posición en 'sensors' (-1 si no se usa)."""
+    import pandas as pd  # Importación diferida: el juego carga este módulo antes de mostrar la ventana
+
+    return pd.Index(sensors).get_indexer(np.asarray(df["sensor"], dtype=object))
+
+
+def features_from_arrays(ids, codes, x, y, z, n_recordings, sensor_count, exact=True):
+    """
+    Matriz de características a partir de arreglos planos: 'ids' indica la
+    grabación (o grupo) de cada fila y 'codes' la posición de su sensor (-1 se ignora).
+    Con exact=False se reduce todo a la vez (más rápido con muchos grupos, iguales
+    hasta el redondeo); con exact=True coincide bit a bit con extract_features.
+    """
+    ids, codes = np.asarray(ids, dtype=np.int64), np.asarray(codes, dtype=np.int64)
+    if n_recordings == 0 or sensor_count == 0:
+        return np.zeros((n_recordings, sensor_count * FEATURES_PER_SENSOR))
+    group_keys = np.where(codes >= 0, ids * sensor_count + codes, -1)
+    reduce = _features_from_groups if exact else _features_from_groups_fast
+    return reduce(group_keys, n_recordings * sensor_count, sensor_count, x, y, z)
+
+
+def extract_features(df, sensors):
+    """
+    Extrae características básicas (media, desviación, 'energía') para cada sensor
+    de una grabación. Devuelve una lista con 7 valores por sensor, en el orden de
+    'sensors', rellenando con ceros los sensores sin datos.
+    """
+    if df.empty or not sensors:
+        return [0.0] * (FEATURES_PER_SENSOR * len(sensors))
+    codes = sensor_codes(df, sensors)
+    features = _features_from_groups(codes, len(sensors), len(sensors),
+                                     *(_column(df, axis) for axis in AXES))
+    return list(features[0])
+
+
+def extract_features_batch(recordings, sensors, recording_column="recording"):
+    """
+    Extrae las características de muchas grabaciones en una sola llamada.
+    'recordings' puede ser una lista de DataFrames (una fila del resultado por
+    DataFrame, en el mismo orden) o un único DataFrame concatenado con la columna
+    'recording_column' identificando cada grabación (filas en orden de aparición).
+    Devuelve una matriz (n_grabaciones, 7 * len(sensors)).
+    """
+    import pandas as pd
+
+    if isinstance(recordings, pd.DataFrame):
+        recording_ids, _ = pd.factorize(recordings[recording_column])
+        n_recordings = recording_ids.max() + 1 if len(recording_ids) else 0
+        df = recordings
+    else:
+        lengths = [len(df) for df in recordings]
+        n_recordings = len(recordings)
+        recording_ids = np.repeat(np.arange(n_recordings), lengths)
+        non_empty = [df for df in recordings if len(df)]
+        df = pd.concat(non_empty, ignore_index=True) if non_empty else pd.DataFrame(columns=["sensor"] + AXES)
+
+    if n_recordings == 0 or not sensors:
+        return np.zeros((n_recordings, len(sensors) * FEATURES_PER_SENSOR))
+    return features_from_arrays(recording_ids, sensor_codes(df, sensors),
+                                *(_column(df, axis) for axis in AXES), n_recordings, len(sensors))
+
+
+def window_assignments(timestamps, window_seconds, step_seconds):
+    """
+    Divide una grabación en ventanas de 'window_seconds' que avanzan cada
+    'step_seconds' (se superponen si step < window). Devuelve (filas, ventana
+    de cada fila, cantidad de ventanas): una fila aparece una vez por cada
+    ventana que la contiene, en el orden original. Una grabación más corta que
+    la ventana forma una sola ventana.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    valid = np.flatnonzero(np.isfinite(timestamps))
+    if len(valid) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), 0
+    offset = timestamps[valid] - timestamps[valid].min()
+    n_windows = max(1, int(np.floor((offset.max() - window_seconds) / step_seconds)) + 1)
+
+    # Última ventana que empieza antes de cada fila; las anteriores la contienen
+    # mientras no hayan terminado
+    last = np.minimum(np.floor(offset / step_seconds).astype(np.int64), n_windows - 1)
+    rows, windows = [], []
+    for back in range(int(np.ceil(window_seconds / step_seconds))):
+        window = last - back
+        keep = (window >= 0) & (offset < window * step_seconds + window_seconds)
+        rows.append(valid[keep])
+        windows.append(window[keep])
+    rows, windows = np.concatenate(rows), np.concatenate(windows)
+    order = np.argsort(rows, kind="stable")
+    return rows[order], windows[order], n_windows
+
+
+def sensor_counts(ids, codes, n_recordings, sensor_count):
+    """Cantidad de filas de cada sensor en cada grabación: matriz (n_grabaciones, sensores)."""
+    ids, codes = np.asarray(ids, dtype=np.int64), np.asarray(codes, dtype=np.int64)
+    used = codes >= 0
+    keys = ids[used] * sensor_count + codes[used]
+    counts = np.bincount(keys, minlength=n_recordings * sensor_count)
+    return counts.reshape(n_recordings, sensor_count)
+
+
+def combine_features(features, counts):
+    """
+    Combina las características de varias grabaciones en las del conjunto, como
+    si se hubieran concatenado: medias ponderadas por la cantidad de filas y
+    desviaciones combinadas con la suma de cuadrados de cada grabación.
+    """
+    features = np.asarray(features, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.float64)
+    sensor_count = counts.shape[1]
+    blocks = features.reshape(len(features), sensor_count, FEATURES_PER_SENSOR)
+    combined = np.zeros((sensor_count, FEATURES_PER_SENSOR))
+
+    total = counts.sum(axis=0)
+    for sensor in np.flatnonzero(total > 0):
+        n = counts[:, sensor]
+        used = n > 0
+        n, block = n[used], blocks[used, sensor]
+        weights = n[:, None] / total[sensor]
+        means = block[:, 0:3]
+        mean = (weights * means).sum(axis=0)
+        # Suma de cuadrados dentro de cada grabación más la dispersión entre grabaciones
+        within = np.where(n[:, None] > 1, block[:, 3:6] ** 2 * (n[:, None] - 1), 0.0)
+        between = n[:, None] * (means - mean) ** 2
+        if total[sensor] > 1:
+            std = np.sqrt((within.sum(axis=0) + between.sum(axis=0)) / (total[sensor] - 1))
+        else:
+            std = np.full(3, np.nan)
+        magnitude = (weights[:, 0] * block[:, 6]).sum()
+        combined[sensor] = np.concatenate([mean, std, [magnitude]])
+    return combined.reshape(-1)
+
+
+class SlidingWindowStats:
+    """
+    Media y suma de cuadrados (Welford) de x, y, z y la magnitud sobre una
+    ventana deslizante de 'window_seconds'. Agregar o quitar una muestra es O(1).
+    """
+
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self.samples = deque()  # (timestamp, [x, y, z, magnitud])
+        self.count = 0
+        self.mean = np.zeros(4)
+        self.m2 = np.zeros(4)
+
+    def add(self, timestamp, x, y, z):
+        values = np.array([x, y, z, np.sqrt(x ** 2 + y ** 2 + z ** 2)])
+        if np.isnan(values).any():
+            return
+        self.samples.append((timestamp, values))
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+        self._evict(timestamp - self.window_seconds)
+
+    def _remove(self, values):
+        self.count -= 1
+        if self.count == 0:
+            self.mean[:] = 0
+            self.m2[:] = 0
+            return
+        delta = values - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= delta * (values - self.mean)
+        np.maximum(self.m2, 0, out=self.m2)  # Evitar negativos por redondeo
+
+    def _evict(self, cutoff):
+        while self.samples and self.samples[0][0] < cutoff:
+            self._remove(self.samples.popleft()[1])
+
+    def features(self):
+        """Los 7 valores de extract_features para las muestras de la ventana."""
+        if self.count == 0:
+            return [0.0] * FEATURES_PER_SENSOR
+        std = np.sqrt(self.m2[:3] / (self.count - 1)) if self.count > 1 else np.full(3, np.nan)
+        return list(self.mean[:3]) + list(std) + [self.mean[3]]
+
+
+class StreamingFeatureEngine:
+    """
+    Características en tiempo real mientras llegan las muestras del colector:
+    mantiene un SlidingWindowStats por sensor y produce el mismo vector que
+    extract_features sobre los últimos 'window_seconds' segundos.
+    Se puede registrar directamente con Collect_Data.subscribe(engine.add).
+    'width' es el ancho que espera quien use las características (por ejemplo
+    el de los centroides); si no coincide con el del vector se rechaza aquí.
+    """
+
+    def __init__(self, sensors, window_seconds=2.0, width=None):
+        self.sensors = list(sensors)
+        self.window_seconds = window_seconds
+        self.width = len(self.sensors) * FEATURES_PER_SENSOR
+        if width is not None and width != self.width:
+            raise ValueError(f"Las características en vivo tienen {self.width} columnas "
+                             f"({len(self.sensors)} sensores), pero se esperaban {width}.")
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {sensor: SlidingWindowStats(self.window_seconds) for sensor in self.sensors}
+
+    def add(self, sensor, timestamps, values):
+        """Agrega un bloque de muestras (values es una matriz (n, k) con x, y, z primero)."""
+        with self.lock:
+            stats = self.stats.get(sensor)
+            if stats is None:
+                return
+            for timestamp, row in zip(timestamps, values):
+                stats.add(timestamp, row[0], row[1], row[2])
+
+    def features(self):
+        with self.lock:
+            return [value for sensor in self.sensors for value in self.stats[sensor].features()]
@@ -0,0 +1,217 @@
+import numpy as np
+
+import Feature_Extraction
+from Feature_Extraction import AXES
+
+# Conjuntos de características: "basic" son las 7 por sensor de Feature_Extraction;
+# "extended" agrega las de frecuencia de este módulo para los sensores de FREQUENCY_SENSORS
+FEATURE_SETS = ["basic", "extended"]
+FREQUENCY_SENSORS = ["accel", "gyro"]
+
+# Grilla en la que se calculan (Hz, ver Resampling) y bandas de energía (Hz): los
+# movimientos repiten a ~0.4-0.8 Hz y los sensores llegan a ~25 Hz
+RATE = 50.0
+BANDS = [(0.1, 0.5), (0.5, 1.0), (1.0, 2.0), (2.0, 4.0), (4.0, 8.0)]
+
+# Por sensor: fracción de la energía de la magnitud en cada banda, frecuencia
+# dominante, cruces por cero por segundo de x, y, z y media y desviación del jerk
+STATS = ([f"band_{low:g}_{high:g}hz" for low, high in BANDS] + ["dominant_hz"]
+         + [f"zcr_{axis}" for axis in AXES] + ["jerk_mean", "jerk_std"])
+FEATURES_PER_SENSOR = len(STATS)
+
+# Versión de estas características (bandas, cruces por cero, jerk): cambiarla
+# invalida las entradas "extended" de Feature_Cache
+FREQUENCY_VERSION = 1
+
+# Filas (grabaciones o ventanas) por llamada a la FFT, para acotar la memoria
+BATCH_SIZE = 1024
+
+
+def check_feature_set(feature_set):
+    if feature_set not in FEATURE_SETS:
+        raise ValueError(f"Conjunto de características desconocido: {feature_set}")
+
+
+def frequency_sensors(sensors):
+    """Sensores de 'sensors' (en su orden) que tienen características de frecuencia."""
+    return [sensor for sensor in sensors if sensor in FREQUENCY_SENSORS]
+
+
+def feature_width(sensors, feature_set="basic"):
+    check_feature_set(feature_set)
+    width = len(sensors) * Feature_Extraction.FEATURES_PER_SENSOR
+    if feature_set == "extended":
+        width += len(frequency_sensors(sensors)) * FEATURES_PER_SENSOR
+    return width
+
+
+def frequency_feature_names(sensors):
+    return [f"{sensor}_{stat}" for sensor in frequency_sensors(sensors) for stat in STATS]
+
+
+def spectral_features(data, rate=RATE):
+    """
+    Características de frecuencia de un lote de señales alineadas: 'data' es
+    (filas, tiempo, sensores * 3) con NaN donde no hay datos (relleno o huecos).
+    Todo el lote se procesa con una FFT por eje de la matriz. Devuelve
+    (filas, sensores * FEATURES_PER_SENSOR); un sensor sin datos queda en ceros.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    rows, length, channels = data.shape
+    sensor_count = channels // len(AXES)
+    blocks = data.reshape(rows, length, sensor_count, len(AXES))
+    valid = np.isfinite(blocks).all(axis=-1)  # (filas, tiempo, sensor)
+    count = valid.sum(axis=1)
+    filled = np.where(valid[..., None], blocks, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Energía por banda y frecuencia dominante de la magnitud sin su media
+        magnitude = np.sqrt((filled ** 2).sum(axis=-1))
+        magnitude -= magnitude.sum(axis=1, keepdims=True) / count[:, None]
+        magnitude[~valid] = 0.0
+        power = np.abs(np.fft.rfft(magnitude, axis=1)) ** 2  # (filas, frecuencia, sensor)
+        frequencies = np.fft.rfftfreq(length, 1 / rate)
+        power[:, 0] = 0.0  # Sin componente continua
+        total = power.sum(axis=1)
+        bands = np.array([(frequencies >= low) & (frequencies < high) for low, high in BANDS], dtype=np.float64)
+        band_energy = np.einsum("rfs,bf->rsb", power, bands) / total[..., None]
+        dominant = frequencies[np.argmax(power, axis=1)]
+
+        # Cruces por cero de cada eje sin su media, por segundo de datos
+        centered = filled - filled.sum(axis=1, keepdims=True) / count[:, None, :, None]
+        pairs = valid[:, 1:] & valid[:, :-1]
+        seconds = pairs.sum(axis=1) / rate
+        signs = np.signbit(centered)
+        crossings = (signs[:, 1:] != signs[:, :-1]) & pairs[..., None]
+        zero_crossings = crossings.sum(axis=1) / seconds[..., None]
+
+        # Jerk: norma de la derivada entre instantes consecutivos con datos
+        jerk = np.sqrt((((filled[:, 1:] - filled[:, :-1]) * rate) ** 2).sum(axis=-1))
+        jerk = np.where(pairs, jerk, 0.0)
+        jerk_mean = jerk.sum(axis=1) / pairs.sum(axis=1)
+        jerk_std = np.sqrt(np.where(pairs, (jerk - jerk_mean[:, None]) ** 2, 0.0).sum(axis=1) / pairs.sum(axis=1))
+
+    features = np.concatenate([band_energy, dominant[..., None], zero_crossings,
+                               jerk_mean[..., None], jerk_std[..., None]], axis=-1)  # (filas, sensor, stat)
+    features = np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0)
+    features[count == 0] = 0.0
+    return features.reshape(rows, sensor_count * FEATURES_PER_SENSOR)
+
+
+def _fft_length(length):
+    """Largo de la FFT de una señal: la potencia de 2 siguiente (depende solo de la señal)."""
+    return 1 << max(int(length) - 1, 0).bit_length()
+
+
+def _batched(datas, rate):
+    """
+    Aplica spectral_features a señales de distinto largo: cada una se rellena
+    con NaN hasta _fft_length de su largo y se procesan juntas, en lotes de
+    BATCH_SIZE, las que comparten ese largo. Así el resultado de una grabación
+    no depende de las demás del lote.
+    """
+    channels = datas[0].shape[1] if datas else 0
+    result = np.zeros((len(datas), channels // len(AXES) * FEATURES_PER_SENSOR))
+    lengths = np.array([_fft_length(len(data)) if len(data) else 0 for data in datas])
+    for length in np.unique(lengths[lengths > 0]):
+        group = np.flatnonzero(lengths == length)
+        for start in range(0, len(group), BATCH_SIZE):
+            batch = group[start:start + BATCH_SIZE]
+            padded = np.full((len(batch), length, channels), np.nan, dtype=np.float32)
+            for row, i in enumerate(batch):
+                padded[row, :len(datas[i])] = datas[i]
+            result[batch] = spectral_features(padded, rate)
+    return result
+
+
+def _frequency_arrays(recording, sensors):
+    """(timestamps, códigos entre los sensores de frecuencia, valores (n, 3)) de un RecordingArrays."""
+    selected = frequency_sensors(sensors)
+    mapping = np.array([selected.index(sensor) if sensor in selected else -1 for sensor in sensors] + [-1])
+    codes = mapping[np.asarray(recording.codes, dtype=np.int64)]  # El código -1 toma el último elemento (-1)
+    values = np.column_stack([recording.x, recording.y, recording.z])
+    return recording.timestamps, codes, values
+
+
+def recording_frequency_features(recordings, sensors, rate=RATE):
+    """
+    Características de frecuencia de cada grabación (lista de RecordingArrays
+    de Dataset_Loader leídos con 'sensors'), remuestreadas en una grilla común
+    y calculadas por lotes. Devuelve (grabaciones, sensores de frecuencia * FEATURES_PER_SENSOR).
+    """
+    from Resampling import resample_arrays  # Importación diferida: Game carga este módulo al iniciar
+
+    selected = frequency_sensors(sensors)
+    if not selected or not recordings:
+        return np.zeros((len(recordings), len(selected) * FEATURES_PER_SENSOR))
+    datas = [resample_arrays(*_frequency_arrays(recording, sensors), selected, rate).data
+             for recording in recordings]
+    return _batched(datas, rate)
+
+
+def window_frequency_features(recording, sensors, window_seconds, step_seconds, n_windows, rate=RATE):
+    """
+    Características de frecuencia de las 'n_windows' ventanas de una grabación,
+    con la misma definición que Feature_Extraction.window_assignments (la
+    ventana k empieza k * step_seconds después de la primera muestra).
+    """
+    from Resampling import resample_arrays
+
+    selected = frequency_sensors(sensors)
+    width = len(selected) * FEATURES_PER_SENSOR
+    timestamps = np.asarray(recording.timestamps, dtype=np.float64)
+    finite = timestamps[np.isfinite(timestamps)]
+    if not selected or n_windows == 0 or len(finite) == 0:
+        return np.zeros((n_windows, width))
+    start = finite.min()
+    end = start + (n_windows - 1) * step_seconds + window_seconds
+    # La grilla llega hasta el final de la última ventana; lo que no tiene datos queda en NaN
+    data = resample_arrays(*_frequency_arrays(recording, sensors), selected, rate, start=start, end=end).data
+    length = int(round(window_seconds * rate))
+    starts = np.round(np.arange(n_windows) * step_seconds * rate).astype(np.int64)
+    index = np.minimum(starts[:, None] + np.arange(length), len(data) - 1)
+    result = np.zeros((n_windows, width))
+    for batch in range(0, n_windows, BATCH_SIZE):
+        result[batch:batch + BATCH_SIZE] = spectral_features(data[index[batch:batch + BATCH_SIZE]], rate)
+    return result
+
+
+def extract_features(df, sensors, feature_set="basic", rate=RATE):
+    """
+    Vector de características de una grabación (DataFrame) según el conjunto:
+    las de Feature_Extraction.extract_features y, con "extended", las de frecuencia.
+    """
+    check_feature_set(feature_set)
+    features = Feature_Extraction.extract_features(df, sensors)
+    if feature_set == "basic":
+        return features
+    from Dataset_Loader import RecordingArrays
+
+    selected = frequency_sensors(sensors)
+    if df.empty or not selected:
+        return features + [0.0] * (len(selected) * FEATURES_PER_SENSOR)
+    codes = Feature_Extraction.sensor_codes(df, sensors)
+    recording = RecordingArrays(None, codes, *(np.asarray(df[axis], dtype=np.float64) for axis in AXES),
+                                timestamps=np.asarray(df["timestamp"], dtype=np.float64))
+    return features + list(recording_frequency_features([recording], sensors, rate)[0])
+
+
+def combine_feature_sets(features, counts, sensors, feature_set="basic"):
+    """
+    Combina las características de varias grabaciones (ver
+    Feature_Extraction.combine_features). Las de frecuencia no se pueden
+    combinar como si se concatenaran las filas: se promedian ponderadas por
+    la cantidad de filas de cada grabación.
+    """
+    features = np.asarray(features, dtype=np.float64)
+    basic_width = len(sensors) * Feature_Extraction.FEATURES_PER_SENSOR
+    combined = Feature_Extraction.combine_features(features[:, :basic_width], counts)
+    if feature_set == "basic":
+        return combined
+    weights = np.asarray(counts, dtype=np.float64).sum(axis=1)
+    extra = features[:, basic_width:]
+    if weights.sum() > 0:
+        extra = (weights[:, None] * extra).sum(axis=0) / weights.sum()
+    else:
+        extra = np.zeros(features.shape[1] - basic_width)
+    return np.concatenate([combined, extra])
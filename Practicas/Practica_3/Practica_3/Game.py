@@ -1,30 +1,183 @@
+import time
+
+_INICIO = time.perf_counter()  # Para el perfil de arranque (--perfil-inicio)
+
+import argparse
+import importlib.util
 import sys
 import threading
-import time
 import os
 import numpy as np
-import pandas as pd
-import joblib
-from PIL import Image, ImageSequence
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout, QWidget, QMessageBox
 )
-from PyQt5.QtGui import QPixmap, QMovie
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, Qt, QTimer, pyqtSignal
+
+from Asset_Cache import AssetCache
+from Feature_Extraction import StreamingFeatureEngine
+from Metrics import metrics
+from Model_Artifact import DEFAULT_LABELS, DEFAULT_THRESHOLDS, SCORINGS, load_model
+
+
+def importar_diferido(nombre):
+    """
+    Devuelve el módulo sin ejecutarlo: se importa de verdad la primera vez que
+    se usa uno de sus atributos. Así la ventana aparece antes de cargar requests,
+    pandas y el resto de la recolección.
+    """
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    spec = importlib.util.find_spec(nombre)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    loader.exec_module(modulo)
+    return modulo
+
+
+# Funciones de recolección de datos de Collect_Data.py (se importa al empezar el juego)
+Collect_Data = importar_diferido("Collect_Data")
+
+
+def cargar_sistema(modelo="movement_model.mmod", sistema="movement_system.pkl"):
+    """Carga el modelo compacto (.mmod, sin pickle); si no existe, el sistema completo exportado."""
+    movement_system = load_model(modelo)
+    if movement_system is not None:
+        return movement_system
+    from Training_Model import load_system
+    return load_system(sistema)
+
+
+class PerfilInicio:
+    """Tiempo (desde que se empezó a importar Game) en que termina cada etapa del arranque."""
+
+    def __init__(self, activo=False):
+        self.activo = activo
+        self.etapas = []
+
+    def marcar(self, etapa):
+        self.etapas.append((etapa, time.perf_counter() - _INICIO))
+
+    def reporte(self):
+        return "Perfil de inicio:\n" + "\n".join(f"  {etapa}: {segundos:.3f} s" for etapa, segundos in self.etapas)
+
+    def imprimir(self):
+        if self.activo:
+            print(self.reporte())
+
+
+perfil_inicio = PerfilInicio("--perfil-inicio" in sys.argv)
+perfil_inicio.marcar("importaciones")
+
+# GIF de cada calificación (en Assets)
+GIFS_RESULTADO = {"Intente de nuevo": "Intente.gif", "Bien": "Bien.gif",
+                  "Maravilloso": "Maravilloso.gif", "Excelente": "Excelente.gif"}
+
+# Carpeta del almacén de intentos (segmentos + índice, ver Recording_Store)
+CARPETA_INTENTOS = "temp_data"
+
+
+class MonitorBloqueos:
+    """
+    Mide cuánto se bloquea el lazo de eventos de Qt: un QTimer que debería
+    dispararse cada 'intervalo_ms' registra el retraso de cada disparo (en
+    Metrics como "game.event_loop_stall") y el máximo observado.
+    """
+
+    def __init__(self, padre, intervalo_ms=20):
+        self.intervalo = intervalo_ms / 1000
+        self.maximo = 0.0
+        self._ultimo = None
+        self.timer = QTimer(padre)
+        self.timer.timeout.connect(self._tick)
+
+    def iniciar(self):
+        self._ultimo = time.perf_counter()
+        self.timer.start(int(self.intervalo * 1000))
 
-# Importamos las funciones de recolección de datos desde Collect_Data.py
-import Collect_Data
-from Training_Model import MovementEvaluationSystem
+    def _tick(self):
+        ahora = time.perf_counter()
+        bloqueo = max(ahora - self._ultimo - self.intervalo, 0.0)
+        self._ultimo = ahora
+        self.maximo = max(self.maximo, bloqueo)
+        metrics.observe("game.event_loop_stall", bloqueo)
+
+
+class SenalesCalificacion(QObject):
+    # (número de intento, calificación) o (número de intento, mensaje de error)
+    terminada = pyqtSignal(int, float)
+    fallida = pyqtSignal(int, str)
+    # Número de intento, siempre al terminar run (también si se canceló)
+    finalizada = pyqtSignal(int)
+
+
+class TareaCalificacion(QRunnable):
+    """
+    Califica un intento fuera del hilo de la interfaz: lo agrega al almacén
+    de intentos, extrae las características y lo compara con el centroide
+    del movimiento. El resultado vuelve por señales, que Qt entrega en el
+    hilo de la interfaz. cancelar() hace que la tarea termine sin emitir el
+    resultado; 'finalizada' se emite siempre, al final.
+    """
+
+    def __init__(self, intento, df, movimiento, movement_system, scorer, almacen):
+        super().__init__()
+        self.setAutoDelete(False)  # La referencia la conserva el juego hasta que se emite 'finalizada'
+        self.intento = intento
+        self.df = df
+        self.movimiento = movimiento
+        self.movement_system = movement_system
+        self.scorer = scorer
+        self.almacen = almacen
+        self.senales = SenalesCalificacion()  # Se crea en el hilo de la interfaz
+        self.cancelada = threading.Event()
+
+    def cancelar(self):
+        self.cancelada.set()
+
+    def run(self):
+        try:
+            self.calificar()
+        finally:
+            self.senales.finalizada.emit(self.intento)
+
+    def calificar(self):
+        try:
+            # Puede esperar si el disco no da abasto (la cola del writer es acotada)
+            almacen = self.almacen()
+            Collect_Data.get_writer().submit_to_store(almacen, self.df, self.movimiento)
+            if self.cancelada.is_set():
+                return
+            with metrics.timer("game.grade"):
+                with metrics.timer("game.extract_features"):
+                    features = self.movement_system.extract_features(self.df)
+                features = np.array(features)
+                features = self.movement_system.clean_data(features)
+                # 0 si el movimiento no tiene centroide
+                with metrics.timer("game.score"):
+                    calificacion = self.scorer.score_movement(features, self.movimiento)[0]
+        except Exception as e:  # Cualquier error se informa en la interfaz en lugar de perderse en el hilo
+            if not self.cancelada.is_set():
+                self.senales.fallida.emit(self.intento, str(e))
+            return
+        if not self.cancelada.is_set():
+            self.senales.terminada.emit(self.intento, float(calificacion))
 
 
 class MovimientoJuego(QMainWindow):
-    def __init__(self):
+    def __init__(self, retroalimentacion_en_vivo=True, ventana_en_vivo=None, calificacion="centroid"):
         super().__init__()
         self.setWindowTitle("Juego de Movimientos")
         self.setGeometry(100, 100, 700, 700)
 
         # Cargar el sistema de evaluación exportado
-        self.movement_system = joblib.load("movement_system.pkl")
+        self.movement_system = cargar_sistema()
+        perfil_inicio.marcar("modelo")
+
+        # Calificador de los intentos: contra los centroides del sistema o, con
+        # calificacion="knn", por vecinos más cercanos entre las grabaciones de entrenamiento
+        self.scorer = self.movement_system.grading_scorer(calificacion, method="inverse_distance")
 
         # Lista de movimientos (deben coincidir con los usados en el entrenamiento)
         self.movimientos = ["Curl", "CrossoverArm", "Pendulum"]
@@ -32,13 +185,57 @@ class MovimientoJuego(QMainWindow):
 
         # Variables para estadísticas
         self.attempts_data = {mov: [] for mov in self.movimientos}  # calificaciones por movimiento
-        self.rating_counts = {"Intente de nuevo": 0, "Bien": 0, "Maravilloso": 0, "Excelente": 0}
+        self.rating_counts = {etiqueta: 0 for etiqueta in DEFAULT_LABELS}
         self.total_score = 0.0
         self.total_attempts = 0
         self.start_time = time.time()
 
+        # Modo de retroalimentación en vivo: similitud durante la captura, calculada con
+        # una ventana deslizante a medida que llegan las muestras. Por defecto la ventana
+        # dura lo mismo que las de entrenamiento y se compara con el promedio de esas
+        # ventanas por movimiento (live_scorer), que está en la misma escala. Un modelo
+        # sin ventanas no tiene con qué compararla: la similitud se queda en "--"
+        self.retroalimentacion_en_vivo = retroalimentacion_en_vivo
+        ventana_modelo = self.movement_system.live_window_seconds()
+        if ventana_en_vivo is None:
+            ventana_en_vivo = ventana_modelo
+        elif ventana_modelo and ventana_en_vivo != ventana_modelo:
+            print(f"La ventana en vivo ({ventana_en_vivo} s) no coincide con la del entrenamiento "
+                  f"({ventana_modelo} s): la similitud en vivo no es comparable con la calificación.")
+        self.scorer_en_vivo = self.movement_system.live_scorer(method="inverse_distance")
+        self.motor_en_vivo = None
+        if self.scorer_en_vivo is not None:
+            self.motor_en_vivo = StreamingFeatureEngine(self.movement_system.sensors, window_seconds=ventana_en_vivo,
+                                                        width=self.scorer_en_vivo.width)
+        elif retroalimentacion_en_vivo:
+            print("El modelo no tiene centroides por ventana: no hay similitud en vivo. "
+                  "Vuelva a entrenarlo con Training_Model.py.")
+        self.timer_en_vivo = QTimer(self)
+        self.timer_en_vivo.timeout.connect(self.actualizar_similitud_en_vivo)
+
+        # Imágenes y GIFs decodificados una sola vez
+        self.recursos = AssetCache("Assets")
+        self.gif_actual = None
+
+        # Almacén de intentos: se abre con la primera grabación (ver almacen_intentos)
+        self.almacen = None
+        self.lock_almacen = threading.Lock()
+
+        # Calificación en segundo plano: un hilo (los intentos se califican en orden);
+        # cada intento tiene un número y solo se muestra el resultado del último
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.intento = 0
+        self.tarea_calificacion = None
+        # Toda tarea iniciada, por número de intento, hasta que emite 'finalizada':
+        # el pool no conserva la referencia y liberarla antes (por ejemplo al
+        # cancelar una tarea que aún espera en la cola) deja al pool con un puntero inválido
+        self.tareas_en_curso = {}
+        self.monitor_bloqueos = MonitorBloqueos(self)
+
         # Configuración de la interfaz
         self.init_ui()
+        perfil_inicio.marcar("interfaz")
 
     def init_ui(self):
         # Layout principal
@@ -63,6 +260,12 @@ class MovimientoJuego(QMainWindow):
         self.label_cuenta_regresiva.setStyleSheet("font-size: 18px;")
         self.layout.addWidget(self.label_cuenta_regresiva)
 
+        # Etiqueta para la similitud en vivo durante la captura
+        self.label_en_vivo = QLabel("", self)
+        self.label_en_vivo.setAlignment(Qt.AlignCenter)
+        self.label_en_vivo.setStyleSheet("font-size: 16px;")
+        self.layout.addWidget(self.label_en_vivo)
+
         # Etiqueta para el mensaje de resultado
         self.label_resultado = QLabel("", self)
         self.label_resultado.setAlignment(Qt.AlignCenter)
@@ -85,11 +288,19 @@ class MovimientoJuego(QMainWindow):
         self.boton_siguiente.setEnabled(False)
         self.layout.addWidget(self.boton_siguiente)
 
-        # Iniciar el juego
-        self.iniciar_juego()
+        # Iniciar el juego después de pintar el primer cuadro de la ventana
+        self.mostrar_movimiento_actual()
+        QTimer.singleShot(0, self.iniciar_juego)
 
     def iniciar_juego(self):
-        self.mostrar_movimiento_actual()
+        perfil_inicio.marcar("primer cuadro")
+        if self.retroalimentacion_en_vivo and self.motor_en_vivo is not None:
+            Collect_Data.subscribe(self.motor_en_vivo.add)
+        perfil_inicio.marcar("recolección")
+        self.precargar_recursos()
+        perfil_inicio.marcar("recursos")
+        perfil_inicio.imprimir()
+        self.monitor_bloqueos.iniciar()
         self.iniciar_recoleccion_datos()
         self.iniciar_cuenta_regresiva()
 
@@ -97,28 +308,61 @@ class MovimientoJuego(QMainWindow):
         movimiento_actual = self.movimientos[self.indice_movimiento_actual]
         self.label_movimiento.setText(f"Movimiento: {movimiento_actual}")
 
-        # Cargar imagen correspondiente (PNG) desde la carpeta "Assets"
-        image_path = os.path.join("Assets", f"{movimiento_actual}.png")
-        if os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-            self.label_imagen.setPixmap(pixmap.scaled(150, 150, Qt.KeepAspectRatio))
+        # Imagen correspondiente (PNG) de la carpeta "Assets", ya escalada
+        pixmap = self.recursos.pixmap(f"{movimiento_actual}.png", 150, 150)
+        if pixmap is not None:
+            self.label_imagen.setPixmap(pixmap)
         else:
             self.label_imagen.clear()
-            print(f"No se encontró la imagen para {movimiento_actual} en {image_path}.")
+            print(f"No se encontró la imagen para {movimiento_actual} en "
+                  f"{self.recursos.path(f'{movimiento_actual}.png')}.")
+
+    def precargar_recursos(self):
+        """Decodifica las imágenes de los movimientos y los GIFs de resultado."""
+        self.recursos.preload(pixmaps=[(f"{movimiento}.png", 150, 150) for movimiento in self.movimientos],
+                              movies=GIFS_RESULTADO.values())
+
+    def limpiar_gif(self):
+        if self.gif_actual is not None:
+            self.gif_actual.stop()
+            self.gif_actual = None
+        self.label_result_gif.clear()
+
+    def almacen_intentos(self):
+        """
+        Almacén donde se guardan los intentos (en lugar de un CSV por intento en
+        temp_data). Se llama desde la tarea de calificación.
+        """
+        with self.lock_almacen:
+            if self.almacen is None:
+                from Recording_Store import RecordingStore  # Diferido: arrastra pandas (ver importar_diferido)
+                self.almacen = RecordingStore(CARPETA_INTENTOS)
+            return self.almacen
 
     def iniciar_recoleccion_datos(self):
-        Collect_Data.output_folder = "temp_data"
+        Collect_Data.output_folder = CARPETA_INTENTOS
         if not os.path.exists(Collect_Data.output_folder):
             os.makedirs(Collect_Data.output_folder)
-        Collect_Data.start_recording(self, "temp_data")  # Pasar self como argumento
+        Collect_Data.start_recording(self, CARPETA_INTENTOS)  # Pasar self como argumento
+        if self.retroalimentacion_en_vivo:
+            self.label_en_vivo.setText("Similitud en vivo: --")
+            if self.motor_en_vivo is not None:
+                self.motor_en_vivo.reset()
+                self.timer_en_vivo.start(200)
+
+    def actualizar_similitud_en_vivo(self):
+        movimiento_actual = self.movimientos[self.indice_movimiento_actual]
+        if movimiento_actual not in self.scorer_en_vivo.movements:
+            return
+        features = self.movement_system.clean_data(np.array(self.motor_en_vivo.features()))
+        similitud = self.scorer_en_vivo.score_movement(features, movimiento_actual)[0]
+        self.label_en_vivo.setText(f"Similitud en vivo: {similitud:.4f}")
 
     def detener_recoleccion_datos(self):
-        Collect_Data.stop_recording(self)  # Pasar self como argumento
-        files = [f for f in os.listdir(Collect_Data.output_folder) if f.endswith(".csv")]
-        if not files:
-            return None
-        files = sorted(files, key=lambda x: os.path.getctime(os.path.join(Collect_Data.output_folder, x)), reverse=True)
-        return os.path.join(Collect_Data.output_folder, files[0])
+        self.timer_en_vivo.stop()
+        # La grabación llega en memoria y el dispositivo queda libre para el próximo
+        # intento; la tarea de calificación la agrega al almacén
+        return Collect_Data.finish_recording(save=False)
 
     def iniciar_cuenta_regresiva(self):
         self.cuenta_regresiva(5)
@@ -132,38 +376,63 @@ class MovimientoJuego(QMainWindow):
             self.calificar_movimiento()
 
     def calificar_movimiento(self):
-        filename = self.detener_recoleccion_datos()
-        if filename is None:
+        with metrics.timer("game.stop_recording"):
+            df = self.detener_recoleccion_datos()
+        if df is None or df.empty:
             QMessageBox.critical(self, "Error", "No se pudieron obtener datos de sensor.")
-            calificacion = 0
-        else:
-            df = pd.read_csv(filename)
-            features = self.movement_system.extract_features(df)
-            features = np.array(features)
-            features = self.movement_system.clean_data(features)
-            movimiento_actual = self.movimientos[self.indice_movimiento_actual]
-            if (movimiento_actual in self.movement_system.centroids and
-                    self.movement_system.centroids[movimiento_actual] is not None):
-                centroid = self.movement_system.centroids[movimiento_actual]
-                calificacion = self.movement_system.compute_similarity(features, centroid, method="inverse_distance")
-            else:
-                calificacion = 0
-
-        self.mostrar_resultado(calificacion)
+            with metrics.timer("game.show_result"):
+                self.mostrar_resultado(0)
+            return
+
+        # Lectura de características y calificación en el pool: la interfaz sigue
+        # respondiendo y los botones permiten pasar a otro intento sin esperar
+        self.cancelar_calificacion()
+        self.intento += 1
+        movimiento_actual = self.movimientos[self.indice_movimiento_actual]
+        tarea = TareaCalificacion(self.intento, df, movimiento_actual, self.movement_system, self.scorer,
+                                  self.almacen_intentos)
+        tarea.senales.terminada.connect(self.calificacion_terminada)
+        tarea.senales.fallida.connect(self.calificacion_fallida)
+        tarea.senales.finalizada.connect(self.tarea_finalizada)
+        self.tarea_calificacion = tarea
+        self.tareas_en_curso[self.intento] = tarea
+        self.label_resultado.setText("Calificando...")
+        self.boton_intentar.setEnabled(True)
+        self.boton_siguiente.setEnabled(True)
+        self.pool.start(tarea)
+
+    def cancelar_calificacion(self):
+        """Descarta la calificación en curso (si la hay): su resultado ya no se muestra."""
+        if self.tarea_calificacion is not None:
+            self.tarea_calificacion.cancelar()
+            self.tarea_calificacion = None
+
+    def tarea_finalizada(self, intento):
+        self.tareas_en_curso.pop(intento, None)
+
+    def calificacion_terminada(self, intento, calificacion):
+        if intento != self.intento or self.tarea_calificacion is None:
+            return  # Resultado de un intento que ya se dejó atrás
+        self.tarea_calificacion = None
+        with metrics.timer("game.show_result"):
+            self.mostrar_resultado(calificacion)
+
+    def calificacion_fallida(self, intento, error):
+        if intento != self.intento or self.tarea_calificacion is None:
+            return
+        self.tarea_calificacion = None
+        QMessageBox.critical(self, "Error", f"No se pudo calificar el movimiento: {error}")
+        self.mostrar_resultado(0)
+
+    def calificacion_a_mensaje(self, calificacion):
+        """Etiqueta según los umbrales del modelo (los de siempre si se cargó el .pkl)."""
+        if hasattr(self.movement_system, "rating"):
+            return self.movement_system.rating(calificacion)
+        return DEFAULT_LABELS[int(np.searchsorted(DEFAULT_THRESHOLDS, calificacion, side="right"))]
 
     def mostrar_resultado(self, calificacion):
-        if calificacion < 0.15:
-            mensaje = "Intente de nuevo"
-            gif_file = "Intente.gif"
-        elif calificacion < 0.20:
-            mensaje = "Bien"
-            gif_file = "Bien.gif"
-        elif calificacion < 0.30:
-            mensaje = "Maravilloso"
-            gif_file = "Maravilloso.gif"
-        else:
-            mensaje = "Excelente"
-            gif_file = "Excelente.gif"
+        mensaje = self.calificacion_a_mensaje(calificacion)
+        gif_file = GIFS_RESULTADO.get(mensaje, f"{mensaje}.gif")
 
         self.label_resultado.setText(f"{mensaje} {calificacion:.4f}")
 
@@ -173,30 +442,34 @@ class MovimientoJuego(QMainWindow):
         self.total_score += calificacion
         self.total_attempts += 1
 
-        gif_path = os.path.join("Assets", gif_file)
-        if os.path.exists(gif_path):
-            movie = QMovie(gif_path)
+        self.limpiar_gif()
+        movie = self.recursos.movie(gif_file)
+        if movie is not None:
+            self.gif_actual = movie
             self.label_result_gif.setMovie(movie)
             movie.start()
         else:
-            self.label_result_gif.clear()
-            print(f"No se encontró el GIF para {mensaje} en {gif_path}.")
+            print(f"No se encontró el GIF para {mensaje} en {self.recursos.path(gif_file)}.")
 
         self.boton_intentar.setEnabled(True)
         self.boton_siguiente.setEnabled(True)
 
     def intentar_de_nuevo(self):
+        self.cancelar_calificacion()
         self.label_resultado.clear()
-        self.label_result_gif.clear()
+        self.label_en_vivo.clear()
+        self.limpiar_gif()
         self.boton_intentar.setEnabled(False)
         self.boton_siguiente.setEnabled(False)
         self.iniciar_recoleccion_datos()
         self.iniciar_cuenta_regresiva()
 
     def siguiente_movimiento(self):
+        self.cancelar_calificacion()
         self.indice_movimiento_actual = (self.indice_movimiento_actual + 1) % len(self.movimientos)
         self.label_resultado.clear()
-        self.label_result_gif.clear()
+        self.label_en_vivo.clear()
+        self.limpiar_gif()
         self.boton_intentar.setEnabled(False)
         self.boton_siguiente.setEnabled(False)
         self.mostrar_movimiento_actual()
@@ -228,10 +501,31 @@ class MovimientoJuego(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    juego = MovimientoJuego()
-    data_thread = threading.Thread(target=Collect_Data.data_collection_thread)
-    data_thread.daemon = True
-    data_thread.start()
-
+    parser = argparse.ArgumentParser(description="Juego de movimientos.")
+    parser.add_argument("--sin-en-vivo", action="store_true", help="Desactivar la similitud en vivo durante la captura")
+    parser.add_argument("--ventana-en-vivo", type=float, metavar="SEGUNDOS",
+                        help="Duración de la ventana en vivo (por defecto, la de las ventanas de entrenamiento)")
+    parser.add_argument("--calificacion", choices=SCORINGS, default="centroid",
+                        help="Calificar contra los centroides o por vecinos más cercanos (k-NN)")
+    parser.add_argument("--perfil-inicio", action="store_true", help="Mostrar el tiempo de cada etapa del arranque")
+    args, _ = parser.parse_known_args()  # El resto de los argumentos son de Qt
+    try:
+        juego = MovimientoJuego(retroalimentacion_en_vivo=not args.sin_en_vivo, ventana_en_vivo=args.ventana_en_vivo,
+                                calificacion=args.calificacion)
+    except ValueError as e:  # Por ejemplo, --calificacion knn con un modelo sin ejemplos
+        parser.error(str(e))
     juego.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+
+    def iniciar_hilo_recoleccion():
+        data_thread = threading.Thread(target=Collect_Data.data_collection_thread)
+        data_thread.daemon = True
+        data_thread.start()
+
+    # Se inicia junto con el juego, después del primer cuadro (ver importar_diferido)
+    QTimer.singleShot(0, iniciar_hilo_recoleccion)
+    exit_code = app.exec_()
+    juego.pool.waitForDone()  # Terminar la calificación en curso (y su intento en el almacén)
+    Collect_Data.flush()  # Esperar a que se guarden los intentos pendientes
+    if juego.almacen is not None:
+        juego.almacen.close()
+    sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,228 @@
+import argparse
+import threading
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from Display_Graphs import downsample_minmax
+from Metrics import metrics
+from Sensor_Buffer import SENSOR_RATES, RecordingBuffer
+
+# Segundos visibles hacia atrás desde la muestra más reciente
+WINDOW_SECONDS = 10.0
+
+# Cuadros por segundo del redibujado
+FPS = 20
+
+# Muestras conservadas por sensor (buffer circular): cubre la ventana a ~400 Hz
+MAX_SAMPLES = 4096
+
+# Puntos por eje dibujados en cada cuadro
+MAX_POINTS = 1000
+
+AXES = ["x", "y", "z"]
+
+
+class LivePlot:
+    """
+    Vista en vivo de la grabación en curso: un subgráfico por sensor con las
+    trazas x/y/z de los últimos 'window_seconds' segundos. Recibe los bloques
+    nuevos con subscribe() del recolector (Collect_Data o un DeviceCollector) y
+    los guarda en buffers circulares acotados; un temporizador redibuja a 'fps'
+    cuadros por segundo solo si llegaron muestras, actualizando los datos de las
+    líneas existentes y con blitting (se restaura el fondo ya dibujado y solo se
+    pintan las líneas). El eje X es relativo a la última muestra, así los ejes
+    no cambian entre cuadros y el costo no depende de la duración de la sesión.
+    """
+
+    def __init__(self, sensors=None, window_seconds=WINDOW_SECONDS, fps=FPS,
+                 max_samples=MAX_SAMPLES, max_points=MAX_POINTS, figure=None):
+        self.sensors = list(SENSOR_RATES if sensors is None else sensors)
+        self.window_seconds = window_seconds
+        self.fps = fps
+        self.max_points = max_points
+        self.buffer = RecordingBuffer(capacity=256, max_samples=max_samples)
+        self.lock = threading.Lock()
+        self.version = 0  # Aumenta con cada bloque recibido
+        self._drawn_version = -1
+        self._background = None
+        self._sources = []
+        self._timer = None
+
+        self.fig = figure if figure is not None else plt.figure(figsize=(10, 2.5 * len(self.sensors)))
+        self.axes = {}
+        self.lines = {}
+        axes = self.fig.subplots(len(self.sensors), 1, sharex=True, squeeze=False)[:, 0]
+        for ax, sensor in zip(axes, self.sensors):
+            # animated=True: las líneas no forman parte del fondo guardado
+            self.lines[sensor] = [ax.plot([], [], label=axis.upper(), animated=True)[0] for axis in AXES]
+            ax.set_title(f"Sensor: {sensor}")
+            ax.set_ylabel("Valor")
+            ax.set_xlim(-self.window_seconds, 0)
+            ax.set_ylim(-1, 1)
+            ax.legend(loc="upper left")
+            ax.grid()
+            self.axes[sensor] = ax
+        axes[-1].set_xlabel("Segundos antes de la última muestra")
+        self.fig.suptitle("Sensores en vivo")
+        self.fig.tight_layout()
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+    # --- Entrada de datos (hilo de recolección) ---
+
+    def on_samples(self, sensor, timestamps, values):
+        """Callback de subscribe(): agrega un bloque (sensor, timestamps, values) al buffer."""
+        if sensor not in self.axes:
+            return
+        with self.lock:
+            self.buffer.append(sensor, timestamps, values)
+            self.version += 1
+
+    def attach(self, source):
+        """Se suscribe a 'source' (Collect_Data, un DeviceCollector o cualquier objeto con subscribe)."""
+        source.subscribe(self.on_samples)
+        self._sources.append(source)
+        return self
+
+    def detach(self):
+        for source in self._sources:
+            source.unsubscribe(self.on_samples)
+        self._sources = []
+
+    def clear(self):
+        with self.lock:
+            self.buffer.clear()
+            self.version += 1
+
+    # --- Dibujo (hilo de la interfaz) ---
+
+    def visible_traces(self):
+        """
+        {sensor: (x, valores (n, 3))} de la ventana visible, con x en segundos
+        relativos a la muestra más reciente de todos los sensores.
+        """
+        with self.lock:
+            arrays = {sensor: buffer.arrays() for sensor, buffer in self.buffer.sensors.items() if len(buffer)}
+        if not arrays:
+            return {}
+        latest = max(timestamps.max() for timestamps, _ in arrays.values())
+        traces = {}
+        for sensor, (timestamps, values) in arrays.items():
+            order = np.argsort(timestamps, kind="stable")  # Los bloques pueden llegar desordenados
+            x = timestamps[order] - latest
+            start = np.searchsorted(x, -self.window_seconds, side="left")
+            traces[sensor] = (x[start:], values[order[start:], :len(AXES)])
+        return traces
+
+    def _on_draw(self, event):
+        """Tras un dibujado completo: guardar el fondo (sin las líneas) y pintar las líneas encima."""
+        canvas = self.fig.canvas
+        if getattr(canvas, "supports_blit", False):
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for sensor, lines in self.lines.items():
+            for line in lines:
+                self.axes[sensor].draw_artist(line)
+
+    def _update_limits(self, sensor, values):
+        """Amplía el eje Y si los datos visibles se salen; devuelve True si hubo que cambiarlo."""
+        finite = values[np.isfinite(values)]
+        if len(finite) == 0:
+            return False
+        low, high = self.axes[sensor].get_ylim()
+        data_low, data_high = finite.min(), finite.max()
+        if data_low >= low and data_high <= high:
+            return False
+        margin = 0.1 * max(data_high - data_low, 1e-3)
+        self.axes[sensor].set_ylim(min(low, data_low - margin), max(high, data_high + margin))
+        return True
+
+    def update(self):
+        """
+        Dibuja un cuadro si hay muestras nuevas. Devuelve True si se redibujó.
+        Si cambió la escala de algún eje Y se hace un dibujado completo (poco
+        frecuente); si no, solo se restauran el fondo y las líneas.
+        """
+        version = self.version
+        if version == self._drawn_version:
+            return False
+        with metrics.timer("live.frame"):
+            rescaled = False
+            traces = self.visible_traces()
+            for sensor, lines in self.lines.items():
+                if sensor not in traces:  # Sin muestras (por ejemplo tras clear())
+                    for line in lines:
+                        line.set_data([], [])
+                    continue
+                x, values = traces[sensor]
+                for line, column in zip(lines, values.T):
+                    line.set_data(*downsample_minmax(x, column, self.max_points))
+                rescaled |= self._update_limits(sensor, values)
+
+            canvas = self.fig.canvas
+            if rescaled or self._background is None:
+                canvas.draw_idle()  # Nuevo fondo con la escala actualizada (ver _on_draw)
+            else:
+                canvas.restore_region(self._background)
+                self._draw_lines()
+                canvas.blit(self.fig.bbox)
+            self._drawn_version = version
+        return True
+
+    def start(self):
+        """Redibuja a 'fps' cuadros por segundo con el temporizador del backend de matplotlib."""
+        self._timer = self.fig.canvas.new_timer(interval=int(1000 / self.fps))
+        self._timer.add_callback(self.update)
+        self._timer.start()
+        return self
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        self.detach()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Muestra en vivo las trazas x/y/z de los sensores de un teléfono.")
+    parser.add_argument("--url", help="URL de sensors.json (por defecto la de Collect_Data)")
+    parser.add_argument("--fake", action="store_true", help="Usar el servidor de sensores simulado")
+    parser.add_argument("--window", type=float, default=WINDOW_SECONDS, help="Segundos visibles")
+    parser.add_argument("--fps", type=float, default=FPS, help="Cuadros por segundo")
+    args = parser.parse_args()
+
+    from Device_Collector import DeviceCollector
+
+    fake = None
+    if args.fake:
+        from Fake_Sensor_Server import FakeSensorServer
+        fake = FakeSensorServer().start()
+        url = fake.url
+    elif args.url:
+        url = args.url
+    else:
+        from Collect_Data import URL as url
+
+    device = DeviceCollector(url)
+    device.start()
+    stop = threading.Event()
+
+    def collect():
+        while not stop.is_set():
+            stop.wait(device.poll_once())
+
+    threading.Thread(target=collect, daemon=True).start()
+    live = LivePlot(window_seconds=args.window, fps=args.fps).attach(device).start()
+    try:
+        plt.show()
+    finally:
+        live.stop()
+        stop.set()
+        if fake is not None:
+            fake.stop()
+
+
+if __name__ == "__main__":
+    main()
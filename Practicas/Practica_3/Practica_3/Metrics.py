@@ -0,0 +1,199 @@
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Límites superiores (segundos) de los buckets de los histogramas: 10 µs a ~3 min, duplicando
+BUCKETS = [1e-5 * 2 ** k for k in range(25)]
+
+# Contexto vacío que devuelve timer() con las métricas apagadas (sin costo por llamada)
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    """Cantidad, suma, mínimo, máximo y conteo por bucket de una serie de valores."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets = [0] * (len(BUCKETS) + 1)  # El último acumula lo que supera BUCKETS[-1]
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        index = 0
+        while index < len(BUCKETS) and value > BUCKETS[index]:
+            index += 1
+        self.buckets[index] += 1
+
+    def quantile(self, q):
+        """Cuantil aproximado: límite superior del bucket que lo contiene."""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min(BUCKETS[index] if index < len(BUCKETS) else self.max, self.max)
+        return self.max
+
+    def summary(self):
+        if self.count == 0:
+            return {"count": 0}
+        return {"count": self.count, "sum": self.total, "mean": self.total / self.count,
+                "min": self.min, "max": self.max,
+                "p50": self.quantile(0.50), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    Métricas de latencia y rendimiento de la recolección, la calificación y el
+    entrenamiento: temporizadores e histogramas (segundos) y contadores. Están
+    apagadas por defecto; en ese caso timer() devuelve un contexto vacío y
+    count()/observe() retornan de inmediato. Se encienden con enable() o con las
+    variables de entorno METRICS_LOG (archivo JSON por líneas) o METRICS_PORT
+    (endpoint HTTP local con el JSON de snapshot()).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.reset()
+        self._server = None
+        self._log_thread = None
+        self._log_stop = threading.Event()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def enable(self, enabled=True):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def timer(self, name):
+        """Contexto que mide la duración del bloque: with metrics.timer("collect.poll"): ..."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """Diccionario con los histogramas, contadores y su ritmo por segundo desde enable()."""
+        with self.lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            return {
+                "time": time.time(),
+                "elapsed": elapsed,
+                "timers": {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "rates": {name: value / elapsed for name, value in sorted(self.counters.items())},
+            }
+
+    def write_log(self, path):
+        """Agrega una línea JSON con el snapshot actual al archivo."""
+        with open(path, "a") as f:
+            f.write(json.dumps(self.snapshot()) + "\n")
+
+    def start_log(self, path, interval=10.0):
+        """Escribe el snapshot en 'path' cada 'interval' segundos (hilo de fondo) y al detenerse."""
+        self.enable()
+
+        def run():
+            while not self._log_stop.wait(interval):
+                self.write_log(path)
+            self.write_log(path)
+
+        self._log_stop.clear()
+        self._log_thread = threading.Thread(target=run, daemon=True)
+        self._log_thread.start()
+        atexit.register(self.stop_log)  # Última línea al salir
+
+    def stop_log(self):
+        if self._log_thread is not None:
+            self._log_stop.set()
+            self._log_thread.join()
+            self._log_thread = None
+
+    def serve(self, port=9100, host="127.0.0.1"):
+        """Sirve el snapshot como JSON en http://host:port/metrics (hilo de fondo)."""
+        self.enable()
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}/metrics"
+
+    def close(self):
+        self.stop_log()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Registro único compartido por todos los módulos
+metrics = Metrics()
+
+if os.environ.get("METRICS_LOG"):
+    metrics.start_log(os.environ["METRICS_LOG"], float(os.environ.get("METRICS_INTERVAL", "10")))
+if os.environ.get("METRICS_PORT"):
+    metrics.serve(int(os.environ["METRICS_PORT"]))
@@ -0,0 +1,317 @@
+import os
+
+import numpy as np
+
+from Array_File import read_array_header, read_arrays, write_array_file
+import Frequency_Features
+from Feature_Extraction import AXES, FEATURE_VERSION, FEATURES_PER_SENSOR
+from Movement_Scorer import CentroidScorer, ExemplarIndex
+
+# Modelo exportado (.mmod): solo lo necesario para calificar, sin pickle.
+#   b"SMOD" + encabezado JSON (esquema, versión, movimientos, sensores, columnas
+#   de características, umbrales de calificación) y arreglos crudos alineados
+#   a 64 bytes: centroides, media/escala del StandardScaler y, opcionalmente,
+#   los árboles del RandomForest aplanados. Se carga con NumPy y mmap.
+MAGIC = b"SMOD"
+SCHEMA = "movement-model"
+VERSION = 1
+MODEL_EXTENSION = ".mmod"
+DEFAULT_MODEL_PATH = "movement_model" + MODEL_EXTENSION
+
+# Calificaciones del juego: una calificación menor que thresholds[i] recibe labels[i]
+DEFAULT_THRESHOLDS = [0.15, 0.20, 0.30]
+DEFAULT_LABELS = ["Intente de nuevo", "Bien", "Maravilloso", "Excelente"]
+
+# Calificación: contra los centroides o por vecinos más cercanos (ver Movement_Scorer)
+SCORINGS = ["centroid", "knn"]
+
+TREE_ARRAYS = ["tree_offsets", "children_left", "children_right", "feature", "threshold", "value"]
+
+
+def feature_names(sensors, feature_set="basic"):
+    """Nombre de cada columna del vector de características, en orden."""
+    stats = [f"mean_{axis}" for axis in AXES] + [f"std_{axis}" for axis in AXES] + ["magnitude"]
+    names = [f"{sensor}_{stat}" for sensor in sensors for stat in stats]
+    if feature_set == "extended":
+        names += Frequency_Features.frequency_feature_names(sensors)
+    return names
+
+
+def grading_scorer(model, scoring="centroid", method="inverse_distance", k=5):
+    """
+    Calificador de un modelo (MovementModel o MovementEvaluationSystem) según
+    'scoring'. Con "knn", el modelo debe tener los ejemplos de entrenamiento.
+    """
+    if scoring not in SCORINGS:
+        raise ValueError(f"Calificación desconocida: {scoring}")
+    if scoring == "knn":
+        index = model.exemplar_index(method, k)
+        if index is None:
+            raise ValueError("El modelo no tiene ejemplos para k-NN; vuelva a entrenarlo con Training_Model.py "
+                             "o califique contra los centroides.")
+        return index
+    return model.scorer(method)
+
+
+def live_scorer(model, method="inverse_distance"):
+    """
+    Calificador en vivo de un modelo: contra los centroides por ventana, o None
+    si el modelo no los tiene (los de grabaciones completas están en otra
+    escala que una ventana deslizante). StreamingFeatureEngine solo calcula
+    las características básicas, que son las primeras columnas de cualquier
+    conjunto, así que los centroides se recortan a esas columnas.
+    """
+    centroids = getattr(model, "window_centroids", None)
+    if not centroids:
+        return None
+    width = len(model.sensors) * FEATURES_PER_SENSOR
+    return CentroidScorer({movement: None if centroid is None else np.asarray(centroid)[:width]
+                           for movement, centroid in centroids.items()}, method)
+
+
+def average_window_proba(predict_proba, X_windows, recording, X_files):
+    """
+    Probabilidades por grabación de un clasificador entrenado con ventanas:
+    el promedio de las probabilidades de sus ventanas ('recording' es la
+    grabación de cada fila de X_windows). Las grabaciones sin ventanas usan la
+    fila de X_files (características de la grabación completa). Hace una sola
+    llamada a predict_proba.
+    """
+    X_files = np.atleast_2d(X_files)
+    windows_per_file = np.bincount(recording, minlength=len(X_files))
+    without = np.flatnonzero(windows_per_file == 0)
+    proba = predict_proba(np.concatenate([X_windows, X_files[without]]))
+    result = np.zeros((len(X_files), proba.shape[1]))
+    np.add.at(result, recording, proba[:len(X_windows)])
+    result /= np.maximum(windows_per_file, 1)[:, None]
+    result[without] = proba[len(X_windows):]
+    return result
+
+
+def _flatten_forest(forest):
+    """
+    Concatena los árboles de un RandomForestClassifier en arreglos planos.
+    Los índices de hijos quedan relativos a cada árbol (-1 en las hojas) y
+    'value' guarda las probabilidades por clase de cada nodo.
+    """
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees]).astype(np.int64)
+    value = np.concatenate([tree.value[:, 0, :] for tree in trees])
+    totals = value.sum(axis=1, keepdims=True)
+    value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+    return [
+        ("tree_offsets", offsets),
+        ("children_left", np.concatenate([tree.children_left for tree in trees]).astype(np.int32)),
+        ("children_right", np.concatenate([tree.children_right for tree in trees]).astype(np.int32)),
+        ("feature", np.concatenate([tree.feature for tree in trees]).astype(np.int32)),
+        ("threshold", np.concatenate([tree.threshold for tree in trees]).astype(np.float64)),
+        ("value", value.astype(np.float64)),
+    ]
+
+
+def export_model(system, path=DEFAULT_MODEL_PATH, thresholds=DEFAULT_THRESHOLDS, labels=DEFAULT_LABELS,
+                 include_forest=True):
+    """
+    Exporta un MovementEvaluationSystem entrenado al formato .mmod. El
+    clasificador (StandardScaler + RandomForest) se incluye si existe y
+    'include_forest' es True. Devuelve la ruta del archivo.
+    """
+    centroid_movements = [movement for movement in system.movements if system.centroids.get(movement) is not None]
+    feature_set = getattr(system, "feature_set", "basic")
+    width = Frequency_Features.feature_width(system.sensors, feature_set)
+    centroids = np.array([system.centroids[movement] for movement in centroid_movements],
+                         dtype=np.float64).reshape(len(centroid_movements), width)
+
+    header = {
+        "schema": SCHEMA,
+        "version": VERSION,
+        "feature_version": FEATURE_VERSION,
+        "movements": list(system.movements),
+        "sensors": list(system.sensors),
+        "feature_set": feature_set,
+        "features": feature_names(system.sensors, feature_set),
+        "centroid_movements": centroid_movements,
+        "thresholds": [float(threshold) for threshold in thresholds],
+        "labels": list(labels),
+        "classes": [],
+    }
+    arrays = [("centroids", centroids)]
+
+    # Características de cada grabación de entrenamiento, para calificar por k-NN
+    exemplar_features = getattr(system, "exemplar_features", None)
+    if exemplar_features is not None and len(exemplar_features):
+        header["exemplar_labels"] = [str(label) for label in system.exemplar_labels]
+        arrays.append(("exemplars", np.asarray(exemplar_features, dtype=np.float64).reshape(-1, width)))
+
+    # Promedio de las ventanas de entrenamiento por movimiento, para la calificación en vivo
+    window_centroids = getattr(system, "window_centroids", None) or {}
+    window_movements = [movement for movement in system.movements if movement in window_centroids]
+    if window_movements:
+        header["window_seconds"] = float(system.window_seconds)
+        header["window_step"] = float(system.window_step)
+        header["window_centroid_movements"] = window_movements
+        arrays.append(("window_centroids", np.array([window_centroids[movement] for movement in window_movements],
+                                                    dtype=np.float64).reshape(len(window_movements), width)))
+
+    model = getattr(system, "classification_model", None)
+    if include_forest and model is not None:
+        scaler, forest = model[0], model[-1]
+        header["classes"] = [str(label) for label in forest.classes_]
+        arrays += [("scaler_mean", np.asarray(scaler.mean_, dtype=np.float64)),
+                   ("scaler_scale", np.asarray(scaler.scale_, dtype=np.float64))]
+        arrays += _flatten_forest(forest)
+    return write_array_file(path, MAGIC, header, arrays)
+
+
+class MovementModel:
+    """
+    Modelo de inferencia cargado de un .mmod: califica contra los centroides y,
+    si el archivo lo incluye, clasifica recorriendo los árboles con NumPy.
+    Tiene la misma interfaz que usa Game de MovementEvaluationSystem
+    (sensors, extract_features, clean_data, scorer), sin sklearn, joblib ni pickle.
+    """
+
+    def __init__(self, header, arrays):
+        self.header = header
+        self.movements = header["movements"]
+        self.sensors = header["sensors"]
+        self.features = header["features"]
+        self.feature_set = header.get("feature_set", "basic")  # Los .mmod anteriores son "basic"
+        self.thresholds = np.asarray(header["thresholds"], dtype=np.float64)
+        self.labels = header["labels"]
+        self.classes = np.asarray(header["classes"], dtype=object)
+        self.arrays = arrays
+        self.centroids = dict(zip(header["centroid_movements"], arrays["centroids"]))
+        # Los .mmod anteriores no tienen centroides por ventana
+        self.exemplar_labels = header.get("exemplar_labels", [])
+        self.window_seconds = header.get("window_seconds")
+        self.window_step = header.get("window_step", self.window_seconds)
+        self.window_centroids = dict(zip(header.get("window_centroid_movements", []),
+                                         arrays.get("window_centroids", [])))
+        self._warned_no_windows = False
+        self._validate()
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH, mmap=True):
+        """Carga y valida un .mmod; con mmap=True los arreglos se mapean en memoria."""
+        header = read_array_header(path, MAGIC)
+        if header.get("schema") != SCHEMA or header.get("version") != VERSION:
+            raise ValueError(f"Modelo no soportado en {path}: {header.get('schema')} v{header.get('version')}")
+        if header.get("feature_version") != FEATURE_VERSION:
+            raise ValueError(f"{path} se exportó con otras características "
+                             f"(versión {header.get('feature_version')}); vuelva a entrenar el modelo.")
+        return cls(header, read_arrays(path, header, mmap))
+
+    def _validate(self):
+        width = len(self.features)
+        if self.feature_set not in Frequency_Features.FEATURE_SETS:
+            raise ValueError(f"Conjunto de características desconocido: {self.feature_set}")
+        if width != Frequency_Features.feature_width(self.sensors, self.feature_set):
+            raise ValueError("La cantidad de características no coincide con los sensores del modelo.")
+        if self.arrays["centroids"].shape != (len(self.header["centroid_movements"]), width):
+            raise ValueError("Los centroides no tienen la forma esperada.")
+        if self.exemplar_labels and self.arrays["exemplars"].shape != (len(self.exemplar_labels), width):
+            raise ValueError("Los ejemplos para k-NN no tienen la forma esperada.")
+        if self.window_centroids and self.arrays["window_centroids"].shape != (len(self.window_centroids), width):
+            raise ValueError("Los centroides por ventana no tienen la forma esperada.")
+        if len(self.labels) != len(self.thresholds) + 1:
+            raise ValueError("Debe haber una etiqueta más que umbrales de calificación.")
+        if self.has_classifier:
+            missing = [name for name in ["scaler_mean", "scaler_scale"] + TREE_ARRAYS if name not in self.arrays]
+            if missing:
+                raise ValueError(f"Faltan arreglos del clasificador: {', '.join(missing)}")
+            if self.arrays["value"].shape[1] != len(self.classes):
+                raise ValueError("Las probabilidades de los árboles no coinciden con las clases.")
+
+    @property
+    def has_classifier(self):
+        return len(self.classes) > 0
+
+    def extract_features(self, df):
+        return Frequency_Features.extract_features(df, self.sensors, self.feature_set)
+
+    def clean_data(self, X):
+        """Limpia los datos reemplazando valores NaN e infinitos (igual que en el entrenamiento)."""
+        return np.nan_to_num(X, nan=0.0, posinf=1e10, neginf=-1e10)
+
+    def scorer(self, method="inverse_distance"):
+        return CentroidScorer(self.centroids, method)
+
+    def exemplar_index(self, method="inverse_distance", k=5):
+        """Índice k-NN sobre los ejemplos del modelo (None si no se exportaron); usa sklearn."""
+        if not self.exemplar_labels:
+            return None
+        return ExemplarIndex(self.arrays["exemplars"], self.exemplar_labels, method, k=k)
+
+    def grading_scorer(self, scoring="centroid", method="inverse_distance", k=5):
+        return grading_scorer(self, scoring, method, k)
+
+    def live_window_seconds(self):
+        return self.window_seconds
+
+    def live_scorer(self, method="inverse_distance"):
+        """Calificador en vivo contra los centroides por ventana, o None (ver MovementEvaluationSystem.live_scorer)."""
+        return live_scorer(self, method)
+
+    def rating(self, score):
+        """Etiqueta de calificación del juego para una similitud."""
+        return self.labels[int(np.searchsorted(self.thresholds, score, side="right"))]
+
+    def predict_proba(self, X):
+        """Probabilidad de cada clase (promedio de los árboles), como RandomForest.predict_proba."""
+        if not self.has_classifier:
+            raise ValueError("El modelo se exportó sin clasificador.")
+        a = self.arrays
+        X = (np.atleast_2d(np.asarray(X, dtype=np.float64)) - a["scaler_mean"]) / a["scaler_scale"]
+        # Los árboles de sklearn comparan en float32
+        X = X.astype(np.float32)
+        rows = np.arange(len(X))
+        offsets = a["tree_offsets"]
+        left, right, feature, threshold = a["children_left"], a["children_right"], a["feature"], a["threshold"]
+
+        proba = np.zeros((len(X), len(self.classes)))
+        for tree in range(len(offsets) - 1):
+            base = offsets[tree]
+            # Todas las filas bajan por el árbol a la vez, un nivel por iteración
+            node = np.zeros(len(X), dtype=np.int64)
+            active = left[base + node] != -1
+            while active.any():
+                current = base + node[active]
+                goes_left = X[rows[active], feature[current]] <= threshold[current]
+                node[active] = np.where(goes_left, left[current], right[current])
+                active = left[base + node] != -1
+            proba += a["value"][base + node]
+        return proba / (len(offsets) - 1)
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def predict_recording(self, df):
+        """
+        Movimiento de una grabación (DataFrame). Si el clasificador se entrenó
+        con ventanas, se promedian las probabilidades de las ventanas de la
+        grabación (las mismas entradas que en el entrenamiento). Un .mmod sin
+        ventanas clasifica la grabación completa, y lo avisa una vez.
+        """
+        X_file = self.clean_data(np.array(self.extract_features(df)))
+        if not self.window_seconds:
+            if not self._warned_no_windows:
+                print("El modelo no tiene ventanas de entrenamiento: se clasifica la grabación completa. "
+                      "Vuelva a entrenarlo con Training_Model.py.")
+                self._warned_no_windows = True
+            return self.predict(X_file)[0]
+        from Dataset_Loader import recording_arrays, window_features  # Arrastra pandas: solo si se usa
+
+        X_windows = self.clean_data(window_features(recording_arrays(df, self.sensors), len(self.sensors),
+                                                    self.window_seconds, self.window_step,
+                                                    feature_set=self.feature_set, sensors=self.sensors))
+        proba = average_window_proba(self.predict_proba, X_windows, np.zeros(len(X_windows), dtype=np.int64),
+                                     X_file)
+        return self.classes[np.argmax(proba, axis=1)][0]
+
+
+def load_model(path=DEFAULT_MODEL_PATH, mmap=True):
+    """Carga el modelo exportado, o None si el archivo no existe."""
+    if not os.path.exists(path):
+        return None
+    return MovementModel.load(path, mmap)
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+def pairwise_distances(X, C):
+    """Distancias euclidianas entre cada fila de X (n, d) y cada fila de C (m, d): matriz (n, m)."""
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    C = np.atleast_2d(np.asarray(C, dtype=np.float64))
+    return np.sqrt(((X[:, None, :] - C[None, :, :]) ** 2).sum(axis=2))
+
+
+def similarity_from_distance(distances, method="inverse_distance"):
+    """
+    Transforma distancias en similitudes (igual que compute_similarity):
+    - "inverse_distance": similarity = 1/(1 + distancia)
+    - "exp": similarity = exp(-distancia)
+    """
+    if method == "exp":
+        return np.exp(-distances)
+    return 1 / (1 + distances)
+
+
+def top_k(scores, names, k=1):
+    """
+    Los k mejores movimientos de cada fila de 'scores' (n, m).
+    Devuelve (nombres (n, k), similitudes (n, k)) en orden descendente.
+    """
+    k = min(k, scores.shape[1])
+    best = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.asarray(names, dtype=object)[best], np.take_along_axis(scores, best, axis=1)
+
+
+class CentroidScorer:
+    """
+    Califica muchas grabaciones contra todos los centroides con una sola
+    operación matricial, en lugar de un np.linalg.norm por par.
+    """
+
+    def __init__(self, centroids, method="inverse_distance"):
+        self.method = method
+        self.movements = [movement for movement, centroid in centroids.items() if centroid is not None]
+        self.centroids = np.array([centroids[movement] for movement in self.movements], dtype=np.float64)
+        self.width = self.centroids.shape[1] if self.movements else None
+
+    def score(self, X):
+        """Matriz de similitudes (n grabaciones, m movimientos)."""
+        if not self.movements:
+            return np.zeros((len(np.atleast_2d(X)), 0))
+        return similarity_from_distance(pairwise_distances(X, self.centroids), self.method)
+
+    def score_movement(self, X, movement):
+        """Similitud de cada grabación con el centroide de 'movement' (0 si no hay centroide)."""
+        X = np.atleast_2d(X)
+        if movement not in self.movements:
+            return np.zeros(len(X))
+        centroid = self.centroids[self.movements.index(movement)]
+        return similarity_from_distance(pairwise_distances(X, centroid)[:, 0], self.method)
+
+    def top_k(self, X, k=1):
+        return top_k(self.score(X), self.movements, k)
+
+
+class ExemplarIndex:
+    """
+    Índice (KD-tree) sobre las características de cada grabación de
+    entrenamiento para calificar por vecinos más cercanos (k-NN). La similitud
+    de un movimiento es la del vecino más cercano de ese movimiento entre los k
+    encontrados (0 si ninguno de los k pertenece al movimiento). Tiene la
+    misma interfaz que CentroidScorer (score, score_movement, top_k).
+    """
+
+    def __init__(self, features, labels, method="inverse_distance", leaf_size=40, k=5):
+        from sklearn.neighbors import KDTree  # Solo se necesita si se usa el índice
+
+        self.method = method
+        self.features = np.asarray(features, dtype=np.float64)
+        self.labels = np.asarray(labels, dtype=object)
+        self.movements = list(dict.fromkeys(self.labels))
+        self.k = k  # Vecinos por defecto
+        self.tree = KDTree(self.features, leaf_size=leaf_size)
+
+    def query(self, X, k=None):
+        """Distancias (n, k) y etiquetas (n, k) de los k ejemplos más cercanos."""
+        k = min(self.k if k is None else k, len(self.features))
+        distances, indices = self.tree.query(np.atleast_2d(X), k=k)
+        return distances, self.labels[indices]
+
+    def score(self, X, k=None):
+        """Matriz de similitudes (n grabaciones, m movimientos) según los k vecinos."""
+        distances, labels = self.query(X, k)
+        similarities = similarity_from_distance(distances, self.method)
+        scores = np.zeros((len(distances), len(self.movements)))
+        # Los vecinos vienen ordenados por distancia: el primero de cada movimiento es el mejor
+        for column, movement in enumerate(self.movements):
+            scores[:, column] = np.where(labels == movement, similarities, 0).max(axis=1)
+        return scores
+
+    def score_movement(self, X, movement, k=None):
+        """Similitud de cada grabación con 'movement' según los k vecinos (0 si no hay ejemplos)."""
+        if movement not in self.movements:
+            return np.zeros(len(np.atleast_2d(X)))
+        return self.score(X, k)[:, self.movements.index(movement)]
+
+    def top_k(self, X, k=1, neighbors=None):
+        return top_k(self.score(X, neighbors), self.movements, k)
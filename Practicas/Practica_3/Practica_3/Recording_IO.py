@@ -0,0 +1,217 @@
+import argparse
+import os
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+
+from Array_File import encode_array_file, read_array_header, read_arrays, write_array_file
+from Metrics import metrics
+from Sensor_Buffer import COLUMNS, VALUE_COLUMNS
+
+# Formato binario columnar de las grabaciones (.rec):
+#   b"SREC" + longitud del encabezado (uint32 LE) + encabezado JSON, y después
+#   cada columna como arreglo crudo alineado a 64 bytes (memory-mappable).
+#   timestamp en float64 (segundos), sensor como códigos uint8 y x, y, z, w,
+#   accuracy en float32 (la precisión con la que los entrega Android).
+MAGIC = b"SREC"
+VERSION = 1
+BINARY_EXTENSION = ".rec"
+CSV_EXTENSION = ".csv"
+RECORDING_EXTENSIONS = (BINARY_EXTENSION, CSV_EXTENSION)
+
+
+def recording_columns(df):
+    """Encabezado y columnas .rec de una grabación (DataFrame con las columnas de los CSV)."""
+    sensors, codes = [], np.empty(0, dtype=np.uint8)
+    if len(df):
+        codes, uniques = pd.factorize(df["sensor"])
+        sensors = [str(sensor) for sensor in uniques]
+        codes = codes.astype(np.uint8)
+    columns = [("timestamp", np.asarray(df["timestamp"], dtype="<f8")), ("sensor", codes)]
+    columns += [(column, np.asarray(df[column], dtype="<f4")) for column in VALUE_COLUMNS]
+    header = {"version": VERSION, "rows": len(df), "sensors": sensors}
+    return header, columns
+
+
+def encode_recording(df):
+    """Bytes de la grabación en formato .rec (para guardarla dentro de otro archivo)."""
+    return encode_array_file(MAGIC, *recording_columns(df))
+
+
+def save_recording(df, path):
+    """Guarda una grabación (DataFrame con las columnas de los CSV) en formato .rec."""
+    return write_array_file(path, MAGIC, *recording_columns(df))
+
+
+def read_header(path, base=0):
+    """Lee el encabezado JSON de un archivo .rec (o de una grabación guardada en 'base' de otro archivo)."""
+    header = read_array_header(path, MAGIC, base)
+    if header.get("version") != VERSION:
+        raise ValueError(f"Versión de formato no soportada en {path}: {header.get('version')}")
+    return header
+
+
+def load_columns(path, mmap=True, base=0):
+    """
+    Devuelve (encabezado, {columna: arreglo}) de un archivo .rec. Con mmap=True
+    las columnas se mapean en memoria en lugar de leerse completas.
+    """
+    header = read_header(path, base)
+    return header, read_arrays(path, header, mmap, base)
+
+
+def load_binary_recording(path, value_dtype=np.float64, base=0):
+    """Carga un archivo .rec como DataFrame con las mismas columnas que los CSV."""
+    header, columns = load_columns(path, mmap=False, base=base)
+    data = {"timestamp": columns["timestamp"],
+            "sensor": pd.Categorical.from_codes(columns["sensor"].astype(np.int16), header["sensors"])}
+    for column in VALUE_COLUMNS:
+        data[column] = columns[column].astype(value_dtype)
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def binary_path(path):
+    """Ruta del .rec equivalente a un CSV (o a cualquier grabación)."""
+    return os.path.splitext(path)[0] + BINARY_EXTENSION
+
+
+def binary_is_current(rec_path, csv_path):
+    """True si el .rec existe y no es más viejo que el CSV (o no hay CSV)."""
+    return os.path.exists(rec_path) and (not os.path.exists(csv_path) or
+                                         os.path.getmtime(rec_path) >= os.path.getmtime(csv_path))
+
+
+def load_recording(path):
+    """
+    Cargador común de grabaciones para Training_Model, Game y Display_Graphs.
+    Usa el .rec si existe (y no es más viejo que el CSV); si no, lee el CSV.
+    Vale tanto para la ruta del CSV como para la del .rec.
+    """
+    stem = os.path.splitext(path)[0]
+    rec_path, csv_path = stem + BINARY_EXTENSION, stem + CSV_EXTENSION
+    if binary_is_current(rec_path, csv_path):
+        return load_binary_recording(rec_path)
+    return pd.read_csv(csv_path if os.path.exists(csv_path) else path)
+
+
+def list_recordings(folder):
+    """
+    Lista las grabaciones de una carpeta (sin subcarpetas), una ruta por
+    grabación: si existen el .csv y el .rec con el mismo nombre, se devuelve
+    el .rec, salvo que el CSV se haya modificado después de convertirlo.
+    """
+    recordings = {}
+    with metrics.timer("io.list_recordings"):
+        files = set(os.listdir(folder))
+        for file in sorted(files):
+            stem, extension = os.path.splitext(file)
+            if extension not in RECORDING_EXTENSIONS or stem in recordings:
+                continue
+            rec_path = os.path.join(folder, stem + BINARY_EXTENSION)
+            csv_path = os.path.join(folder, stem + CSV_EXTENSION)
+            if stem + BINARY_EXTENSION in files and binary_is_current(rec_path, csv_path):
+                recordings[stem] = rec_path
+            else:
+                recordings[stem] = csv_path if stem + CSV_EXTENSION in files else rec_path
+    return list(recordings.values())
+
+
+def write_recording(df, path_without_extension, fmt="csv"):
+    """Guarda la grabación en el formato indicado ('csv' o 'rec'); devuelve la ruta."""
+    if fmt == "rec":
+        return save_recording(df, path_without_extension + BINARY_EXTENSION)
+    path = path_without_extension + CSV_EXTENSION
+    df.to_csv(path, index=False)
+    return path
+
+
+def _write_file(df, path_without_extension, fmt):
+    folder = os.path.dirname(path_without_extension)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    return write_recording(df, path_without_extension, fmt)
+
+
+class RecordingWriter:
+    """
+    Escribe grabaciones en un hilo de fondo para que quien graba no espere al
+    disco. La cola es acotada: si el disco no da abasto, submit() se bloquea
+    (contrapresión) en lugar de acumular grabaciones en memoria.
+    """
+
+    def __init__(self, max_pending=8):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.last_written = None  # Ruta del último archivo guardado (o id del intento en un RecordingStore)
+
+    def _run(self):
+        while True:
+            write, args, name = self._queue.get()
+            try:
+                with metrics.timer("io.write_recording"):
+                    self.last_written = write(*args)
+                metrics.count("io.recordings_written")
+            except OSError as e:
+                print(f"Error al guardar {name}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _put(self, write, args, name):
+        metrics.observe("io.writer_queue_depth", self._queue.qsize())
+        self._queue.put((write, args, name))
+
+    def submit(self, df, path_without_extension, fmt="csv"):
+        """Encola una grabación para guardarla."""
+        self._put(_write_file, (df, path_without_extension, fmt), path_without_extension)
+
+    def submit_to_store(self, store, df, movement=None):
+        """Encola una grabación para agregarla como intento a un RecordingStore."""
+        self._put(store.append, (df, movement), store.folder)
+
+    def pending(self):
+        """Grabaciones encoladas que aún no se escribieron."""
+        return self._queue.qsize()
+
+    def flush(self):
+        """Espera a que se escriban todas las grabaciones pendientes."""
+        self._queue.join()
+
+
+def convert_tree(root, remove_csv=False, force=False):
+    """Convierte todos los CSV bajo 'root' a .rec; devuelve cuántos se convirtieron."""
+    converted = 0
+    for folder, _, files in os.walk(root):
+        for file in files:
+            if not file.endswith(CSV_EXTENSION):
+                continue
+            csv_path = os.path.join(folder, file)
+            rec_path = binary_path(csv_path)
+            if force or not os.path.exists(rec_path) or os.path.getmtime(rec_path) < os.path.getmtime(csv_path):
+                save_recording(pd.read_csv(csv_path), rec_path)
+                converted += 1
+            if remove_csv:
+                os.remove(csv_path)
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convierte grabaciones CSV al formato binario .rec.")
+    parser.add_argument("folders", nargs="*", default=["datos", "test", "temp_data"],
+                        help="Carpetas a convertir (recursivamente)")
+    parser.add_argument("--remove-csv", action="store_true", help="Borrar los CSV después de convertirlos")
+    parser.add_argument("--force", action="store_true", help="Reconvertir aunque el .rec esté al día")
+    args = parser.parse_args()
+
+    for folder in args.folders:
+        if not os.path.exists(folder):
+            print(f"La carpeta '{folder}' no existe.")
+            continue
+        converted = convert_tree(folder, remove_csv=args.remove_csv, force=args.force)
+        print(f"{folder}: {converted} archivo(s) convertido(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from Array_File import ALIGN
+from Recording_IO import encode_recording, list_recordings, load_binary_recording, load_recording, write_recording
+
+# Los intentos se agregan a archivos de segmento (segment_000001.seg, ...): cada
+# intento es una grabación .rec completa (ver Recording_IO) en una posición
+# múltiplo de 64 bytes. index.sqlite guarda por intento su id, movimiento,
+# inicio/fin, segmento, offset y largo. Al llenarse un segmento se abre el
+# siguiente. La retención (edad y tamaño total) y la compactación se aplican al
+# abrir el almacén, al cerrar un segmento y cada MAINTENANCE_SECONDS de uso.
+SEGMENT_PATTERN = re.compile(r"segment_(\d+)\.seg$")
+INDEX_NAME = "index.sqlite"
+
+SEGMENT_BYTES = 4 * 2 ** 20  # ~150 intentos de 5 segundos por segmento
+MAX_BYTES = 64 * 2 ** 20  # Tamaño máximo de los intentos guardados
+MAX_AGE_DAYS = 30
+MIN_LIVE_RATIO = 0.5  # Un segmento cerrado con menos de esta fracción de datos vivos se compacta
+MAINTENANCE_SECONDS = 3600  # Un almacén con pocos intentos no cierra segmentos: se mantiene por tiempo
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class RecordingStore:
+    """
+    Almacén de intentos del juego en una carpeta (por defecto temp_data): en
+    lugar de un CSV por intento, segmentos de tamaño fijo que solo crecen al
+    final y un índice SQLite. Buscar el último intento (o uno por id) es una
+    consulta por clave primaria, sin listar ni ordenar archivos, y la
+    retención mantiene acotados el espacio en disco y la cantidad de archivos.
+    Se puede usar desde varios hilos (por ejemplo, el RecordingWriter y la interfaz).
+    """
+
+    def __init__(self, folder="temp_data", segment_bytes=SEGMENT_BYTES, max_bytes=MAX_BYTES,
+                 max_age_days=MAX_AGE_DAYS, min_live_ratio=MIN_LIVE_RATIO):
+        self.folder = folder
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.min_live_ratio = min_live_ratio
+        self.lock = threading.RLock()
+        os.makedirs(folder, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(folder, INDEX_NAME), check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS attempts ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, movement TEXT, start REAL, end REAL, rows INTEGER, "
+            "segment INTEGER, offset INTEGER, length INTEGER, created REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS attempts_movement ON attempts (movement, id)")
+        self.connection.commit()
+        segments = self.segments()
+        self.current = segments[-1] if segments else 1
+        self.current_size = self._segment_size(self.current)
+        self.maintain()
+
+    # --- Segmentos ---
+
+    def segment_path(self, segment):
+        return os.path.join(self.folder, f"segment_{segment:06d}.seg")
+
+    def segments(self):
+        """Números de los segmentos existentes, en orden."""
+        return sorted(int(match.group(1)) for match in map(SEGMENT_PATTERN.match, os.listdir(self.folder)) if match)
+
+    def _segment_size(self, segment):
+        path = self.segment_path(segment)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _write_blob(self, blob):
+        """Agrega un bloque al segmento actual (abriendo uno nuevo si no cabe); devuelve (segmento, offset, abrió)."""
+        rolled = False
+        if self.current_size > 0 and _aligned(self.current_size) + len(blob) > self.segment_bytes:
+            self.current += 1
+            self.current_size = 0
+            rolled = True
+        offset = _aligned(self.current_size)
+        with open(self.segment_path(self.current), "ab") as f:
+            f.write(b"\0" * (offset - self.current_size) + blob)
+            f.flush()
+            os.fsync(f.fileno())  # Los datos llegan al disco antes que su entrada en el índice
+        self.current_size = offset + len(blob)
+        return self.current, offset, rolled
+
+    # --- Intentos ---
+
+    def append(self, df, movement=None, created=None):
+        """
+        Guarda una grabación (DataFrame con las columnas de los CSV) como un
+        intento nuevo y devuelve su id. Al cerrar un segmento, o si pasaron
+        MAINTENANCE_SECONDS desde la última vez, aplica la retención y la
+        compactación (ver maintain).
+        """
+        blob = encode_recording(df)
+        timestamps = np.asarray(df["timestamp"], dtype=np.float64) if len(df) else np.empty(0)
+        start = float(np.nanmin(timestamps)) if np.isfinite(timestamps).any() else None
+        end = float(np.nanmax(timestamps)) if np.isfinite(timestamps).any() else None
+        with self.lock:
+            segment, offset, rolled = self._write_blob(blob)
+            cursor = self.connection.execute(
+                "INSERT INTO attempts (movement, start, end, rows, segment, offset, length, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (movement, start, end, len(df), segment, offset, len(blob),
+                 time.time() if created is None else created))
+            self.connection.commit()
+            if rolled or time.time() - self.last_maintenance > MAINTENANCE_SECONDS:
+                self.maintain()
+            return cursor.lastrowid
+
+    _COLUMNS = ["id", "movement", "start", "end", "rows", "segment", "offset", "length", "created"]
+
+    def _rows(self, query, args=()):
+        with self.lock:
+            rows = self.connection.execute(f"SELECT {', '.join(self._COLUMNS)} FROM attempts {query}", args)
+            return [dict(zip(self._COLUMNS, row)) for row in rows]
+
+    def get(self, attempt_id):
+        """Entrada del índice de un intento, o None si no existe (o ya se borró)."""
+        rows = self._rows("WHERE id = ?", (attempt_id,))
+        return rows[0] if rows else None
+
+    def latest(self, movement=None):
+        """Entrada del último intento (de un movimiento, si se indica), o None."""
+        if movement is None:
+            rows = self._rows("ORDER BY id DESC LIMIT 1")
+        else:
+            rows = self._rows("WHERE movement = ? ORDER BY id DESC LIMIT 1", (movement,))
+        return rows[0] if rows else None
+
+    def attempts(self, movement=None):
+        """Entradas de todos los intentos (de un movimiento, si se indica), del más viejo al más nuevo."""
+        if movement is None:
+            return self._rows("ORDER BY id")
+        return self._rows("WHERE movement = ? ORDER BY id", (movement,))
+
+    def load(self, attempt_id=None):
+        """Carga un intento (por defecto, el último) como DataFrame, o None si no existe."""
+        # Búsqueda y lectura bajo el mismo candado: que la compactación no lo mueva entre ambas
+        with self.lock:
+            entry = self.latest() if attempt_id is None else self.get(attempt_id)
+            if entry is None:
+                return None
+            return load_binary_recording(self.segment_path(entry["segment"]), base=entry["offset"])
+
+    def delete(self, attempt_id):
+        """Quita un intento del índice; su espacio se recupera al compactar."""
+        with self.lock:
+            self.connection.execute("DELETE FROM attempts WHERE id = ?", (attempt_id,))
+            self.connection.commit()
+
+    # --- Retención y compactación ---
+
+    def enforce_retention(self, now=None):
+        """
+        Borra del índice los intentos más viejos que max_age_days y, si los
+        que quedan superan max_bytes, los más viejos hasta que entren.
+        Devuelve cuántos se borraron.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            removed = self.connection.execute("DELETE FROM attempts WHERE created < ?",
+                                              (now - self.max_age_days * 86400,)).rowcount
+            ids, lengths = [], []
+            for attempt_id, length in self.connection.execute("SELECT id, length FROM attempts ORDER BY id DESC"):
+                ids.append(attempt_id)
+                lengths.append(length)
+            # Se conservan los más nuevos mientras entren en max_bytes
+            keep = int(np.searchsorted(np.cumsum(lengths), self.max_bytes, side="right"))
+            if keep < len(ids):
+                removed += self.connection.execute("DELETE FROM attempts WHERE id <= ?", (ids[keep],)).rowcount
+            self.connection.commit()
+            return removed
+
+    def compact(self):
+        """
+        Borra los segmentos cerrados sin intentos y reescribe al final del
+        segmento actual los intentos de los que tienen menos de min_live_ratio
+        de datos vivos. Devuelve cuántos segmentos se eliminaron.
+        """
+        removed = 0
+        with self.lock:
+            for segment in self.segments():
+                if segment == self.current:
+                    continue
+                path = self.segment_path(segment)
+                entries = self._rows("WHERE segment = ? ORDER BY id", (segment,))
+                live = sum(entry["length"] for entry in entries)
+                if entries and live >= self.min_live_ratio * os.path.getsize(path):
+                    continue
+                with open(path, "rb") as f:
+                    for entry in entries:
+                        f.seek(entry["offset"])
+                        new_segment, new_offset, _ = self._write_blob(f.read(entry["length"]))
+                        self.connection.execute("UPDATE attempts SET segment = ?, offset = ? WHERE id = ?",
+                                                (new_segment, new_offset, entry["id"]))
+                self.connection.commit()  # El índice apunta a la copia antes de borrar el original
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def maintain(self, now=None):
+        """Retención y compactación; devuelve (intentos borrados, segmentos eliminados)."""
+        with self.lock:
+            self.last_maintenance = time.time()
+            return self.enforce_retention(now), self.compact()
+
+    def stats(self):
+        with self.lock:
+            count, live = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM attempts").fetchone()
+            segments = self.segments()
+            disk = sum(self._segment_size(segment) for segment in segments)
+        return {"attempts": count, "segments": len(segments), "live_bytes": live, "segment_bytes": disk,
+                "index_bytes": os.path.getsize(os.path.join(self.folder, INDEX_NAME))}
+
+    def import_recordings(self, paths, movement=None, remove=False):
+        """
+        Agrega grabaciones sueltas (CSV o .rec, como los intentos viejos de
+        temp_data) en orden de modificación, conservando esa fecha para la
+        retención. Con remove=True se borran los archivos importados.
+        """
+        paths = sorted(paths, key=os.path.getmtime)
+        for path in paths:
+            self.append(load_recording(path), movement, created=os.path.getmtime(path))
+            if remove:
+                os.remove(path)
+        return len(paths)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Administra los intentos guardados del juego.")
+    parser.add_argument("--folder", default="temp_data", help="Carpeta del almacén")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Intentos, segmentos y espacio en disco")
+    listing = commands.add_parser("list", help="Lista los intentos")
+    listing.add_argument("--movement")
+    importing = commands.add_parser("import", help="Importa las grabaciones sueltas de la carpeta")
+    importing.add_argument("--remove", action="store_true", help="Borrar los archivos importados")
+    exporting = commands.add_parser("export", help="Guarda un intento como CSV o .rec")
+    exporting.add_argument("id", type=int)
+    exporting.add_argument("output", help="Ruta de salida sin extensión")
+    exporting.add_argument("--format", choices=["csv", "rec"], default="csv")
+    commands.add_parser("maintain", help="Aplica la retención y compacta los segmentos")
+    args = parser.parse_args()
+
+    store = RecordingStore(args.folder)
+    try:
+        if args.command == "stats":
+            for key, value in store.stats().items():
+                print(f"{key}: {value}")
+        elif args.command == "list":
+            for entry in store.attempts(args.movement):
+                print(f"{entry['id']:6d}  {entry['movement'] or '-':<14} {entry['rows']:6d} filas  "
+                      f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['created']))}")
+        elif args.command == "import":
+            imported = store.import_recordings(list_recordings(args.folder), remove=args.remove)
+            print(f"{imported} grabación(es) importada(s).")
+        elif args.command == "export":
+            df = store.load(args.id)
+            if df is None:
+                print(f"No existe el intento {args.id}.")
+            else:
+                print(f"Intento guardado en {write_recording(df, args.output, args.format)}.")
+        else:
+            removed, segments = store.maintain()
+            print(f"{removed} intento(s) borrado(s), {segments} segmento(s) eliminado(s).")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Dataset_Loader import MIN_PARALLEL_FILES, RecordingArrays, _chunks, read_recording_arrays
+from Feature_Extraction import AXES, FEATURES_PER_SENSOR, sensor_codes
+
+# Frecuencia de la grilla común (Hz): por encima de la de los sensores más rápidos (~25 Hz)
+RATE = 50.0
+
+# Huecos entre muestras consecutivas de un sensor más largos que esto quedan en NaN (segundos)
+MAX_GAP = 0.5
+
+METHODS = ["linear", "nearest", "previous"]
+
+
+class ResampledRecording:
+    """
+    Grabación alineada en una grilla uniforme: 'times' (segundos, float64) y
+    'data', una matriz densa float32 (tiempo, canal) con los canales
+    <sensor>.x, <sensor>.y, <sensor>.z en el orden de 'sensors'. Los instantes
+    sin datos de un sensor (antes de su primera muestra, después de la última
+    o dentro de un hueco) valen NaN.
+    """
+
+    def __init__(self, times, data, sensors, rate, path=None):
+        self.times = times
+        self.data = data
+        self.sensors = list(sensors)
+        self.rate = rate
+        self.path = path
+
+    @property
+    def channels(self):
+        return [f"{sensor}.{axis}" for sensor in self.sensors for axis in AXES]
+
+    def sensor(self, sensor):
+        """Vista (tiempo, 3) con x, y, z de un sensor (sin copiar)."""
+        index = self.sensors.index(sensor)
+        return self.data[:, index * len(AXES):(index + 1) * len(AXES)]
+
+    def windows(self, window_seconds, step_seconds):
+        """
+        Ventanas de 'window_seconds' cada 'step_seconds' como una vista
+        (ventanas, tiempo, canal) sobre 'data', sin copiar. Una grabación más
+        corta que la ventana no tiene ventanas completas.
+        """
+        length = int(round(window_seconds * self.rate))
+        step = max(1, int(round(step_seconds * self.rate)))
+        if len(self.data) < length:
+            return np.empty((0, length, self.data.shape[1]), dtype=self.data.dtype)
+        view = np.lib.stride_tricks.sliding_window_view(self.data, length, axis=0)[::step]
+        return view.transpose(0, 2, 1)  # sliding_window_view deja el tiempo al final
+
+    def to_dataframe(self):
+        """
+        La grilla en el formato largo de los CSV (timestamp, sensor, x, y, z, w,
+        accuracy), sin los instantes en NaN, para las funciones que esperan un DataFrame.
+        """
+        import pandas as pd
+
+        from Sensor_Buffer import COLUMNS
+
+        blocks = self.data.reshape(len(self.data), len(self.sensors), len(AXES))
+        valid = np.isfinite(blocks).all(axis=2)
+        time_index, sensor_index = np.nonzero(valid.T)[::-1]  # Agrupado por sensor, en orden temporal
+        df = pd.DataFrame({"timestamp": self.times[time_index],
+                           "sensor": np.asarray(self.sensors, dtype=object)[sensor_index]})
+        for i, axis in enumerate(AXES):
+            df[axis] = blocks[time_index, sensor_index, i].astype(np.float64)
+        df["w"] = np.nan
+        df["accuracy"] = np.nan
+        return df.sort_values("timestamp", kind="stable", ignore_index=True)[COLUMNS]
+
+    def __len__(self):
+        return len(self.times)
+
+
+def _resample_channel(timestamps, values, grid, method, max_gap):
+    """Remuestrea una serie (timestamps crecientes y únicos) en 'grid'; NaN fuera de rango y en huecos."""
+    right = np.searchsorted(timestamps, grid, side="right")  # Primera muestra posterior a cada instante
+    left = right - 1
+    inside = (left >= 0) & (grid <= timestamps[-1])
+    left_clipped = np.clip(left, 0, len(timestamps) - 1)
+    right_clipped = np.clip(right, 0, len(timestamps) - 1)
+    exact = inside & (timestamps[left_clipped] == grid)
+
+    if method == "linear":
+        result = np.column_stack([np.interp(grid, timestamps, column) for column in values.T])
+    elif method == "nearest":
+        closer_right = (timestamps[right_clipped] - grid) < (grid - timestamps[left_clipped])
+        result = values[np.where(closer_right, right_clipped, left_clipped)]
+    else:  # previous: se mantiene la última muestra (lo que vería un sistema en línea)
+        result = values[left_clipped]
+
+    valid = inside
+    if max_gap is not None:
+        gap = timestamps[right_clipped] - timestamps[left_clipped]
+        valid = valid & ((gap <= max_gap) | exact)
+    result[~valid] = np.nan
+    return result
+
+
+def resample_arrays(timestamps, codes, values, sensors, rate=RATE, method="linear", max_gap=MAX_GAP,
+                    start=None, end=None, path=None):
+    """
+    Alinea todos los sensores en una grilla uniforme de 'rate' Hz entre 'start'
+    y 'end' (por defecto, de la primera a la última muestra de cualquier
+    sensor). 'codes' es la posición del sensor de cada fila (-1 se ignora) y
+    'values' la matriz (filas, 3) con x, y, z. 'method' es "linear", "nearest"
+    o "previous"; con max_gap=None se interpola también a través de los huecos.
+    Devuelve un ResampledRecording.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método de remuestreo desconocido: {method}")
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    codes = np.asarray(codes, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    values = values.reshape(len(timestamps), -1)[:, :len(AXES)] if len(timestamps) else np.empty((0, len(AXES)))
+    used = (codes >= 0) & np.isfinite(timestamps) & np.isfinite(values).all(axis=1)
+
+    channels = len(sensors) * len(AXES)
+    if not used.any() and (start is None or end is None):
+        return ResampledRecording(np.empty(0), np.empty((0, channels), dtype=np.float32), sensors, rate, path)
+    start = timestamps[used].min() if start is None else start
+    end = timestamps[used].max() if end is None else end
+    grid = start + np.arange(int(np.floor((end - start) * rate + 1e-9)) + 1) / rate
+
+    data = np.full((len(grid), channels), np.nan, dtype=np.float32)
+    # Una sola ordenación para todos los sensores: por sensor y, dentro de cada uno, por tiempo
+    rows = np.flatnonzero(used)
+    rows = rows[np.lexsort((timestamps[rows], codes[rows]))]
+    bounds = np.searchsorted(codes[rows], np.arange(len(sensors) + 1))
+    for code in range(len(sensors)):
+        sensor_rows = rows[bounds[code]:bounds[code + 1]]
+        if len(sensor_rows) == 0:
+            continue
+        sensor_times = timestamps[sensor_rows]
+        first = np.r_[True, np.diff(sensor_times) > 0]  # Timestamps repetidos: queda la primera fila
+        data[:, code * len(AXES):(code + 1) * len(AXES)] = _resample_channel(
+            sensor_times[first], values[sensor_rows[first]], grid, method, max_gap)
+    return ResampledRecording(grid, data, sensors, rate, path)
+
+
+def resample_recording(recording, sensors, rate=RATE, method="linear", max_gap=MAX_GAP):
+    """
+    Remuestrea una grabación: un DataFrame con las columnas de los CSV o un
+    RecordingArrays (Dataset_Loader) leído con los mismos 'sensors'.
+    """
+    if isinstance(recording, RecordingArrays):
+        values = np.column_stack([recording.x, recording.y, recording.z])
+        return resample_arrays(recording.timestamps, recording.codes, values, sensors, rate, method, max_gap,
+                               path=recording.path)
+    values = np.column_stack([np.asarray(recording[axis], dtype=np.float64) for axis in AXES]) \
+        if len(recording) else np.empty((0, len(AXES)))
+    codes = sensor_codes(recording, sensors) if len(recording) else np.empty(0, dtype=np.int64)
+    return resample_arrays(np.asarray(recording["timestamp"], dtype=np.float64), codes, values, sensors,
+                           rate, method, max_gap)
+
+
+def _resample_chunk(args):
+    paths, sensors, rate, method, max_gap = args
+    return [resample_recording(read_recording_arrays(path, sensors), sensors, rate, method, max_gap)
+            for path in paths]
+
+
+def load_resampled(paths, sensors, rate=RATE, method="linear", max_gap=MAX_GAP, workers=None):
+    """Lee y remuestrea muchas grabaciones en un pool de procesos (como Dataset_Loader.load_recordings)."""
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    args = (sensors, rate, method, max_gap)
+    if workers == 1 or len(paths) < MIN_PARALLEL_FILES:
+        return _resample_chunk((paths, *args))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [recording for result in executor.map(_resample_chunk, _chunks(paths, workers, *args))
+                for recording in result]
+
+
+def resampled_features(data, sensor_count):
+    """
+    Las 7 características por sensor de Feature_Extraction (media x, y, z,
+    desviación x, y, z con ddof=1 y media de la magnitud) calculadas sobre la
+    grilla, ignorando NaN. 'data' es (tiempo, canal) o un lote de ventanas
+    (ventanas, tiempo, canal); el resultado es (7 * sensores,) o (ventanas, 7 * sensores).
+    Como todas las muestras pesan lo mismo en el tiempo, difieren de
+    extract_features cuando el muestreo original es irregular.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    blocks = data.reshape(*data.shape[:-1], sensor_count, len(AXES))  # (..., tiempo, sensor, eje)
+    valid = np.isfinite(blocks).all(axis=-1, keepdims=True)
+    count = valid.sum(axis=-3)
+    filled = np.where(valid, blocks, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=-3) / count
+        squares = np.where(valid, (blocks - np.expand_dims(mean, -3)) ** 2, 0.0).sum(axis=-3)
+        std = np.sqrt(squares / (count - 1))
+        magnitude = np.sqrt((filled ** 2).sum(axis=-1, keepdims=True)).sum(axis=-3) / count
+    std = np.where(count > 1, std, np.nan)
+    features = np.concatenate([mean, std, magnitude], axis=-1)  # (..., sensor, 7)
+    features = np.where(count > 0, features, 0.0)  # Sensor sin datos: ceros, como extract_features
+    return features.reshape(*features.shape[:-2], sensor_count * FEATURES_PER_SENSOR)
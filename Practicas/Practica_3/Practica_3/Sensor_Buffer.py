@@ -0,0 +1,261 @@
+import numpy as np
+import pandas as pd
+
+# Columnas de una grabación (mismo orden que los CSV de datos/ y test/)
+COLUMNS = ["timestamp", "sensor", "x", "y", "z", "w", "accuracy"]
+VALUE_COLUMNS = ["x", "y", "z", "w", "accuracy"]
+
+# Sensores del teléfono y sus frecuencias aproximadas (Hz) observadas en las grabaciones de datos/
+SENSOR_RATES = {"accel": 25, "gyro": 22, "gravity": 21, "lin_accel": 5, "rot_vector": 20}
+
+
+def decode_block(entries):
+    """
+    Decodifica un bloque 'data' del JSON del servidor de sensores
+    ([[timestamp_ms, [x, y, z, ...]], ...]) en (timestamps en segundos, valores (n, k)).
+    """
+    n = len(entries)
+    timestamps = np.fromiter((entry[0] for entry in entries), dtype=np.float64, count=n) / 1000
+    try:
+        values = np.array([entry[1] for entry in entries], dtype=np.float64)
+    except ValueError:
+        # Bloque con longitudes distintas: rellenar con NaN fila por fila
+        values = np.full((n, len(VALUE_COLUMNS)), np.nan)
+        for i, entry in enumerate(entries):
+            row = entry[1][:len(VALUE_COLUMNS)]
+            values[i, :len(row)] = row
+    return timestamps, values.reshape(n, -1)[:, :len(VALUE_COLUMNS)]
+
+
+class SensorBuffer:
+    """
+    Columnas NumPy preasignadas (timestamp, x, y, z, w, accuracy) para un sensor.
+    Crece duplicando su capacidad; si se indica max_samples funciona como buffer
+    circular y solo conserva las últimas max_samples muestras.
+    """
+
+    def __init__(self, capacity=1024, max_samples=None):
+        if max_samples is not None:
+            capacity = min(capacity, max_samples)
+        self.max_samples = max_samples
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._values = np.full((capacity, len(VALUE_COLUMNS)), np.nan, dtype=np.float64)
+        self._start = 0  # Posición de la muestra más antigua (modo circular)
+        self.size = 0
+
+    @property
+    def capacity(self):
+        return len(self._timestamps)
+
+    def _grow(self, needed):
+        """Duplica la capacidad hasta que quepan 'needed' muestras."""
+        capacity = max(self.capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        if self.max_samples is not None:
+            capacity = min(capacity, self.max_samples)
+        if capacity == self.capacity:
+            return
+        timestamps, values = self.arrays()
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._values = np.full((capacity, len(VALUE_COLUMNS)), np.nan, dtype=np.float64)
+        self._timestamps[:self.size] = timestamps
+        self._values[:self.size] = values
+        self._start = 0
+
+    def append(self, timestamps, values):
+        """
+        Agrega un bloque de muestras. 'values' es una matriz (n, k) con k <= 5;
+        las columnas que falten (w, accuracy) quedan como NaN.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        n = len(timestamps)
+        if n == 0:
+            return
+        if values.ndim == 1:
+            values = values.reshape(n, -1)
+
+        if self.max_samples is not None and n >= self.max_samples:
+            # El bloque por sí solo llena el buffer: solo importan sus últimas muestras
+            timestamps = timestamps[-self.max_samples:]
+            values = values[-self.max_samples:]
+            n = len(timestamps)
+            self._grow(n)
+            self._timestamps[:n] = timestamps
+            self._values[:n] = np.nan
+            self._values[:n, :values.shape[1]] = values
+            self._start = 0
+            self.size = n
+            return
+
+        self._grow(self.size + n)
+        capacity = self.capacity
+        if self.max_samples is not None and self.size + n > capacity:
+            # Descartar las muestras más antiguas para hacer espacio
+            overflow = self.size + n - capacity
+            self._start = (self._start + overflow) % capacity
+            self.size -= overflow
+
+        positions = (self._start + self.size + np.arange(n)) % capacity
+        self._timestamps[positions] = timestamps
+        self._values[positions] = np.nan
+        self._values[positions, :values.shape[1]] = values
+        self.size += n
+
+    def arrays(self):
+        """Devuelve (timestamps, values) en orden de llegada como copias."""
+        end = self._start + self.size
+        if end <= self.capacity:
+            return self._timestamps[self._start:end].copy(), self._values[self._start:end].copy()
+        wrap = end - self.capacity
+        timestamps = np.concatenate([self._timestamps[self._start:], self._timestamps[:wrap]])
+        values = np.concatenate([self._values[self._start:], self._values[:wrap]])
+        return timestamps, values
+
+    def clear(self):
+        self._start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+
+class RecordingBuffer:
+    """Conjunto de SensorBuffer indexado por nombre de sensor."""
+
+    def __init__(self, capacity=1024, max_samples=None):
+        self.capacity = capacity
+        self.max_samples = max_samples
+        self.sensors = {}
+
+    def sensor(self, name):
+        """Devuelve el buffer del sensor, creándolo si es la primera muestra."""
+        buffer = self.sensors.get(name)
+        if buffer is None:
+            buffer = SensorBuffer(self.capacity, self.max_samples)
+            self.sensors[name] = buffer
+        return buffer
+
+    def append(self, sensor, timestamps, values):
+        self.sensor(sensor).append(timestamps, values)
+
+    def append_json(self, sensor, entries):
+        """
+        Decodifica un bloque 'data' del JSON del servidor de sensores
+        ([[timestamp_ms, [x, y, z, ...]], ...]) directamente en el buffer.
+        """
+        if not entries:
+            return
+        self.append(sensor, *decode_block(entries))
+
+    def snapshot(self):
+        """Copia de las columnas de cada sensor: {sensor: (timestamps, values)}."""
+        return {name: buffer.arrays() for name, buffer in self.sensors.items()}
+
+    def to_dataframe(self):
+        """Construye el DataFrame de la grabación con las columnas de los CSV."""
+        frames = []
+        for name, (timestamps, values) in self.snapshot().items():
+            if len(timestamps) == 0:
+                continue
+            frame = pd.DataFrame(values, columns=VALUE_COLUMNS)
+            frame.insert(0, "sensor", name)
+            frame.insert(0, "timestamp", timestamps)
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=COLUMNS)
+        return pd.concat(frames, ignore_index=True)[COLUMNS]
+
+    def clear(self):
+        self.sensors = {}
+
+    def __len__(self):
+        return sum(len(buffer) for buffer in self.sensors.values())
+
+
+def duplicate_mask(sensors, timestamps):
+    """
+    Marca (vectorizado) las muestras repetidas por (sensor, timestamp),
+    conservando la primera aparición en el orden original.
+    """
+    codes, _ = pd.factorize(np.asarray(sensors))
+    timestamps = np.asarray(timestamps)
+    duplicated = np.zeros(len(timestamps), dtype=bool)
+    if len(timestamps) < 2:
+        return duplicated
+    order = np.lexsort((timestamps, codes))  # Orden estable: la primera aparición va antes
+    same = (codes[order[1:]] == codes[order[:-1]]) & (timestamps[order[1:]] == timestamps[order[:-1]])
+    duplicated[order[1:][same]] = True
+    return duplicated
+
+
+def drop_duplicate_samples(df):
+    """Elimina las filas repetidas por (sensor, timestamp) de una grabación completa."""
+    return df[~duplicate_mask(df["sensor"], df["timestamp"])]
+
+
+class SensorWatermark:
+    """
+    Deduplicación acotada para un sensor: marca de agua (el timestamp más alto
+    aceptado) y una ventana con los últimos 'window' timestamps aceptados para
+    admitir muestras que lleguen fuera de orden. La memoria es O(window).
+    """
+
+    def __init__(self, window=512):
+        self.window = window
+        self._recent = np.empty(0, dtype=np.float64)  # Ordenado ascendentemente
+
+    @property
+    def high_water(self):
+        return self._recent[-1] if len(self._recent) else -np.inf
+
+    def filter(self, timestamps):
+        """Devuelve la máscara de muestras nuevas del bloque y las registra."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        keep = timestamps > self.high_water
+        if not keep.all() and len(self._recent):
+            # Candidatas fuera de orden: solo las que caen dentro de la ventana
+            floor = self._recent[0] if len(self._recent) >= self.window else -np.inf
+            late = ~keep & (timestamps > floor)
+            if late.any():
+                late[late] = ~np.isin(timestamps[late], self._recent)
+                keep |= late
+
+        # Repetidas dentro del mismo bloque
+        candidates = np.flatnonzero(keep)
+        _, first = np.unique(timestamps[candidates], return_index=True)
+        if len(first) != len(candidates):
+            keep[:] = False
+            keep[candidates[first]] = True
+
+        if keep.any():
+            recent = np.concatenate([self._recent, timestamps[keep]])
+            recent.sort()
+            self._recent = recent[-self.window:]
+        return keep
+
+    def reset(self):
+        self._recent = np.empty(0, dtype=np.float64)
+
+
+class SampleDeduplicator:
+    """Deduplicación por (sensor, timestamp) con un SensorWatermark por sensor."""
+
+    def __init__(self, window=512):
+        self.window = window
+        self.sensors = {}
+
+    def filter(self, sensor, timestamps):
+        watermark = self.sensors.get(sensor)
+        if watermark is None:
+            watermark = SensorWatermark(self.window)
+            self.sensors[sensor] = watermark
+        return watermark.filter(timestamps)
+
+    def high_water(self, sensor):
+        watermark = self.sensors.get(sensor)
+        return watermark.high_water if watermark is not None else -np.inf
+
+    def reset(self):
+        self.sensors = {}
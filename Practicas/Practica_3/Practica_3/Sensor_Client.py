@@ -0,0 +1,106 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class PollScheduler:
+    """
+    Intervalo de sondeo adaptativo. Se ajusta con la tasa de muestras y el
+    tamaño de las respuestas observadas para que cada consulta traiga un
+    bloque pequeño (baja latencia) sin saturar al servidor de sensores.
+    Empieza en min_interval y solo se alarga cuando las tasas observadas lo
+    permiten sin pasar de target_samples ni de target_bytes por consulta.
+    Tras un error se aplica un retroceso exponencial.
+    """
+
+    def __init__(self, min_interval=0.1, max_interval=1.0, target_samples=16,
+                 target_bytes=32 * 1024, max_backoff=8.0, smoothing=0.3):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_samples = target_samples
+        self.target_bytes = target_bytes
+        self.max_backoff = max_backoff
+        self.smoothing = smoothing
+        self.interval = min_interval
+        self.sample_rate = None  # Muestras por segundo (promedio exponencial)
+        self.byte_rate = None  # Bytes por segundo (promedio exponencial)
+        self.failures = 0
+        self._last_poll = None
+
+    def _smooth(self, previous, value):
+        if previous is None:
+            return value
+        return previous + self.smoothing * (value - previous)
+
+    def record_poll(self, samples, payload_bytes, now=None):
+        """Registra una consulta exitosa y recalcula el intervalo."""
+        now = time.monotonic() if now is None else now
+        self.failures = 0
+        if self._last_poll is not None:
+            elapsed = max(now - self._last_poll, 1e-3)
+            self.sample_rate = self._smooth(self.sample_rate, samples / elapsed)
+            self.byte_rate = self._smooth(self.byte_rate, payload_bytes / elapsed)
+        self._last_poll = now
+        if self.sample_rate is None:
+            return self.interval  # Primera consulta: aún no hay tasas, se sigue en min_interval
+
+        interval = self.max_interval
+        if self.sample_rate:
+            interval = min(interval, self.target_samples / self.sample_rate)
+        if self.byte_rate:
+            interval = min(interval, self.target_bytes / self.byte_rate)
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        return self.interval
+
+    def record_failure(self):
+        """Registra un error y devuelve el tiempo de espera con retroceso."""
+        self.failures += 1
+        self._last_poll = None
+        self.interval = min(self.max_interval * 2 ** (self.failures - 1), self.max_backoff)
+        return self.interval
+
+    def reset(self):
+        self.interval = self.min_interval
+        self.sample_rate = None
+        self.byte_rate = None
+        self.failures = 0
+        self._last_poll = None
+
+
+class SensorClient:
+    """
+    Cliente del servidor de sensores con una sesión HTTP persistente
+    (keep-alive), timeouts y reintentos. En modo incremental pide solo las
+    muestras posteriores a la marca de agua con el parámetro 'from'.
+    """
+
+    def __init__(self, url, connect_timeout=1.0, read_timeout=2.0, retries=2,
+                 backoff_factor=0.1, incremental=True):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.incremental = incremental
+        self.last_payload_bytes = 0
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff_factor,
+                      status_forcelist=[500, 502, 503, 504], allowed_methods=["GET"])
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, since=None):
+        """
+        Obtiene el JSON de sensores. 'since' es la marca de agua en segundos;
+        si se indica (y el modo incremental está activo) solo se piden muestras nuevas.
+        """
+        params = None
+        if self.incremental and since is not None:
+            params = {"from": int(since * 1000)}
+        response = self.session.get(self.url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        self.last_payload_bytes = len(response.content)
+        return response.json()
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,64 @@
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from Metrics import metrics
+
+try:
+    import resource  # Solo existe en Unix
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb():
+    """Memoria residente máxima del proceso hasta ahora (MB), o None si no se puede medir."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo reporta en KB y macOS en bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class StageReport:
+    """
+    Tiempo y memoria de cada etapa de un proceso (por ejemplo el entrenamiento).
+    Por defecto la memoria es el pico de memoria residente del proceso al
+    terminar la etapa (sin costo). Con trace_memory=True se mide el pico de
+    cada etapa con tracemalloc, que es exacto pero hace más lento el código medido.
+    En ambos casos solo se cuenta el proceso actual, no los procesos del pool.
+    """
+
+    def __init__(self, trace_memory=False, prefix="stage"):
+        self.trace_memory = trace_memory
+        self.prefix = prefix  # Cada etapa se registra también en Metrics como "<prefix>.<etapa>"
+        self.stages = []  # [{"stage", "seconds", "memory_mb"}]
+
+    @contextmanager
+    def stage(self, name):
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {"stage": name, "seconds": time.perf_counter() - start}
+            if self.trace_memory:
+                entry["memory_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            else:
+                entry["memory_mb"] = peak_rss_mb()
+            if started_tracing:
+                tracemalloc.stop()
+            self.stages.append(entry)
+            metrics.observe(f"{self.prefix}.{name}", entry["seconds"])
+
+    def summary(self):
+        label = "memoria pico de la etapa" if self.trace_memory else "memoria residente máxima"
+        lines = []
+        for entry in self.stages:
+            memory = f", {label} {entry['memory_mb']:.1f} MB" if entry["memory_mb"] is not None else ""
+            lines.append(f"  {entry['stage']}: {entry['seconds']:.3f} s{memory}")
+        return "\n".join(lines)
@@ -0,0 +1,133 @@
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from Device_Collector import recording_filename
+from Recording_IO import write_recording
+from Sensor_Buffer import COLUMNS, SENSOR_RATES
+
+# Perfil de cada movimiento: frecuencia de repetición (Hz) y amplitud por eje de
+# accel (m/s²) y gyro (rad/s). Los demás sensores se derivan de estos.
+MOVEMENT_PROFILES = {
+    "Curl": {"frequency": 0.5, "accel": [0.5, 3.0, 1.5], "gyro": [2.5, 0.3, 0.4]},
+    "CrossoverArm": {"frequency": 0.4, "accel": [3.0, 0.8, 1.0], "gyro": [0.4, 0.6, 2.0]},
+    "Pendulum": {"frequency": 0.8, "accel": [1.0, 0.6, 0.4], "gyro": [0.8, 1.2, 0.2]},
+}
+GRAVITY = 9.81
+
+
+def _timestamps(rate, duration, start, rng):
+    """Instantes de muestreo a 'rate' Hz con la irregularidad (jitter) de Android."""
+    period = 1.0 / rate
+    n = max(1, int(duration * rate))
+    jitter = rng.normal(0, 0.1 * period, n)
+    return start + np.arange(n) * period + np.clip(jitter, -0.4 * period, 0.4 * period)
+
+
+def generate_samples(movement="Curl", duration=6.0, rates=None, seed=0, start=0.0, noise=0.2):
+    """
+    Genera las muestras de una grabación sintética: {sensor: (timestamps en
+    segundos, valores (n, 3) o (n, 5) para rot_vector)}. El resultado depende
+    solo de los argumentos (misma semilla, mismos datos).
+    """
+    profile = MOVEMENT_PROFILES[movement]
+    rates = SENSOR_RATES if rates is None else rates
+    rng = np.random.default_rng(seed)
+    # Cada repetición varía un poco en ritmo e intensidad
+    frequency = profile["frequency"] * rng.uniform(0.9, 1.1)
+    scale = rng.uniform(0.85, 1.15)
+    phase0 = rng.uniform(0, 2 * np.pi)
+
+    samples = {}
+    for sensor, rate in rates.items():
+        t = _timestamps(rate, duration, start, rng)
+        phase = 2 * np.pi * frequency * (t - start) + phase0
+        wave = np.stack([np.sin(phase), np.sin(phase + np.pi / 3), np.sin(2 * phase)], axis=1)
+        if sensor == "gyro":
+            values = wave * np.array(profile["gyro"]) * scale
+        elif sensor in ("accel", "lin_accel"):
+            values = wave * np.array(profile["accel"]) * scale
+            if sensor == "accel":
+                values[:, 2] += GRAVITY
+        elif sensor == "gravity":
+            tilt = 0.3 * np.sin(phase)
+            values = np.stack([GRAVITY * np.sin(tilt), np.zeros_like(tilt), GRAVITY * np.cos(tilt)], axis=1)
+        else:  # rot_vector: cuaternión (x, y, z, w) y precisión
+            half = 0.25 * np.sin(phase)
+            values = np.stack([np.sin(half), np.zeros_like(half), np.zeros_like(half), np.cos(half),
+                               np.zeros_like(half)], axis=1)
+        values = values + rng.normal(0, noise, values.shape) * (sensor != "rot_vector")
+        samples[sensor] = (t, values)
+    return samples
+
+
+def to_payload(samples):
+    """Convierte las muestras al formato de sensors.json: {sensor: {"data": [[ms, [valores]], ...]}}."""
+    return {sensor: {"unit": "", "data": [[int(round(ts * 1000)), [float(v) for v in row]]
+                                          for ts, row in zip(timestamps, values)]}
+            for sensor, (timestamps, values) in samples.items()}
+
+
+def generate_payload(movement="Curl", duration=1.0, rates=None, seed=0, start=0.0):
+    """Un payload de sensors.json con 'duration' segundos de muestras."""
+    return to_payload(generate_samples(movement, duration, rates, seed, start))
+
+
+def to_dataframe(samples):
+    """Convierte las muestras a un DataFrame con las columnas de los CSV, ordenado por tiempo."""
+    frames = []
+    for sensor, (timestamps, values) in samples.items():
+        frame = pd.DataFrame({"timestamp": timestamps, "sensor": sensor})
+        for i, column in enumerate(["x", "y", "z", "w", "accuracy"]):
+            frame[column] = values[:, i] if i < values.shape[1] else np.nan
+        frames.append(frame)
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values("timestamp", kind="stable", ignore_index=True)[COLUMNS]
+
+
+def generate_recording(movement="Curl", duration=6.0, rates=None, seed=0, start=0.0):
+    """Una grabación sintética como DataFrame (mismo formato que datos/)."""
+    return to_dataframe(generate_samples(movement, duration, rates, seed, start))
+
+
+def generate_dataset(folder, movements=None, recordings=10, duration=6.0, seed=0, fmt="csv"):
+    """
+    Escribe 'recordings' grabaciones por movimiento en folder/<movimiento>/ con
+    los nombres de siempre. Devuelve la lista de archivos creados.
+    """
+    movements = list(MOVEMENT_PROFILES) if movements is None else movements
+    base = datetime(2025, 1, 1)
+    paths = []
+    for m, movement in enumerate(movements):
+        movement_folder = os.path.join(folder, movement)
+        os.makedirs(movement_folder, exist_ok=True)
+        for i in range(recordings):
+            # Semilla distinta por grabación, pero reproducible
+            index = m * recordings + i
+            start_time = base + timedelta(seconds=index * (duration + 1))
+            df = generate_recording(movement, duration, seed=seed * 1_000_003 + index,
+                                    start=start_time.timestamp())
+            name = recording_filename(movement_folder, start_time, start_time + timedelta(seconds=duration))
+            paths.append(write_recording(df, name, fmt))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera grabaciones sintéticas con el formato de datos/.")
+    parser.add_argument("folder", help="Carpeta de salida (una subcarpeta por movimiento)")
+    parser.add_argument("--movements", nargs="+", default=list(MOVEMENT_PROFILES), choices=list(MOVEMENT_PROFILES))
+    parser.add_argument("--recordings", type=int, default=10, help="Grabaciones por movimiento")
+    parser.add_argument("--duration", type=float, default=6.0, help="Segundos por grabación")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "rec"], default="csv")
+    args = parser.parse_args()
+
+    paths = generate_dataset(args.folder, args.movements, args.recordings, args.duration, args.seed, args.format)
+    print(f"{len(paths)} grabación(es) generada(s) en {args.folder}.")
+
+
+if __name__ == "__main__":
+    main()
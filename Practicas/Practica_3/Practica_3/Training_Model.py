@@ -1,3 +1,4 @@
+import argparse
 import os
 import pandas as pd
 import numpy as np
@@ -7,27 +8,49 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import make_pipeline
 import joblib
 
+import Dataset_Loader
+import Feature_Extraction
+import Frequency_Features
+import Model_Artifact
+from Evaluation_Runner import EvaluationRunner, mixed_label, print_summary, write_report
+from Feature_Cache import FeatureCache
+from Movement_Scorer import CentroidScorer, ExemplarIndex
+from Metrics import metrics
+from Stage_Report import StageReport
+from Recording_IO import list_recordings, load_recording
+
 
 class MovementEvaluationSystem:
     def __init__(self, data_folder="datos", test_folder="test",
                  movements=["CrossoverArm", "Curl", "Pendulum"],
-                 sensors=["accel", "gyro"]):
+                 sensors=["accel", "gyro"], cache_path="feature_cache.sqlite",
+                 window_seconds=4.0, window_step=2.0, feature_set="basic"):
         self.data_folder = data_folder
         self.test_folder = test_folder
-        self.movements = movements
+        self.movements = list(movements)  # Copia: update() puede agregar movimientos
         self.sensors = sensors
+        self.cache_path = cache_path  # None desactiva la caché de características
+        # Ventanas para el clasificador (segundos); window_seconds=None usa una fila por movimiento
+        self.window_seconds = window_seconds
+        self.window_step = window_step
+        # "basic" (media, desviación y magnitud) o "extended" (más las de frecuencia, ver Frequency_Features)
+        Frequency_Features.check_feature_set(feature_set)
+        self.feature_set = feature_set
         self.classification_model = None
         self.centroids = {}
+        # Características de cada grabación de entrenamiento (para el índice k-NN)
+        self.exemplar_features = None
+        self.exemplar_labels = None
+        # Sumas y cantidades por movimiento para update() (ver reset_running_state)
+        self.trained_files = None
 
     def load_and_preprocess_data(self, folder):
-        """Carga y preprocesa los datos (concatenando archivos CSV) de un movimiento."""
+        """Carga y preprocesa los datos (concatenando grabaciones .rec o CSV) de un movimiento."""
         data = []
-        for file in os.listdir(folder):
-            if file.endswith(".csv"):
-                file_path = os.path.join(folder, file)
-                df = pd.read_csv(file_path)
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-                data.append(df)
+        for file_path in list_recordings(folder):
+            df = load_recording(file_path)
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+            data.append(df)
         if data:
             return pd.concat(data, ignore_index=True)
         else:
@@ -38,19 +61,74 @@ class MovementEvaluationSystem:
         Extrae características básicas (media, desviación, 'energía') para cada sensor.
         Se usan los ejes x, y, z para cada sensor definido.
         """
-        features = []
-        for sensor in self.sensors:
-            sensor_data = df[df['sensor'] == sensor]
-            if not sensor_data.empty:
-                features.extend([
-                    sensor_data['x'].mean(), sensor_data['y'].mean(), sensor_data['z'].mean(),
-                    sensor_data['x'].std(), sensor_data['y'].std(), sensor_data['z'].std(),
-                    np.sqrt((sensor_data['x'] ** 2 + sensor_data['y'] ** 2 + sensor_data['z'] ** 2)).mean(),
-                ])
-            else:
-                # Rellenar con ceros si no hay datos para el sensor
-                features.extend([0.0] * 7)
-        return features
+        # Una sola agrupación por sensor en NumPy (ver Feature_Extraction), con el
+        # mismo resultado que las reducciones de pandas por sensor
+        if self.current_feature_set() == "basic":
+            return Feature_Extraction.extract_features(df, self.sensors)
+        return Frequency_Features.extract_features(df, self.sensors, self.current_feature_set())
+
+    def current_feature_set(self):
+        """Conjunto de características (las instancias exportadas antes no tienen feature_set)."""
+        return getattr(self, "feature_set", "basic")
+
+    def feature_width(self):
+        return Frequency_Features.feature_width(self.sensors, self.current_feature_set())
+
+    def file_features(self, paths, workers=None):
+        """
+        Características de cada grabación en 'paths' y cantidad de filas por sensor.
+        Usa la caché en disco (Feature_Cache) y solo lee y procesa los archivos nuevos
+        o modificados. Devuelve (matriz de características, matriz de filas por sensor).
+        """
+        paths = list(paths)
+        sensor_count = len(self.sensors)
+        features = np.zeros((len(paths), self.feature_width()))
+        counts = np.zeros((len(paths), sensor_count), dtype=np.int64)
+
+        # Las instancias exportadas antes de la caché no tienen cache_path
+        cache_path = getattr(self, "cache_path", None)
+        cache = None
+        if cache_path:
+            cache = FeatureCache(cache_path, self.sensors, feature_set=self.current_feature_set())
+        try:
+            cached = cache.lookup(paths) if cache else {}
+            missing = [i for i, path in enumerate(paths) if path not in cached]
+            for i, path in enumerate(paths):
+                if path in cached:
+                    features[i], counts[i] = cached[path]
+
+            if missing:
+                recordings = Dataset_Loader.load_recordings([paths[i] for i in missing], self.sensors, workers)
+                arrays = Dataset_Loader.concatenate(recordings)
+                computed = Feature_Extraction.features_from_arrays(*arrays, len(recordings), sensor_count)
+                if self.current_feature_set() == "extended":
+                    # Todas las grabaciones nuevas por lotes en la grilla común (sin volver a leerlas)
+                    computed = np.hstack([computed,
+                                          Frequency_Features.recording_frequency_features(recordings, self.sensors)])
+                features[missing] = computed
+                counts[missing] = Feature_Extraction.sensor_counts(arrays[0], arrays[1], len(recordings), sensor_count)
+                if cache:
+                    cache.store([paths[i] for i in missing], features[missing], counts[missing])
+            if cache:
+                cache.evict()
+            metrics.count("train.feature_cache_hits", len(paths) - len(missing))
+            metrics.count("train.feature_cache_misses", len(missing))
+        finally:
+            if cache:
+                cache.close()
+        return features, counts
+
+    def extract_features_batch(self, recordings, recording_column="recording"):
+        """
+        Extrae las características de muchas grabaciones en una sola llamada
+        vectorizada: una lista de DataFrames o un DataFrame concatenado con una
+        columna que identifica cada grabación. Devuelve la matriz de características.
+        """
+        if self.current_feature_set() == "basic":
+            return Feature_Extraction.extract_features_batch(recordings, self.sensors, recording_column)
+        if not isinstance(recordings, list):
+            recordings = [df for _, df in recordings.groupby(recording_column, sort=False)]
+        return np.array([self.extract_features(df) for df in recordings]).reshape(len(recordings), -1)
 
     def clean_data(self, X):
         """Limpia los datos reemplazando valores NaN e infinitos."""
@@ -72,55 +150,268 @@ class MovementEvaluationSystem:
             similarity = 1 / (1 + distance)
         return similarity
 
-    def train(self):
+    def scorer(self, method="inverse_distance"):
+        """Calificador por lotes contra todos los centroides (ver Movement_Scorer)."""
+        return CentroidScorer(self.centroids, method)
+
+    def live_window_seconds(self):
+        """Duración de las ventanas de entrenamiento (None si no se usaron ventanas)."""
+        return getattr(self, "window_seconds", None)
+
+    def live_scorer(self, method="inverse_distance"):
+        """
+        Calificador para la retroalimentación en vivo: contra el promedio de las
+        ventanas de live_window_seconds() de cada movimiento, que están en la
+        misma escala que las características de una ventana deslizante de esa
+        duración. Sin ventanas devuelve None: los centroides de grabaciones
+        completas están en otra escala.
+        Solo usa las columnas básicas (ver Model_Artifact.live_scorer).
+        """
+        return Model_Artifact.live_scorer(self, method)
+
+    def exemplar_index(self, method="inverse_distance", k=5):
+        """Índice k-NN sobre las grabaciones de entrenamiento (None si no se guardaron)."""
+        if getattr(self, "exemplar_features", None) is None or not len(self.exemplar_features):
+            return None
+        return ExemplarIndex(self.exemplar_features, self.exemplar_labels, method, k=k)
+
+    def grading_scorer(self, scoring="centroid", method="inverse_distance", k=5):
+        """
+        Calificador según 'scoring': "centroid" (distancia al centroide de cada
+        movimiento) o "knn" (vecinos más cercanos entre las grabaciones de
+        entrenamiento, ver exemplar_index).
+        """
+        return Model_Artifact.grading_scorer(self, scoring, method, k)
+
+    def training_windows(self, paths, labels, workers=None):
+        """
+        Conjunto de entrenamiento por ventanas: cada grabación se divide en ventanas
+        superpuestas de 'window_seconds' que avanzan 'window_step' y cada ventana es
+        una fila. Devuelve (matriz de características, movimiento de cada fila).
+        """
+        X, recording = Dataset_Loader.load_window_features(paths, self.sensors, self.window_seconds,
+                                                           self.window_step, workers=workers,
+                                                           feature_set=self.current_feature_set())
+        y = np.asarray(self.movements, dtype=object)[np.asarray(labels, dtype=np.int64)[recording]]
+        return self.clean_data(X), y
+
+    def train(self, workers=None, n_jobs=-1, max_windows=None, max_samples=None):
         """
         Entrena el modelo de clasificación y calcula el centroide (promedio de las
         características) para cada movimiento usando los datos de la carpeta 'datos'.
+        'workers' es la cantidad de procesos para leer las grabaciones (por defecto,
+        uno por núcleo) y 'n_jobs' la de núcleos del RandomForest (-1: todos).
+        El clasificador se entrena con ventanas de cada grabación (ver
+        training_windows); con window_seconds=None, con una fila por movimiento.
+        'max_windows' limita las ventanas con un submuestreo estratificado y
+        'max_samples' la fracción de filas que usa cada árbol.
         """
-        X_classification = []
-        y_classification = []
-        X_evaluation = {movement: [] for movement in self.movements}
+        report = StageReport(prefix="train")
 
-        for movement in self.movements:
-            movement_folder = os.path.join(self.data_folder, movement)
-            movement_data = self.load_and_preprocess_data(movement_folder)
-            if movement_data.empty:
-                print(f"No se encontraron datos para {movement} en {self.data_folder}.")
-                continue
+        # Cada grabación se lee y parsea una sola vez (en paralelo y solo si no está
+        # en la caché); las características por movimiento se combinan a partir de
+        # las de cada archivo
+        with report.stage("características por archivo"):
+            paths, labels = Dataset_Loader.list_movement_files(self.data_folder, self.movements)
+            labels = np.array(labels, dtype=np.int64)
+            per_file, counts = self.file_features(paths, workers)
 
-            # Características globales para el modelo de clasificación
-            features = self.extract_features(movement_data)
-            X_classification.append(features)
-            y_classification.append(movement)
+        # Sumas y cantidades por movimiento: update() las extiende sin volver a leer todo
+        self.reset_running_state()
+        with report.stage("centroides"):
+            self.add_file_features(paths, labels, per_file, counts)
+            for movement in self.movements:
+                if self.centroid_counts.get(movement, 0) == 0:
+                    print(f"No se encontraron datos para {movement} en {self.data_folder}.")
 
-            # Características de cada archivo individual para evaluar similitud
-            for file in os.listdir(movement_folder):
-                if file.endswith(".csv"):
-                    file_path = os.path.join(movement_folder, file)
-                    df = pd.read_csv(file_path)
-                    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-                    features = self.extract_features(df)
-                    X_evaluation[movement].append(features)
-
-        X_classification = np.array(X_classification)
-        y_classification = np.array(y_classification)
-        X_classification = self.clean_data(X_classification)
+        with report.stage("ventanas" if self.window_seconds else "filas por movimiento"):
+            X_classification, y_classification = self.classifier_training_set(paths, labels, workers)
+            keep = Dataset_Loader.subsample(y_classification, max_windows)
+            X_classification, y_classification = X_classification[keep], y_classification[keep]
+        if self.window_seconds:
+            print(f"Ventanas de entrenamiento: {len(X_classification)}")
 
         print("Entrenando el modelo de clasificación...")
-        self.classification_model = make_pipeline(StandardScaler(),
-                                                  RandomForestClassifier(n_estimators=100, random_state=42))
-        self.classification_model.fit(X_classification, y_classification)
-
-        # Calcular el centroide (promedio) para cada movimiento
-        for movement in self.movements:
-            if X_evaluation[movement]:
-                X_eval = np.array(X_evaluation[movement])
-                X_eval = self.clean_data(X_eval)
-                self.centroids[movement] = np.mean(X_eval, axis=0)
-            else:
-                self.centroids[movement] = None
-                print(f"No hay datos de evaluación para {movement}.")
+        with report.stage("clasificador"):
+            self.fit_classifier(X_classification, y_classification, n_jobs, max_samples)
         print("Entrenamiento completado.")
+        print("Etapas del entrenamiento:\n" + report.summary())
+
+    def reset_running_state(self):
+        """Vacía las sumas y cantidades acumuladas por movimiento."""
+        self.centroid_sums = {}  # Suma de las características (limpias) de los archivos
+        self.centroid_counts = {}  # Cantidad de archivos
+        self.movement_features = {}  # Características combinadas de todas las filas del movimiento
+        self.movement_counts = {}  # Filas por sensor del movimiento
+        self.trained_files = set()  # Rutas ya incluidas, relativas a data_folder (ver trained_key)
+        self.window_features = None  # Ventanas con las que se entrenó el clasificador
+        self.window_labels = None
+        self.window_centroids = {}  # Promedio de las ventanas por movimiento (calificación en vivo)
+        self.centroids = {}
+        self.exemplar_features = np.zeros((0, self.feature_width()))
+        self.exemplar_labels = np.array([], dtype=object)
+
+    def add_file_features(self, paths, labels, per_file, counts):
+        """
+        Agrega las características de grabaciones (una fila por archivo; 'labels'
+        es el índice del movimiento) a las sumas por movimiento y recalcula los
+        centroides y los ejemplos del índice k-NN.
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        for index, movement in enumerate(self.movements):
+            files = np.flatnonzero(labels == index)
+            if counts[files].sum() == 0:
+                self.centroids.setdefault(movement, None)
+                continue
+
+            # Características de cada archivo individual para evaluar similitud
+            X_eval = self.clean_data(np.array(per_file[files]))
+            self.centroid_sums[movement] = self.centroid_sums.get(movement, 0) + X_eval.sum(axis=0)
+            self.centroid_counts[movement] = self.centroid_counts.get(movement, 0) + len(X_eval)
+            self.centroids[movement] = self.centroid_sums[movement] / self.centroid_counts[movement]
+            self.exemplar_features = np.concatenate([self.exemplar_features, X_eval])
+            self.exemplar_labels = np.concatenate([self.exemplar_labels, [movement] * len(X_eval)])
+
+            # Características globales (como si se concatenaran todas las filas)
+            previous = [self.movement_features[movement]] if movement in self.movement_features else []
+            previous_counts = [self.movement_counts[movement]] if movement in self.movement_counts else []
+            self.movement_counts[movement] = np.sum(previous_counts + list(counts[files]), axis=0)
+            self.movement_features[movement] = Frequency_Features.combine_feature_sets(
+                np.array(previous + list(per_file[files])), np.array(previous_counts + list(counts[files])),
+                self.sensors, self.current_feature_set())
+        self.trained_files.update(self.trained_key(path) for path in paths)
+
+    def trained_key(self, path):
+        """
+        Clave de una grabación en trained_files: su ruta relativa a data_folder
+        con "/", para que el sistema exportado sirva en otra carpeta o equipo.
+        """
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.data_folder)).replace(os.sep, "/")
+
+    def classifier_training_set(self, paths, labels, workers=None):
+        """
+        Filas para el clasificador: las ventanas de 'paths' agregadas a las ya
+        guardadas o, sin ventanas, una fila combinada por movimiento.
+        """
+        # Las instancias exportadas antes de las ventanas no tienen window_seconds
+        if getattr(self, "window_seconds", None):
+            X, y = self.training_windows(paths, labels, workers)
+            if self.window_features is not None:
+                X, y = np.concatenate([self.window_features, X]), np.concatenate([self.window_labels, y])
+            self.window_features, self.window_labels = X, y
+            self.window_centroids = {movement: X[y == movement].mean(axis=0)
+                                     for movement in self.movements if (y == movement).any()}
+            return X, y
+        movements = [movement for movement in self.movements if movement in self.movement_features]
+        X = self.clean_data(np.array([self.movement_features[movement] for movement in movements]))
+        return X, np.array(movements)
+
+    def classify_files(self, paths, X_files, workers=None):
+        """
+        Movimiento predicho de cada grabación de 'paths' ('X_files' son sus
+        características completas, ya limpias). Si el clasificador se entrenó
+        con ventanas, se clasifican las ventanas de cada grabación (las mismas
+        entradas que en el entrenamiento) y se promedian sus probabilidades.
+        """
+        model = self.classification_model
+        if not getattr(self, "window_seconds", None):
+            return np.asarray(model.predict(X_files))
+        X_windows, recording = Dataset_Loader.load_window_features(paths, self.sensors, self.window_seconds,
+                                                                   self.window_step, workers=workers,
+                                                                   feature_set=self.current_feature_set())
+        proba = Model_Artifact.average_window_proba(model.predict_proba, self.clean_data(X_windows), recording,
+                                                    X_files)
+        return np.asarray(model.classes_)[np.argmax(proba, axis=1)]
+
+    def fit_classifier(self, X, y, n_jobs=-1, max_samples=None):
+        self.classification_model = make_pipeline(
+            StandardScaler(),
+            RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs, max_samples=max_samples))
+        self.classification_model.fit(X, y)
+
+    def update(self, new_files, workers=None, n_jobs=-1, export=True):
+        """
+        Incorpora grabaciones nuevas sin reentrenar desde cero: solo se leen los
+        archivos nuevos, los centroides se actualizan con las sumas y cantidades
+        guardadas y el clasificador se reajusta con sus filas anteriores más las
+        nuevas. 'new_files' es una lista de rutas dentro de data_folder/<movimiento>
+        (el movimiento es el nombre de la carpeta, como en datos/Curl/...) o un
+        diccionario {movimiento: [rutas]}. Un movimiento nuevo solo se agrega con
+        el diccionario; una ruta fuera de data_folder/<movimiento conocido> es un
+        ValueError. Con export=True se reescriben los archivos exportados (de forma
+        atómica). Devuelve cuántos archivos se agregaron.
+        """
+        if isinstance(new_files, dict):
+            groups = new_files
+        else:
+            groups = {}
+            data_folder = os.path.abspath(self.data_folder)
+            for path in new_files:
+                folder = os.path.dirname(os.path.abspath(path))
+                movement = os.path.basename(folder)
+                if os.path.dirname(folder) != data_folder or movement not in self.movements:
+                    raise ValueError(f"{path} no está en {os.path.join(self.data_folder, '<movimiento>')} de un "
+                                     f"movimiento conocido; indique el movimiento explícitamente.")
+                groups.setdefault(movement, []).append(path)
+
+        if getattr(self, "trained_files", None) is None:
+            # Sin las grabaciones nuevas, aunque ya estén en data_folder: se agregan abajo
+            self.rebuild_running_state(workers, exclude=[path for files in groups.values() for path in files])
+
+        else:
+            # Las versiones anteriores guardaban rutas absolutas
+            self.trained_files = {self.trained_key(path) if os.path.isabs(path) else path
+                                  for path in self.trained_files}
+
+        paths, labels = [], []
+        for movement, files in groups.items():
+            files = [path for path in files if self.trained_key(path) not in self.trained_files]
+            if not files:
+                continue
+            if movement not in self.movements:
+                print(f"Nuevo movimiento: {movement}")
+                self.movements.append(movement)
+            paths.extend(files)
+            labels.extend([self.movements.index(movement)] * len(files))
+        if not paths:
+            print("No hay grabaciones nuevas.")
+            return 0
+
+        report = StageReport(prefix="update")
+        with report.stage("características por archivo"):
+            per_file, counts = self.file_features(paths, workers)
+        with report.stage("centroides"):
+            self.add_file_features(paths, labels, per_file, counts)
+        with report.stage("ventanas" if self.window_seconds else "filas por movimiento"):
+            X, y = self.classifier_training_set(paths, labels, workers)
+        with report.stage("clasificador"):
+            self.fit_classifier(X, y, n_jobs)
+        if export:
+            with report.stage("exportación"):
+                self.export_system()
+                self.export_model()
+        print(f"Se agregaron {len(paths)} grabación(es).")
+        print("Etapas de la actualización:\n" + report.summary())
+        return len(paths)
+
+    def rebuild_running_state(self, workers=None, exclude=()):
+        """
+        Reconstruye las sumas por movimiento de un sistema exportado antes de
+        update() a partir de las grabaciones de 'data_folder' (usando la caché),
+        salvo las de 'exclude'.
+        """
+        self.movements = list(self.movements)
+        if not hasattr(self, "window_seconds"):
+            self.window_seconds, self.window_step = None, None
+        paths, labels = Dataset_Loader.list_movement_files(self.data_folder, self.movements)
+        excluded = {os.path.abspath(path) for path in exclude}
+        kept = [i for i, path in enumerate(paths) if os.path.abspath(path) not in excluded]
+        paths, labels = [paths[i] for i in kept], [labels[i] for i in kept]
+        per_file, counts = self.file_features(paths, workers)
+        self.reset_running_state()
+        self.add_file_features(paths, labels, per_file, counts)
+        if self.window_seconds:
+            self.classifier_training_set(paths, labels, workers)
 
     def evaluate_individual_movements(self):
         """
@@ -134,33 +425,25 @@ class MovementEvaluationSystem:
                 continue
 
             print(f"\nEvaluando movimientos individuales para {movement}...")
-            X_test = []
-            file_names = []
-
-            for file in os.listdir(movement_folder):
-                if file.endswith(".csv"):
-                    file_path = os.path.join(movement_folder, file)
-                    df = pd.read_csv(file_path)
-                    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-                    features = self.extract_features(df)
-                    X_test.append(features)
-                    file_names.append(file)
-
-            if not X_test:
-                print(f"No hay archivos CSV en {movement_folder}.")
+            paths = list_recordings(movement_folder)
+            file_names = [os.path.basename(file_path) for file_path in paths]
+            X_test, _ = self.file_features(paths)
+
+            if not paths:
+                print(f"No hay grabaciones en {movement_folder}.")
                 continue
 
             X_test = np.array(X_test)
             X_test = self.clean_data(X_test)
 
-            centroid = self.centroids[movement]
-            for i, test_features in enumerate(X_test):
-                similarity = self.compute_similarity(test_features, centroid, method="inverse_distance")
+            # Todas las grabaciones contra el centroide en una sola operación
+            similarities = self.scorer(method="inverse_distance").score_movement(X_test, movement)
+            for i, similarity in enumerate(similarities):
                 print(f"Calificación para {file_names[i]} en {movement}: {similarity:.2f}")
 
     def evaluate_mixed_movements(self):
         """
-        Evalúa la clasificación de archivos CSV mezclados en la carpeta 'mixed'.
+        Evalúa la clasificación de grabaciones mezcladas en la carpeta 'mixed'.
         Se asume que el nombre del archivo contiene la etiqueta del movimiento.
         """
         mixed_folder = os.path.join(self.test_folder, "mixed")
@@ -169,55 +452,100 @@ class MovementEvaluationSystem:
             return
 
         print("\nEvaluando clasificación de movimientos mixtos...")
-        X_test = []
-        y_test = []
-
-        for file in os.listdir(mixed_folder):
-            if file.endswith(".csv"):
-                file_path = os.path.join(mixed_folder, file)
-                df = pd.read_csv(file_path)
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-                features = self.extract_features(df)
-                X_test.append(features)
-                # Se extrae la etiqueta del nombre del archivo (por ejemplo, "Curl_01.csv")
-                label = None
-                for movement in self.movements:
-                    if movement.lower() in file.lower():
-                        label = movement
-                        break
-                if label is None:
-                    label = "Desconocido"
-                y_test.append(label)
-
-        if not X_test:
-            print("No hay archivos CSV en la carpeta 'mixed'.")
+        paths = list_recordings(mixed_folder)
+        X_test, _ = self.file_features(paths)
+        # Se extrae la etiqueta del nombre del archivo (por ejemplo, "Curl_01.csv")
+        y_test = [mixed_label(os.path.basename(file_path), self.movements) for file_path in paths]
+
+        if not paths:
+            print("No hay grabaciones en la carpeta 'mixed'.")
             return
 
         X_test = np.array(X_test)
         y_test = np.array(y_test)
         X_test = self.clean_data(X_test)
 
-        y_pred = self.classification_model.predict(X_test)
+        y_pred = self.classify_files(paths, X_test)
         print("Precisión del modelo de clasificación en datos mixtos:", accuracy_score(y_test, y_pred))
         print("Reporte de clasificación:\n", classification_report(y_test, y_pred))
 
+    def evaluate(self, workers=None, report_path=None, scoring="centroid"):
+        """
+        Evalúa toda la carpeta de prueba en un solo lote (ver Evaluation_Runner):
+        características en paralelo, una calificación matricial y un solo predict.
+        'scoring' es "centroid" o "knn". Devuelve el reporte y, con
+        'report_path', lo guarda como JSON.
+        """
+        report = EvaluationRunner(self, workers=workers, scoring=scoring).run()
+        if report_path:
+            write_report(report, report_path)
+        return report
+
     def export_system(self, filename="movement_system.pkl"):
         """
         Exporta toda la instancia del sistema (modelos, centroides y funciones de preprocesado
         y calificación) para ser cargada en otro código.
         """
-        joblib.dump(self, filename)
+        # Se escribe en un archivo temporal y se reemplaza, para no dejar uno a medias
+        joblib.dump(self, filename + ".tmp")
+        os.replace(filename + ".tmp", filename)
         print(f"Sistema exportado exitosamente en {filename}.")
 
+    def export_model(self, filename=Model_Artifact.DEFAULT_MODEL_PATH):
+        """
+        Exporta solo lo necesario para calificar (centroides, escalador, árboles,
+        sensores y umbrales) en el formato compacto .mmod, que Game carga sin
+        sklearn ni pickle (ver Model_Artifact).
+        """
+        Model_Artifact.export_model(self, filename)
+        print(f"Modelo exportado exitosamente en {filename}.")
+
+
+def load_system(path="movement_system.pkl"):
+    """Carga el sistema exportado con export_system (desde cualquier módulo)."""
+    import __main__
+
+    # El .pkl se exportó ejecutando este módulo como script: la clase se busca en __main__
+    __main__.MovementEvaluationSystem = MovementEvaluationSystem
+    return joblib.load(path)
+
 
 if __name__ == "__main__":
-    # Crear y entrenar el sistema
-    system = MovementEvaluationSystem()
-    system.train()
+    parser = argparse.ArgumentParser(description="Entrena y exporta el sistema de evaluación de movimientos.")
+    parser.add_argument("--update", nargs="+", metavar="ARCHIVO",
+                        help="Agregar grabaciones nuevas (datos/<movimiento>/...) al sistema exportado "
+                             "en lugar de reentrenar desde cero")
+    parser.add_argument("--movement", help="Movimiento de las grabaciones de --update (necesario para uno nuevo "
+                                           "o para archivos fuera de datos/<movimiento>)")
+    parser.add_argument("--feature-set", choices=Frequency_Features.FEATURE_SETS, default="basic",
+                        help="Características: 'basic' (media, desviación y magnitud por sensor) o "
+                             "'extended' (más energía por banda, frecuencia dominante, cruces por cero y jerk)")
+    parser.add_argument("--report", metavar="ARCHIVO",
+                        help="Guardar la evaluación sobre la carpeta de prueba (por archivo, matriz de confusión "
+                             "y tiempos) en este JSON")
+    parser.add_argument("--scoring", choices=Model_Artifact.SCORINGS, default="centroid",
+                        help="Calificación del reporte: contra los centroides o por vecinos más cercanos (k-NN)")
+    args = parser.parse_args()
+
+    if args.update:
+        system = load_system()
+        try:
+            # Reescribe movement_system.pkl y movement_model.mmod
+            system.update({args.movement: args.update} if args.movement else args.update)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        # Crear y entrenar el sistema
+        system = MovementEvaluationSystem(feature_set=args.feature_set)
+        system.train()
 
-    # Exportar el sistema completo (modelos, preprocesado y sistema de calificación)
-    system.export_system()  # Se guarda en "movement_system.pkl" por defecto
+        # Exportar el sistema completo (modelos, preprocesado y sistema de calificación)
+        system.export_system()  # Se guarda en "movement_system.pkl" por defecto
+        system.export_model()  # Versión compacta para el juego: "movement_model.mmod"
 
-    # Evaluaciones:
-    system.evaluate_individual_movements()
-    system.evaluate_mixed_movements()
+        # Evaluaciones:
+        system.evaluate_individual_movements()
+        system.evaluate_mixed_movements()
+        if args.report:
+            print_summary(system.evaluate(report_path=args.report, scoring=args.scoring))
+            print(f"Reporte de evaluación guardado en {args.report}.")
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from Device_Collector import IDLE_POLLS, DeviceCollector
+from Fake_Sensor_Server import FakeSensorServer
+from Sensor_Client import SensorClient
+
+
+@pytest.fixture
+def server():
+    fake = FakeSensorServer().start()
+    time.sleep(0.5)  # Que ya haya historial en la primera consulta
+    yield fake
+    fake.stop()
+
+
+def collect(device, polls, delay=0.1):
+    device.start()
+    for _ in range(polls):
+        device.poll_once()
+        time.sleep(delay)
+    return device.to_dataframe()
+
+
+def assert_no_duplicates(df):
+    assert len(df) > 0
+    assert not df.duplicated(["sensor", "timestamp"]).any()
+
+
+def test_incremental_collection_has_no_duplicates(server):
+    device = DeviceCollector(server.url)
+    df = collect(device, polls=10)
+    assert_no_duplicates(df)
+    assert set(df["sensor"]) == set(server.rates)
+
+
+def test_full_history_responses_are_deduplicated(server):
+    # Sin 'from' cada respuesta repite todo el historial: la deduplicación lo descarta
+    device = DeviceCollector(server.url, client=SensorClient(server.url, incremental=False))
+    df = collect(device, polls=10)
+    assert_no_duplicates(df)
+    for sensor, rate in server.rates.items():
+        timestamps = df.loc[df["sensor"] == sensor, "timestamp"]
+        # Sin huecos ni repeticiones: una muestra cada 1/rate segundos
+        assert timestamps.diff().dropna().max() < 1.5 / rate
+
+
+def test_idle_sensor_does_not_pin_watermark(server):
+    device = DeviceCollector(server.url)
+    collect(device, polls=3)
+    del server.rates["lin_accel"]  # El sensor deja de enviar muestras
+    for _ in range(IDLE_POLLS + 2):
+        device.poll_once()
+        time.sleep(0.1)
+    assert device.watermark() > device.deduplicator.high_water("lin_accel")
+    assert_no_duplicates(device.to_dataframe())